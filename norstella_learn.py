@@ -4,951 +4,1454 @@ Norstella Customer Learning App
 Daily 15-30 min learning sessions for a DS Product Manager
 """
 
+import argparse
+import atexit
+import hashlib
+import heapq
 import json
+import math
 import os
+import pickle
 import random
+import re
+import signal
+import statistics
+import sys
+import sqlite3
+import threading
 import time
-import textwrap
-from datetime import datetime, date
+import unicodedata
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from itertools import islice, permutations
+from datetime import datetime, date, timedelta
 from pathlib import Path
 
 DATA_DIR = Path(__file__).parent / "learning_data"
 PROGRESS_FILE = DATA_DIR / "progress.json"
+PROGRESS_DB = DATA_DIR / "progress.db"
+PROGRESS_LOG = DATA_DIR / "progress.log"
+PROGRESS_SNAPSHOT = DATA_DIR / "progress.snapshot.json"
 
 # ─────────────────────────────────────────────────────────────────────
 # KNOWLEDGE BASE
 # ─────────────────────────────────────────────────────────────────────
 
-MODULES = [
-    {
-        "id": "norstella_overview",
-        "title": "Norstella: The Big Picture",
-        "order": 1,
-        "lessons": [
-            {
-                "id": "what_is_norstella",
-                "title": "What is Norstella?",
-                "content": textwrap.dedent("""\
-                    Norstella is a $5B global pharmaceutical technology and intelligence
-                    company formed in 2022. It unites five brands under one mission:
-                    "smooth the path to lifesaving therapies for patients and providers."
-
-                    THE FIVE BRANDS:
-                      1. Citeline  — Clinical trial intelligence & drug pipeline tracking
-                      2. Evaluate  — Commercial intelligence & pharma asset valuation
-                      3. MMIT      — Market access, payer policy & formulary data
-                      4. Panalgo   — Real-world evidence analytics (IHD platform)
-                      5. The Dedham Group — Oncology & specialty market access consulting
-
-                    KEY FACTS:
-                    - ~1,600 employees, HQ in Yardley, PA
-                    - Backed by Warburg Pincus, Hg, Ardian ($1.13B raised)
-                    - Named to Fast Company's Most Innovative Companies 2025
-                    - CEO: Kris Joshi (appointed July 2025)
-                    - Flagship data asset: NorstellaLinQ (74B+ data points)
-
-                    VALUE PROPOSITION:
-                    Norstella covers the ENTIRE drug lifecycle — from pipeline intelligence
-                    (Citeline, Evaluate) through clinical development (Panalgo RWD) to
-                    commercialization and market access (MMIT, Dedham Group).
-
-                    No other company offers this end-to-end view. Competitors typically
-                    play in one segment: IQVIA (data/CRO), Veeva (CRM/clinical ops),
-                    Clarivate (pipeline data). Norstella's moat is integration.
-                """),
-            },
-            {
-                "id": "customer_segments",
-                "title": "Who Are Norstella's Customers?",
-                "content": textwrap.dedent("""\
-                    Norstella serves the LIFE SCIENCES industry. Key customer segments:
-
-                    1. LARGE PHARMA (e.g., Pfizer, Novartis, Roche, Lilly)
-                       - Use Evaluate for pipeline valuation & competitive intelligence
-                       - Use MMIT to understand payer coverage for launched products
-                       - Use Citeline for clinical trial planning & site selection
-                       - Use Panalgo IHD for HEOR and real-world evidence studies
-
-                    2. BIOTECH / EMERGING BIOPHARMA
-                       - Smaller teams, need efficient tools
-                       - Citeline Pharmaprojects for competitive landscape
-                       - MMIT for pre-launch market access planning
-                       - Evaluate for fundraising/valuation benchmarks
-
-                    3. MEDTECH & DIAGNOSTICS
-                       - Evidence generation with Panalgo
-                       - Market access strategy with MMIT
-
-                    4. CROs (Contract Research Organizations)
-                       - Citeline Sitetrove for investigator/site identification
-                       - Trialtrove for trial benchmarking
-
-                    5. PAYERS & HEALTH SYSTEMS
-                       - MMIT analytics for formulary management
-                       - Dedham Group for clinical pathway design
-
-                    6. CONSULTING & FINANCIAL SERVICES
-                       - Evaluate data for M&A due diligence
-                       - Pipeline analytics for investment decisions
-
-                    CUSTOMER JOURNEY THROUGH NORSTELLA BRANDS:
-                    Discovery → Citeline (Pharmaprojects)
-                    Clinical Dev → Citeline (Trialtrove, Sitetrove) + Panalgo (RWD)
-                    Regulatory → Citeline + Evaluate
-                    Launch Prep → MMIT (payer landscape) + Dedham Group (pathways)
-                    Commercial → MMIT (formulary tracking) + Evaluate (forecasts)
-                    Post-Market → Panalgo (real-world evidence) + MMIT
-                """),
-            },
-        ],
-    },
-    {
-        "id": "citeline",
-        "title": "Deep Dive: Citeline",
-        "order": 2,
-        "lessons": [
-            {
-                "id": "citeline_products",
-                "title": "Citeline Products & Capabilities",
-                "content": textwrap.dedent("""\
-                    Citeline is Norstella's CLINICAL INTELLIGENCE brand. It powers
-                    smarter, faster decisions across drug development.
-
-                    CORE PRODUCTS:
-
-                    PHARMAPROJECTS (Drug Pipeline Intelligence)
-                    - Industry standard for tracking the global drug R&D landscape
-                    - Covers drugs from discovery through post-launch
-                    - Used by BD&L, strategy, and competitive intelligence teams
-                    - Key question it answers: "What's in the pipeline for Disease X?"
-
-                    TRIALTROVE (Clinical Trial Intelligence)
-                    - Curated data on trial design, enrollment, and execution
-                    - 60,000+ trusted data sources
-                    - Covers: trial design, enrollment timelines, patient populations,
-                      endpoints, outcomes, geographic trends
-                    - Key question: "How are competitors designing their Phase 3 trials?"
-
-                    SITETROVE (Investigator & Site Intelligence)
-                    - Industry-leading investigator and site selection tool
-                    - Helps find and evaluate clinical trial sites globally
-                    - Key question: "Which sites enrolled fastest for this indication?"
-
-                    AI / SMARTSOLUTIONS (launched 2024):
-                    - Protocol SmartDesign: AI-driven protocol optimization
-                    - Uses ML + LLMs on top of Trialtrove & Sitetrove data
-                    - Predictive analytics for trial feasibility
-
-                    "PLUS" UPGRADES (Feb 2025):
-                    - Trialtrove+, Sitetrove+, Pharmaprojects+
-                    - Proprietary performance metrics
-                    - "Ella" AI assistant integrated into the UI
-                    - Enhanced data visualization
-
-                    WHO BUYS CITELINE?
-                    - Clinical operations teams (trial planning)
-                    - R&D strategy & portfolio teams
-                    - Business development & licensing
-                    - Medical affairs
-                    - CROs (site selection)
-                """),
-            },
-        ],
-    },
-    {
-        "id": "evaluate",
-        "title": "Deep Dive: Evaluate",
-        "order": 3,
-        "lessons": [
-            {
-                "id": "evaluate_products",
-                "title": "Evaluate Products & Capabilities",
-                "content": textwrap.dedent("""\
-                    Evaluate is Norstella's COMMERCIAL INTELLIGENCE brand, providing
-                    predictive analytics and valuation for pharma assets since 1996.
-
-                    CORE PRODUCTS:
-
-                    EVALUATE PHARMA
-                    - Consensus revenue forecasts for drugs and companies
-                    - Net Present Value (NPV) for pipeline assets
-                    - Used for portfolio planning, BD&L, and M&A
-                    - Example: Novo's Cagrisema valued at $80B NPV (highest in industry)
-                    - Key question: "What's the commercial potential of this drug?"
-
-                    EVALUATE OMNIUM
-                    - Self-service analytics platform
-                    - Custom dashboards and scenario modeling
-                    - Compare company portfolios and therapeutic areas
-
-                    EP VANTAGE
-                    - Editorial and analysis arm
-                    - Data-driven commentary on industry trends
-                    - M&A analysis, pipeline reviews, market forecasts
-                    - Widely read by C-suite and investors
-
-                    KEY INDUSTRY INSIGHTS (from Evaluate):
-                    - Pharma R&D CAGR slowing: 3% (2023-2030) vs 9% (2016-2023)
-                    - R&D as % of sales: dropping from 27% (2024) to 21% (2030)
-                    - Medicare drug price negotiations expanding (15 more drugs in 2026)
-
-                    WHO BUYS EVALUATE?
-                    - CFOs and corporate strategy teams
-                    - Business development & licensing
-                    - Investor relations
-                    - Buy-side analysts and investment banks
-                    - Consulting firms (McKinsey, BCG, etc.)
-                """),
-            },
-        ],
-    },
-    {
-        "id": "mmit",
-        "title": "Deep Dive: MMIT",
-        "order": 4,
-        "lessons": [
-            {
-                "id": "mmit_products",
-                "title": "MMIT Products & Market Access",
-                "content": textwrap.dedent("""\
-                    MMIT (Managed Markets Insight & Technology) is Norstella's
-                    MARKET ACCESS brand. It answers: "Can patients actually GET this drug?"
-
-                    THE MARKET ACCESS PROBLEM:
-                    Even after FDA approval, a drug faces coverage decisions by:
-                    - Commercial payers (UnitedHealthcare, Cigna, Aetna, etc.)
-                    - Medicare Part D plans
-                    - Medicaid programs
-                    - PBMs (CVS Caremark, Express Scripts, Optum Rx)
-                    - IDNs / Health Systems
-                    Each can impose: formulary tiers, prior auth, step therapy,
-                    quantity limits, specialty pharmacy requirements.
-
-                    CORE PRODUCTS:
-
-                    ANALYTICS PLATFORM
-                    - Formulary and medical benefit coverage data
-                    - Covered lives analysis
-                    - Policy and restriction tracking across payers
-                    - Key question: "How is my drug covered across all US payers?"
-
-                    FORMTRAK
-                    - Connects coverage data to field team assets
-                    - Promotional templates with real-time payer insights
-
-                    CONTRACT VALIDATION
-                    - Automates crosschecking rebate offers vs. actual formulary placement
-                    - Only platform of its kind in the industry
-
-                    PATIENT ACCESS ANALYTICS
-                    - Combines coverage + claims data
-                    - Shows payer AND prescriber behavior
-                    - Key question: "Why aren't patients filling prescriptions?"
-
-                    IDN FORMULARY INSIGHTS
-                    - Health system formulary visibility
-                    - Clinical pathway tracking within IDNs
-
-                    PAYER LANDSCAPE & DIRECTORY
-                    - Segment payers by market share, LOB, geography
-                    - Identify decision-makers
-
-                    WHO BUYS MMIT?
-                    - Market access / trade teams
-                    - Account managers (payer-facing)
-                    - Commercial analytics teams
-                    - Brand marketing teams
-                    - HEOR teams (health economics & outcomes research)
-                """),
-            },
-        ],
-    },
-    {
-        "id": "panalgo",
-        "title": "Deep Dive: Panalgo",
-        "order": 5,
-        "lessons": [
-            {
-                "id": "panalgo_products",
-                "title": "Panalgo & Real-World Evidence",
-                "content": textwrap.dedent("""\
-                    Panalgo is Norstella's REAL-WORLD EVIDENCE (RWE) analytics brand.
-                    Its mission: make healthcare data analysis accessible to non-coders.
-
-                    WHY RWE MATTERS:
-                    Clinical trials show efficacy in controlled settings. RWE shows
-                    how drugs perform in the REAL WORLD — diverse patients, varied
-                    adherence, co-morbidities, real clinical practice.
-                    FDA increasingly accepts RWE for label expansions & safety signals.
-
-                    CORE PRODUCTS:
-
-                    IHD (INSTANT HEALTH DATA)
-                    - Flagship no-code analytics platform
-                    - Point-and-click cohort creation, study design
-                    - Eliminates need for SAS/R/SQL programming
-                    - 85% faster than traditional analytics methods
-                    - Key users: HEOR scientists, medical affairs, epidemiologists
-
-                    IHD CLOUD (launched 2024)
-                    - AWS-powered scalable analytics
-                    - Centralize data and technology for evidence teams
-                    - Enterprise-grade security and governance
-
-                    ELLA AI
-                    - AI assistant integrated into IHD
-                    - Natural language cohort creation
-                    - No SQL or technical expertise required
-                    - "Show me diabetic patients over 65 on metformin" → instant cohort
-
-                    LINQNOTES (launched May 2025)
-                    - Unlocks UNSTRUCTURED clinical data (80% of patient insight)
-                    - Physician narratives, imaging reports, discharge summaries
-                    - NLP/AI extraction of clinical context
-                    - Answers the "WHY" behind treatment decisions
-
-                    NORSTELLALINQ DATA ASSET:
-                    - 74 billion data points
-                    - Integrates: EMR, labs, open/closed claims, SDoH, mortality
-                    - Largest linked patient-level dataset in the industry
-                    - Feeds into IHD for analysis
-
-                    WHO BUYS PANALGO?
-                    - HEOR teams
-                    - Medical affairs
-                    - Epidemiology groups
-                    - Market access (evidence generation)
-                    - Regulatory affairs (post-market commitments)
-                """),
-            },
-        ],
-    },
-    {
-        "id": "dedham_group",
-        "title": "Deep Dive: The Dedham Group",
-        "order": 6,
-        "lessons": [
-            {
-                "id": "dedham_products",
-                "title": "The Dedham Group & Clinical Pathways",
-                "content": textwrap.dedent("""\
-                    The Dedham Group is Norstella's STRATEGIC CONSULTING brand,
-                    focused on ONCOLOGY and SPECIALTY market access.
-
-                    WHAT ARE CLINICAL PATHWAYS?
-                    Standardized, evidence-based treatment protocols that guide
-                    oncologists on which drugs to use for specific cancer types/stages.
-                    Think of them as "treatment playbooks" for oncology.
-
-                    WHY THEY MATTER:
-                    - 62% of US oncologists are exposed to a clinical pathway
-                    - 80% adherence rate among those using pathways
-                    - Being OFF-pathway = limited brand perception and utilization
-                    - FDA issued 60+ oncology approvals in 2024 alone
-                    - Pathways help generalist oncologists navigate complexity
-
-                    KEY TRENDS:
-                    - Practice aggregators (e.g., OneOncology) are standardizing
-                      pathways across community oncology networks
-                    - Payers increasingly tying reimbursement to pathway adherence
-                    - Value-based care models relying on pathways for cost control
-
-                    DEDHAM GROUP SERVICES:
-                    - Clinical pathway strategy (get ON pathway / improve position)
-                    - Oncology market access consulting
-                    - Payer engagement strategy
-                    - Value-based care advisory
-                    - IDN and health system contracting strategy
-                    - Competitive intelligence in oncology
-
-                    HOW DEDHAM CONNECTS TO OTHER BRANDS:
-                    - Uses MMIT data for payer landscape understanding
-                    - Leverages Panalgo RWE for evidence to support pathway inclusion
-                    - Citeline data for competitive trial landscape
-                    - Evaluate for commercial forecasting
-
-                    WHO BUYS DEDHAM GROUP SERVICES?
-                    - Oncology brand teams
-                    - Market access leaders (specialty/oncology)
-                    - Commercial strategy teams
-                    - Medical affairs (pathway evidence generation)
-                """),
-            },
-        ],
-    },
-    {
-        "id": "drug_lifecycle",
-        "title": "The Drug Development Lifecycle",
-        "order": 7,
-        "lessons": [
-            {
-                "id": "lifecycle_stages",
-                "title": "From Discovery to Post-Market",
-                "content": textwrap.dedent("""\
-                    Understanding the drug lifecycle is essential because Norstella's
-                    products map to EVERY STAGE.
-
-                    STAGE 1: DISCOVERY (2-5 years)
-                    - 5,000-10,000 compounds screened per candidate
-                    - Target identification, lead optimization
-                    - Norstella touchpoint: Citeline Pharmaprojects
-
-                    STAGE 2: PRECLINICAL (1-2 years)
-                    - Lab & animal studies (toxicology, pharmacokinetics)
-                    - IND (Investigational New Drug) application filed
-                    - Norstella touchpoint: Citeline, Evaluate (asset valuation)
-
-                    STAGE 3: CLINICAL TRIALS (6-10 years)
-                    - Phase I: 20-100 healthy volunteers, safety/dosing (70% advance)
-                    - Phase II: 100-500 patients, efficacy signal (33% advance)
-                    - Phase III: 1,000-5,000 patients, confirm efficacy (25-30% advance)
-                    - Norstella touchpoints: Citeline (Trialtrove, Sitetrove, SmartDesign),
-                      Panalgo (RWE for trial design), Evaluate (pipeline valuation)
-
-                    STAGE 4: REGULATORY REVIEW (1-2 years)
-                    - NDA (drugs) or BLA (biologics) submission
-                    - FDA pathways: Standard, Priority, Fast Track, Breakthrough,
-                      Accelerated Approval
-                    - Norstella touchpoint: Citeline (regulatory tracking)
-
-                    STAGE 5: LAUNCH & COMMERCIALIZATION
-                    - Payer negotiations, formulary placement
-                    - Field team deployment, KOL engagement
-                    - Norstella touchpoints: MMIT (market access), Dedham Group
-                      (pathway strategy), Evaluate (commercial forecasts)
-
-                    STAGE 6: POST-MARKET / LIFECYCLE MANAGEMENT
-                    - Phase IV studies, label expansions
-                    - Real-world evidence generation
-                    - Norstella touchpoints: Panalgo (IHD, LinQNotes),
-                      MMIT (ongoing coverage tracking)
-
-                    KEY STATS:
-                    - Average cost: $2.6 billion per approved drug
-                    - Average time: 10-15 years from discovery to approval
-                    - Overall success rate: ~10-20% of clinical candidates
-                    - Only 1 in 20,000-30,000 screened compounds gets approved
-                """),
-            },
-        ],
-    },
-    {
-        "id": "industry_landscape",
-        "title": "The Competitive & Industry Landscape",
-        "order": 8,
-        "lessons": [
-            {
-                "id": "competitors",
-                "title": "Norstella vs. Competitors",
-                "content": textwrap.dedent("""\
-                    Understanding WHO ELSE plays in Norstella's space helps you
-                    articulate differentiation to customers.
-
-                    PIPELINE & CLINICAL INTELLIGENCE:
-                    - Citeline vs. Clarivate (Cortellis) vs. GlobalData
-                    - Citeline advantage: depth of trial-level data, SmartSolutions AI
-                    - Clarivate strength: broad IP + scientific data
-
-                    COMMERCIAL ANALYTICS:
-                    - Evaluate vs. GlobalData vs. BMI (Fitch Solutions)
-                    - Evaluate advantage: consensus forecasts, NPV methodology
-                    - Evaluate is gold standard for pharma M&A due diligence
-
-                    MARKET ACCESS:
-                    - MMIT vs. Fingertip Formulary vs. IQVIA (access data)
-                    - MMIT advantage: depth of payer policy data, Contract Validation
-                    - IQVIA strength: massive claims data, broader analytics
-
-                    REAL-WORLD EVIDENCE:
-                    - Panalgo vs. Aetion vs. TriNetX vs. Flatiron (Roche)
-                    - Panalgo advantage: no-code IHD platform, NorstellaLinQ scale
-                    - Aetion strength: regulatory-grade evidence platform
-                    - Flatiron strength: oncology depth (EHR-derived)
-
-                    CONSULTING:
-                    - Dedham Group vs. Precision AQ vs. IntrinsiQ (IQVIA)
-                    - Dedham advantage: integrated with MMIT data + Panalgo RWE
-
-                    NORSTELLA'S OVERALL DIFFERENTIATOR:
-                    No competitor offers the full pipeline-to-patient journey.
-                    - IQVIA is closest but is a conglomerate, not purpose-built
-                    - Veeva is strong in CRM/clinical ops but not intelligence
-                    - Clarivate has pipeline data but no market access
-                    - The INTEGRATION of 5 brands + NorstellaLinQ is unique
-                """),
-            },
-            {
-                "id": "industry_trends",
-                "title": "Industry Trends Shaping Customers",
-                "content": textwrap.dedent("""\
-                    These trends affect WHAT customers need from Norstella:
-
-                    1. AI/ML IN DRUG DEVELOPMENT
-                    - AI-designed molecules, predictive trial design
-                    - Customers want: AI-powered insights, not just raw data
-                    - Norstella response: SmartSolutions, Ella AI, LinQNotes
-
-                    2. REAL-WORLD EVIDENCE (RWE) EXPANSION
-                    - FDA 21st Century Cures Act: RWE for regulatory decisions
-                    - Payers demanding RWE for coverage
-                    - Customers want: faster, cheaper evidence generation
-                    - Norstella response: Panalgo IHD + NorstellaLinQ
-
-                    3. DRUG PRICING PRESSURE
-                    - IRA Medicare price negotiations (expanding to 15 more drugs 2026)
-                    - Payer prior auth and step therapy increasing
-                    - Customers want: granular payer intelligence
-                    - Norstella response: MMIT policy tracking, Dedham Group strategy
-
-                    4. PRECISION MEDICINE / BIOMARKER-DRIVEN TRIALS
-                    - Smaller patient populations, more complex trial design
-                    - Customers want: better site selection, patient identification
-                    - Norstella response: Citeline Sitetrove+, NorstellaLinQ
-
-                    5. PHARMA M&A WAVE
-                    - Big pharma buying biotech to fill pipeline gaps
-                    - Customers want: deal intelligence, target valuation
-                    - Norstella response: Evaluate NPV, EP Vantage analysis
-
-                    6. DECENTRALIZED CLINICAL TRIALS (DCTs)
-                    - COVID accelerated remote/hybrid trials
-                    - Customers want: data on DCT performance, site selection
-                    - Norstella response: Citeline trial design intelligence
-
-                    7. R&D PRODUCTIVITY DECLINE
-                    - R&D spend growing slower (3% CAGR vs 9% historically)
-                    - Customers want: do more with less, data-driven decisions
-                    - Norstella response: integrated analytics, efficiency tools
-                """),
-            },
-        ],
-    },
-    {
-        "id": "ds_pm_role",
-        "title": "DS Product Management at Norstella",
-        "order": 9,
-        "lessons": [
-            {
-                "id": "ds_pm_context",
-                "title": "Your Role in Context",
-                "content": textwrap.dedent("""\
-                    As a DATA SCIENCE PRODUCT MANAGER at Norstella, you sit at the
-                    intersection of data, AI/ML, and customer value.
-
-                    YOUR STAKEHOLDERS:
-                    - Data science / ML engineering teams (your team)
-                    - Product managers for each brand (Citeline, MMIT, etc.)
-                    - Commercial / sales teams (customer-facing)
-                    - Customer success teams
-                    - Executive leadership
-
-                    KEY QUESTIONS CUSTOMERS ASK THAT YOU SHOULD UNDERSTAND:
-                    - "Can NorstellaLinQ help us find the right sites for our trial?"
-                    - "How does Ella AI compare to our internal data science team?"
-                    - "Can we use Panalgo IHD for our FDA post-market commitment?"
-                    - "How fresh is your claims data?"
-                    - "Can I link your data to our internal data assets?"
-                    - "What's the patient coverage for our drug across Medicare Part D?"
-
-                    DATA SCIENCE OPPORTUNITIES:
-                    1. NorstellaLinQ as a platform play
-                       - 74B data points = massive feature engineering potential
-                       - Linking clinical, claims, RWD, and commercial data
-                    2. AI/ML model development
-                       - Trial success prediction
-                       - Patient identification & recruitment
-                       - Payer decision prediction
-                       - Drug revenue forecasting
-                    3. NLP / unstructured data
-                       - LinQNotes: extracting insight from clinical notes
-                       - Ella AI: natural language query interface
-                    4. Productionizing models
-                       - Moving from ad-hoc analysis to scalable products
-                       - Model monitoring, drift detection, retraining
-
-                    YOUR PM PRINCIPLES APPLIED:
-                    - "Understand, Identify, Execute" (Naomi Gleit framework)
-                    - Understand: customer jobs-to-be-done at each lifecycle stage
-                    - Identify: where DS/ML creates the highest-ROI value
-                    - Execute: ship models as features within existing products
-                """),
-            },
-        ],
-    },
-]
+# Lessons, quizzes and flashcards live in versioned content packs under
+# content/: manifest.json lists the module packs in order, and each
+# content/<module_id>/ holds a module.json (titles, prerequisites, lesson
+# list, quiz bank) plus one plain-text file per lesson. Packs are only read on first
+# access, and the compiled catalog is pickled to learning_data/cache/ so
+# later startups skip parsing entirely.
+CONTENT_DIR = Path(__file__).parent / "content"
+CONTENT_CACHE_DIR = DATA_DIR / "cache"
+CONTENT_CACHE_FORMAT = 7  # bump when compile_content() output changes
+
+def content_signature(content_dir=CONTENT_DIR):
+    """Cache key: hash of the manifest plus size/mtime of every pack file."""
+    content_dir = Path(content_dir)
+    h = hashlib.sha256(f"format {CONTENT_CACHE_FORMAT}\n".encode())
+    h.update((content_dir / "manifest.json").read_bytes())
+    for path in sorted(content_dir.rglob("*")):
+        if path.is_file():
+            st = path.stat()
+            h.update(f"{path.relative_to(content_dir)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+LESSON_INLINE_MAX = 64 * 1024  # bytes; bigger lesson files are not held in memory
+
+def lesson_text(lesson):
+    if lesson["content"] is not None:
+        return lesson["content"]
+    return (CONTENT_DIR / lesson["file"]).read_text(encoding="utf-8")
+
+def question_id(module_id, q):
+    """Stable id for a quiz question that has no explicit "id" in its pack."""
+    return f"{module_id}/{hashlib.sha1(q['q'].encode('utf-8')).hexdigest()[:8]}"
+
+def lesson_refs(module_id, refs):
+    """Lesson ids from a pack's "requires", which may leave out their own module."""
+    return [ref if "/" in ref else f"{module_id}/{ref}" for ref in refs]
+
+def compile_content(content_dir=CONTENT_DIR):
+    """Parse every content pack into the MODULES/QUIZZES/FLASHCARDS shapes."""
+    content_dir = Path(content_dir)
+    manifest = json.loads((content_dir / "manifest.json").read_text(encoding="utf-8"))
+    modules, quizzes = [], {}
+    for module_id in manifest["modules"]:
+        module_dir = content_dir / module_id
+        pack = json.loads((module_dir / "module.json").read_text(encoding="utf-8"))
+        modules.append({
+            "id": pack["id"],
+            "title": pack["title"],
+            "order": pack["order"],
+            "requires": pack.get("requires", []),  # module ids
+            "lessons": [
+                {
+                    "id": lesson["id"],
+                    "title": lesson["title"],
+                    "requires": lesson_refs(pack["id"], lesson.get("requires", [])),
+                    "file": f"{module_id}/{lesson['file']}",
+                    # large lessons stay on disk and are paged from a memory map
+                    "content": (
+                        (module_dir / lesson["file"]).read_text(encoding="utf-8")
+                        if (module_dir / lesson["file"]).stat().st_size <= LESSON_INLINE_MAX
+                        else None
+                    ),
+                }
+                for lesson in pack["lessons"]
+            ],
+        })
+        if pack.get("quiz"):
+            for q in pack["quiz"]:
+                q.setdefault("id", question_id(pack["id"], q))
+                q["requires"] = lesson_refs(pack["id"], q.get("requires", []))
+                if q["type"] == "fill_blank":
+                    q["accept"] = answer_keys(q["answer"], q.get("aliases", ()))
+            quizzes[pack["id"]] = pack["quiz"]
+    flashcards = [
+        (card["front"], card["back"], card["module"])
+        for card in json.loads((content_dir / manifest["flashcards"]).read_text(encoding="utf-8"))
+    ]
+    return {
+        "version": manifest["version"],
+        "modules": modules,
+        "quizzes": quizzes,
+        "flashcards": flashcards,
+    }
 
-# ─────────────────────────────────────────────────────────────────────
-# QUIZ BANK
-# ─────────────────────────────────────────────────────────────────────
+_content = None
 
-QUIZZES = {
-    "norstella_overview": [
-        {
-            "type": "multiple_choice",
-            "q": "Which of the following is NOT one of Norstella's five brands?",
-            "options": ["Citeline", "Evaluate", "Veeva", "MMIT", "Panalgo"],
-            "answer": "Veeva",
-            "explanation": "Veeva is a separate company (CRM/clinical ops). Norstella's five brands are Citeline, Evaluate, MMIT, Panalgo, and The Dedham Group.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "What is NorstellaLinQ?",
-            "options": [
-                "A CRM platform for pharma sales teams",
-                "The industry's first fully integrated data asset (74B+ data points)",
-                "A clinical trial management system",
-                "An FDA regulatory submission portal",
-            ],
-            "answer": "The industry's first fully integrated data asset (74B+ data points)",
-            "explanation": "NorstellaLinQ integrates EMR, labs, claims, SDoH, and mortality data — 74 billion data points — into a single linked patient-level dataset.",
-        },
-        {
-            "type": "fill_blank",
-            "q": "Norstella's mission is to '_______ the path to lifesaving therapies for patients and providers.'",
-            "answer": "smooth",
-            "explanation": "The mission is to 'smooth the path to lifesaving therapies for patients and providers.'",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "Which Norstella brand would a biotech CEO use to value their pipeline asset for a fundraise?",
-            "options": ["MMIT", "Citeline", "Evaluate", "Panalgo"],
-            "answer": "Evaluate",
-            "explanation": "Evaluate provides consensus revenue forecasts and NPV valuations for drug assets — exactly what's needed for fundraising and M&A.",
-        },
-        {
-            "type": "matching",
-            "q": "Match each Norstella brand to its PRIMARY focus area:",
-            "pairs": {
-                "Citeline": "Clinical trial intelligence & drug pipeline",
-                "Evaluate": "Commercial intelligence & asset valuation",
-                "MMIT": "Market access & payer policy data",
-                "Panalgo": "Real-world evidence analytics",
-                "Dedham Group": "Oncology market access consulting",
-            },
-        },
-        {
-            "type": "scenario",
-            "q": textwrap.dedent("""\
-                SCENARIO: A large pharma company is planning a Phase 3 trial for a new
-                cancer drug. They need to: (1) find the best sites, (2) understand the
-                competitive trial landscape, and (3) plan their market access strategy.
-
-                Which Norstella brands would you recommend for EACH need?"""),
-            "answer": textwrap.dedent("""\
-                1. Find best sites → CITELINE (Sitetrove / Sitetrove+)
-                2. Competitive trial landscape → CITELINE (Trialtrove) + EVALUATE (pipeline valuation)
-                3. Market access strategy → MMIT (payer landscape) + DEDHAM GROUP (pathway strategy for oncology)"""),
-        },
-    ],
-    "citeline": [
-        {
-            "type": "multiple_choice",
-            "q": "What is Trialtrove primarily used for?",
-            "options": [
-                "Drug pricing analytics",
-                "Curated clinical trial intelligence (design, enrollment, outcomes)",
-                "Payer formulary tracking",
-                "Real-world evidence generation",
-            ],
-            "answer": "Curated clinical trial intelligence (design, enrollment, outcomes)",
-            "explanation": "Trialtrove provides curated data on trial design, enrollment, and execution from 60,000+ sources.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "Citeline's SmartSolutions use what technology to optimize trial planning?",
-            "options": [
-                "Blockchain and distributed ledgers",
-                "AI, ML, and large language models",
-                "Manual expert curation only",
-                "Simple statistical models",
-            ],
-            "answer": "AI, ML, and large language models",
-            "explanation": "SmartSolutions (Protocol SmartDesign) use AI, ML, and LLMs on top of Trialtrove & Sitetrove data.",
-        },
-        {
-            "type": "fill_blank",
-            "q": "_______ is the industry standard for tracking the global drug R&D landscape.",
-            "answer": "pharmaprojects",
-            "explanation": "Pharmaprojects tracks drugs from discovery through post-launch and is the industry standard for pipeline intelligence.",
-        },
-        {
-            "type": "scenario",
-            "q": textwrap.dedent("""\
-                SCENARIO: A CRO needs to find experienced investigators in Southeast Asia
-                for a hepatitis B trial. They want sites that have enrolled quickly in
-                similar trials before.
-
-                Which Citeline product(s) would best serve this need?"""),
-            "answer": textwrap.dedent("""\
-                SITETROVE+ — provides investigator and site intelligence globally, including
-                performance metrics on enrollment speed. The "plus" version adds proprietary
-                performance data. Combined with TRIALTROVE+ for benchmarking against similar
-                hepatitis B trials in the region."""),
-        },
-    ],
-    "evaluate": [
-        {
-            "type": "multiple_choice",
-            "q": "What does NPV stand for in the context of Evaluate's pipeline analytics?",
-            "options": [
-                "New Product Validation",
-                "Net Present Value",
-                "National Pharma Valuation",
-                "Normalized Pipeline Volume",
-            ],
-            "answer": "Net Present Value",
-            "explanation": "Evaluate uses Net Present Value (NPV) to estimate the current value of future cash flows from pipeline drugs.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "According to Evaluate data, pharma R&D spend as % of sales is projected to:",
-            "options": [
-                "Increase from 21% to 27% by 2030",
-                "Remain flat at 27% through 2030",
-                "Decrease from 27% (2024) to 21% (2030)",
-                "Double by 2030",
-            ],
-            "answer": "Decrease from 27% (2024) to 21% (2030)",
-            "explanation": "R&D spending as a percentage of sales is expected to decline, reflecting productivity pressure and portfolio optimization.",
-        },
-        {
-            "type": "fill_blank",
-            "q": "EP _______ is Evaluate's editorial and analysis arm providing data-driven commentary on pharma trends.",
-            "answer": "vantage",
-            "explanation": "EP Vantage (Evaluate Pharma Vantage) provides editorial analysis on pipeline developments, M&A, and market forecasts.",
-        },
-    ],
-    "mmit": [
-        {
-            "type": "multiple_choice",
-            "q": "Which MMIT product automates crosschecking rebate offers vs. actual formulary placement?",
-            "options": [
-                "FormTrak",
-                "Contract Validation",
-                "Patient Access Analytics",
-                "Payer Landscape",
-            ],
-            "answer": "Contract Validation",
-            "explanation": "Contract Validation is the only workflow automation platform that crosschecks rebate offer requirements against actual payer formulary data.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "What is 'step therapy' in the context of payer restrictions?",
-            "options": [
-                "A phased clinical trial design",
-                "A requirement to try cheaper drugs before a payer covers a more expensive one",
-                "A drug manufacturing process",
-                "A patient education program",
-            ],
-            "answer": "A requirement to try cheaper drugs before a payer covers a more expensive one",
-            "explanation": "Step therapy (or 'fail first') requires patients to try and fail on cheaper alternatives before the payer will cover a preferred drug.",
-        },
-        {
-            "type": "scenario",
-            "q": textwrap.dedent("""\
-                SCENARIO: A brand manager notices prescriptions are being written but
-                patients aren't filling them. They suspect payer restrictions.
-
-                What MMIT product(s) would help diagnose this problem?"""),
-            "answer": textwrap.dedent("""\
-                PATIENT ACCESS ANALYTICS — combines coverage and claims data to show both
-                payer and prescriber behavior, revealing whether prior auth requirements,
-                step therapy, or formulary tier placement are causing abandonment.
-                ANALYTICS PLATFORM — to see specific restrictions by payer."""),
-        },
-    ],
-    "panalgo": [
-        {
-            "type": "multiple_choice",
-            "q": "What percentage faster is IHD compared to traditional analytics methods?",
-            "options": ["25%", "50%", "85%", "95%"],
-            "answer": "85%",
-            "explanation": "IHD Cloud accelerates healthcare analytics by 85% compared to traditional SAS/R programming methods.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "What percentage of patient insight lives in unstructured data (per Panalgo)?",
-            "options": ["20%", "40%", "60%", "80%"],
-            "answer": "80%",
-            "explanation": "Up to 80% of patient insight lives in unstructured notes — physician narratives, imaging reports, discharge summaries — which LinQNotes unlocks.",
-        },
-        {
-            "type": "fill_blank",
-            "q": "_______ is Panalgo's AI assistant that enables natural language cohort creation without SQL.",
-            "answer": "ella",
-            "explanation": "Ella AI lets users create cohorts using natural language queries, removing the need for programming skills.",
-        },
-        {
-            "type": "scenario",
-            "q": textwrap.dedent("""\
-                SCENARIO: An HEOR team needs to generate real-world evidence for an FDA
-                post-market commitment. They need to analyze treatment patterns in
-                diabetic patients but their team doesn't know SAS or R.
-
-                Which Panalgo products would you recommend?"""),
-            "answer": textwrap.dedent("""\
-                IHD (Instant Health Data) — no-code analytics platform, point-and-click
-                study design. Combined with NORSTELLALINQ data (74B data points including
-                claims and EMR). ELLA AI for natural language cohort creation. If they need
-                to understand WHY treatment patterns exist, LINQNOTES for unstructured data."""),
-        },
-    ],
-    "dedham_group": [
-        {
-            "type": "multiple_choice",
-            "q": "What percentage of US oncologists are currently exposed to a clinical pathway?",
-            "options": ["25%", "42%", "62%", "85%"],
-            "answer": "62%",
-            "explanation": "According to MMIT Pulse Analytics data, roughly 62% of US oncologists are exposed to a clinical pathway.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "Among oncologists using pathways, what is the adherence rate?",
-            "options": ["40%", "60%", "80%", "95%"],
-            "answer": "80%",
-            "explanation": "80% of oncologists using pathways adhere to recommended treatment guidelines, making pathway inclusion critical for drug utilization.",
-        },
-        {
-            "type": "fill_blank",
-            "q": "Practice aggregators like _______ are standardizing pathways across community oncology networks.",
-            "answer": "oneoncology",
-            "explanation": "OneOncology has been rapidly acquiring community oncology clinics and standardizing clinical pathway decision support tools.",
-        },
-    ],
-    "drug_lifecycle": [
-        {
-            "type": "multiple_choice",
-            "q": "How many compounds are typically screened in drug discovery for each approved drug?",
-            "options": ["100-500", "1,000-5,000", "5,000-10,000", "20,000-30,000"],
-            "answer": "5,000-10,000",
-            "explanation": "5,000-10,000 compounds are screened per candidate (though only 1 in 20,000-30,000 screened overall gets approved).",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "What is the average cost to develop one approved drug?",
-            "options": ["$500 million", "$1.2 billion", "$2.6 billion", "$5 billion"],
-            "answer": "$2.6 billion",
-            "explanation": "On average, it costs $2.6 billion to develop one new medicine, including the cost of many failures.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "What percentage of Phase I trials advance to Phase II?",
-            "options": ["30%", "50%", "70%", "90%"],
-            "answer": "70%",
-            "explanation": "Roughly 70% of Phase I trials yield satisfactory results and move to Phase II.",
-        },
-        {
-            "type": "fill_blank",
-            "q": "A _______ is filed for biologic drugs (as opposed to an NDA for small molecules).",
-            "answer": "bla",
-            "explanation": "A Biologics License Application (BLA) is filed for biologics, while a New Drug Application (NDA) is for small molecule drugs.",
-        },
-        {
-            "type": "matching",
-            "q": "Match each FDA pathway to its description:",
-            "pairs": {
-                "Standard Review": "Default pathway, ~10-12 months",
-                "Priority Review": "Significant improvement over existing treatments, ~6 months",
-                "Fast Track": "Serious conditions with unmet need, rolling submission",
-                "Breakthrough": "Preliminary evidence of substantial improvement",
-                "Accelerated Approval": "Based on surrogate endpoint, confirmatory trial required",
-            },
-        },
-    ],
-    "industry_landscape": [
-        {
-            "type": "multiple_choice",
-            "q": "Which competitor is closest to Norstella in offering end-to-end pipeline-to-patient intelligence?",
-            "options": ["Veeva", "IQVIA", "Clarivate", "Flatiron"],
-            "answer": "IQVIA",
-            "explanation": "IQVIA is closest as a conglomerate covering data, analytics, CRO, and technology. But it's not purpose-built for integration like Norstella.",
-        },
-        {
-            "type": "multiple_choice",
-            "q": "The IRA (Inflation Reduction Act) allows Medicare to negotiate prices for how many additional drugs in 2026?",
-            "options": ["5", "10", "15", "25"],
-            "answer": "15",
-            "explanation": "Medicare will select up to 15 more drugs for price negotiations effective in 2026, adding to the initial 10.",
-        },
-        {
-            "type": "scenario",
-            "q": textwrap.dedent("""\
-                SCENARIO: A customer says "We already use IQVIA for everything. Why should
-                we add Norstella?"
-
-                How would you respond?"""),
-            "answer": textwrap.dedent("""\
-                Key differentiation points:
-                1. DEPTH vs BREADTH: MMIT has deeper payer policy data than IQVIA's access solutions
-                2. NO-CODE RWE: Panalgo IHD democratizes analytics (IQVIA requires heavy consulting)
-                3. CLINICAL PATHWAYS: Dedham Group specializes in oncology pathways (IQVIA's IntrinsiQ is less focused)
-                4. NORSTELLALINQ: Purpose-built integrated dataset vs. IQVIA's fragmented data assets
-                5. ASSET VALUATION: Evaluate is the gold standard (IQVIA doesn't do NPV)
-                6. AI-NATIVE: SmartSolutions and Ella AI are product features, not consulting add-ons"""),
-        },
-    ],
-    "ds_pm_role": [
-        {
-            "type": "scenario",
-            "q": textwrap.dedent("""\
-                SCENARIO: Your VP asks you to prioritize the next data science initiative.
-                You have three options:
-                A) Build a trial success prediction model using Citeline data
-                B) Create an AI-powered payer decision predictor using MMIT data
-                C) Improve LinQNotes NLP accuracy for clinical note extraction
-
-                Walk through how you'd evaluate these using the "Understand, Identify,
-                Execute" framework."""),
-            "answer": textwrap.dedent("""\
-                UNDERSTAND: What are the customer jobs-to-be-done for each?
-                - A) Clinical teams need to de-risk Phase 3 decisions ($2.6B per drug)
-                - B) Market access teams need to anticipate formulary changes pre-launch
-                - C) HEOR teams need to extract treatment rationale from unstructured data
-
-                IDENTIFY: Evaluate each on Value x Feasibility:
-                - A) High value (massive $ at stake), medium feasibility (need labeled outcomes data)
-                - B) High value (direct revenue impact), high feasibility (MMIT has rich structured data)
-                - C) Medium value (improves existing product), high feasibility (existing NLP pipeline)
-
-                EXECUTE: Recommendation framework:
-                - B has best ROI: high value + high feasibility + clear data advantage
-                - C is a quick win that improves existing product (ship fast, learn fast)
-                - A is high-value but longer horizon — start with a proof of concept"""),
-        },
-        {
-            "type": "multiple_choice",
-            "q": "Which NorstellaLinQ data types are MOST relevant for a DS PM building patient journey models?",
-            "options": [
-                "Only claims data",
-                "EMR + claims + labs + SDoH + mortality (all integrated)",
-                "Only clinical trial data from Citeline",
-                "Only payer policy data from MMIT",
-            ],
-            "answer": "EMR + claims + labs + SDoH + mortality (all integrated)",
-            "explanation": "The power of NorstellaLinQ is the INTEGRATION of all these data types into a single linked dataset, enabling complete patient journey analysis.",
-        },
-    ],
-}
+def load_content():
+    """Load the content catalog once, via the pickle cache when it is current."""
+    global _content
+    if _content is not None:
+        return _content
+    key = content_signature(CONTENT_DIR)[:16]
+    cache_file = CONTENT_CACHE_DIR / f"content-{key}.pickle"
+    try:
+        with open(cache_file, "rb") as f:
+            _content = pickle.load(f)
+        return _content
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    _content = compile_content(CONTENT_DIR)
+    try:
+        CONTENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in CONTENT_CACHE_DIR.glob("content-*.pickle"):
+            stale.unlink()
+        tmp = cache_file.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(_content, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # read-only data dir: run uncached
+    return _content
+
+
+class LazySequence(Sequence):
+    """Read-only list view of a content catalog entry, loaded on first use."""
+
+    def __init__(self, key):
+        self._key = key
+
+    def __getitem__(self, i):
+        return load_content()[self._key][i]
+
+    def __len__(self):
+        return len(load_content()[self._key])
+
+    def __iter__(self):
+        return iter(load_content()[self._key])
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._key}>"
+
+
+class LazyMapping(Mapping):
+    """Read-only dict view of a content catalog entry, loaded on first use."""
+
+    def __init__(self, key):
+        self._key = key
+
+    def __getitem__(self, k):
+        return load_content()[self._key][k]
+
+    def __len__(self):
+        return len(load_content()[self._key])
+
+    def __iter__(self):
+        return iter(load_content()[self._key])
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._key}>"
+
+
+MODULES = LazySequence("modules")      # [{"id", "title", "order", "requires", "lessons": [...]}]
+QUIZZES = LazyMapping("quizzes")       # module_id -> [question, ...]
+FLASHCARDS = LazySequence("flashcards")  # [(front, back, module_id), ...]
+
+class ContentIndex:
+    """Lookup tables over the content catalog, built once on first use."""
+
+    def __init__(self, modules, quizzes, flashcards):
+        self.modules = sorted(modules, key=lambda m: m["order"])
+        self.module_by_id = {m["id"]: m for m in self.modules}
+        self.lessons = {}  # "module_id/lesson_id" -> (module, lesson)
+        self.lesson_order = []
+        self.lesson_counts = {}
+        self.quiz_bits = 0  # bit i set => self.modules[i] has a quiz
+        self.questions = {}  # question_id -> (module_id, question)
+        for i, module in enumerate(self.modules):
+            for q in quizzes.get(module["id"], []):
+                self.questions[q["id"]] = (module["id"], q)
+            for lesson in module["lessons"]:
+                lid = f"{module['id']}/{lesson['id']}"
+                self.lessons[lid] = (module, lesson)
+                self.lesson_order.append(lid)
+            self.lesson_counts[module["id"]] = len(module["lessons"])
+            if quizzes.get(module["id"]):
+                self.quiz_bits |= 1 << i
+        self.module_pos = {m["id"]: i for i, m in enumerate(self.modules)}
+        self.lesson_pos = {lid: i for i, lid in enumerate(self.lesson_order)}
+        self.total_lessons = len(self.lesson_order)
+        self.quiz_modules = [m for i, m in enumerate(self.modules) if self.quiz_bits >> i & 1]
+        self.cards = [(card_id(front), front, back) for front, back, _ in flashcards]
+        self.card_modules = {card_id(front): module_id for front, _, module_id in flashcards}
+        self.card_by_id = {c[0]: c for c in self.cards}
+
+    def has_quiz(self, module_id):
+        pos = self.module_pos.get(module_id)
+        return pos is not None and bool(self.quiz_bits >> pos & 1)
+
+
+class NextLessonCursor:
+    """First unread lesson in catalog order, advanced as lessons complete."""
+
+    def __init__(self, index, completed):
+        self.index = index
+        self.completed = set()
+        self.done_counts = dict.fromkeys(index.lesson_counts, 0)
+        self.pos = 0
+        for lid in completed:
+            self.complete(lid)
+
+    def complete(self, lid):
+        if lid in self.completed:
+            return
+        self.completed.add(lid)
+        entry = self.index.lessons.get(lid)
+        if entry is not None:
+            self.done_counts[entry[0]["id"]] += 1
+        order = self.index.lesson_order
+        while self.pos < len(order) and order[self.pos] in self.completed:
+            self.pos += 1
+
+    def next(self):
+        if self.pos < len(self.index.lesson_order):
+            return self.index.lessons[self.index.lesson_order[self.pos]]
+        return None, None
+
+
+_content_index = None
+
+def get_content_index():
+    global _content_index
+    if _content_index is None:
+        _content_index = ContentIndex(MODULES, QUIZZES, FLASHCARDS)
+    return _content_index
+
+def lesson_cursor(progress):
+    """The progress dict's next-lesson cursor (kept under a transient key)."""
+    cursor = progress.get("_lesson_cursor")
+    if cursor is None:
+        cursor = NextLessonCursor(get_content_index(), progress["lessons_completed"])
+        progress["_lesson_cursor"] = cursor
+    return cursor
 
 # ─────────────────────────────────────────────────────────────────────
 # PROGRESS MANAGEMENT
 # ─────────────────────────────────────────────────────────────────────
 
-def load_progress():
-    if PROGRESS_FILE.exists():
-        return json.loads(PROGRESS_FILE.read_text())
+# Progress is persisted through a pluggable store. Every mutation is an
+# event ({"type": ..., ...}) that is folded into the in-memory dict by
+# apply_event() and handed to the store, which decides how to persist it.
+# Keys starting with "_" hold in-memory caches and are never persisted.
+#   json   — rewrite progress.json (original behaviour)
+#   sqlite — one small transaction per event in learning_data/progress.db
+#   log    — JSONL event log + periodic snapshot in learning_data/
+PROGRESS_BACKEND = os.environ.get("NORSTELLA_PROGRESS_BACKEND", "sqlite")
+
+ANSWER_COLUMNS = ("date", "question", "chosen", "correct", "latency_ms")
+ANSWERS_KEEP = 256  # most recent answers held in progress; the SQLite table keeps them all
+
+def empty_progress():
     return {
         "sessions": [],
         "lessons_completed": [],
         "quiz_scores": {},
-        "streak_days": [],
+        "streak_days": {"base": None, "bits": ""},  # DayBitmap.state()
+        "streak": {"current": 0, "longest": 0, "last": None},  # run ending at "last"
         "total_time_min": 0,
-        "mastery": {},  # module_id -> score 0-100
+        "last_completed": None,  # [date, total_time_min after its session] of the newest completion
+        "mastery": {},  # module_id -> best quiz score 0-100
+        "mastery_model": {},  # module_id -> [level, stability days, last evidence date]
+        "cards": {},  # card_id -> SM-2 state {ease, interval, reps, due}
+        "item_stats": {},  # question_id -> [attempts, correct, difficulty]
+        "ability": {},  # module_id -> learner ability (logit scale)
+        "answers": {col: [] for col in ANSWER_COLUMNS},  # recent per-question history, columnar
+        "module_daily": {},  # module_id -> {date: [attempts, correct]}
+        "latency": {},  # module_id -> {kind: [recent ms samples]}
+        # older sessions / quiz attempts: period -> [count, total, best]
+        "rollups": {"sessions": {}, "quiz": {}},
+        # lesson_id -> [line stopped on, coverage bitmask, seconds on pages, last read date]
+        "reading": {},
     }
 
-def save_progress(progress):
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    PROGRESS_FILE.write_text(json.dumps(progress, indent=2, default=str))
+class DayBitmap:
+    """Set of days stored as one bit per date ordinal from the first day seen."""
+
+    def __init__(self, days=()):
+        self.base = None
+        self.bits = bytearray()
+        self.count = 0
+        self.last = None
+        for day in days:
+            self.add(day)
+
+    @staticmethod
+    def ordinal(day):
+        if isinstance(day, str):
+            return date.fromisoformat(day).toordinal()
+        return day if isinstance(day, int) else day.toordinal()
+
+    def add(self, day):
+        n = self.ordinal(day)
+        if self.base is None:
+            self.base = n
+        elif n < self.base:
+            pad = (self.base - n + 7) // 8
+            self.bits[0:0] = bytes(pad)
+            self.base -= 8 * pad
+        i = n - self.base
+        if i >> 3 >= len(self.bits):
+            self.bits.extend(bytes((i >> 3) - len(self.bits) + 1))
+        mask = 1 << (i & 7)
+        if self.bits[i >> 3] & mask:
+            return False
+        self.bits[i >> 3] |= mask
+        self.count += 1
+        self.last = n if self.last is None else max(self.last, n)
+        return True
+
+    def __contains__(self, day):
+        if self.base is None:
+            return False
+        i = self.ordinal(day) - self.base
+        return 0 <= i < 8 * len(self.bits) and bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Day ordinals, oldest first."""
+        for i, byte in enumerate(self.bits):
+            for bit in range(8):
+                if byte & (1 << bit):
+                    yield self.base + 8 * i + bit
+
+    def state(self):
+        """JSON form: the first day's ordinal and the bits as hex."""
+        return {"base": self.base, "bits": self.bits.hex()}
+
+    @classmethod
+    def from_state(cls, state):
+        days = cls()
+        if state.get("base") is not None:
+            days.base = state["base"]
+            days.bits = bytearray.fromhex(state["bits"])
+            days.count = sum(bin(byte).count("1") for byte in days.bits)
+            top = len(days.bits.rstrip(b"\0")) - 1
+            if top >= 0:
+                days.last = days.base + 8 * top + days.bits[top].bit_length() - 1
+        return days
+
+    def run_ending(self, day):
+        """Length of the run of consecutive days ending on day."""
+        n = self.ordinal(day)
+        run = 0
+        while n - run in self:
+            run += 1
+        return run
+
+    def longest_run(self):
+        longest = run = 0
+        for byte in self.bits:
+            if byte == 0xFF:
+                run += 8
+            elif byte == 0:
+                run = 0
+            else:
+                for bit in range(8):
+                    run = run + 1 if byte & (1 << bit) else 0
+                    longest = max(longest, run)
+                continue
+            longest = max(longest, run)
+        return longest
+
+
+def streak_days(progress):
+    """The progress dict's streak-day bitmap (kept under a transient key).
+
+    Building it also reconciles the stored streak state, which older
+    progress files and out-of-band edits may lack or have stale, and
+    migrates the list of ISO dates those files kept to the bitmap form.
+    """
+    days = progress.get("_streak_days")
+    if days is None:
+        stored = progress.get("streak_days", [])
+        if isinstance(stored, list):
+            days = DayBitmap(stored)
+            progress["streak_days"] = days.state()
+        else:
+            days = DayBitmap.from_state(stored)
+        progress["_streak_days"] = days
+        state = progress.get("streak") or {}
+        last = date.fromordinal(days.last).isoformat() if days.count else None
+        if state.get("last") != last:
+            progress["streak"] = {
+                "current": days.run_ending(days.last) if days.count else 0,
+                "longest": days.longest_run(),
+                "last": last,
+            }
+    return days
+
+def advance_streak(progress, day):
+    """Extend the stored streak state by one newly active day."""
+    state = progress["streak"]
+    n = DayBitmap.ordinal(day)
+    last = DayBitmap.ordinal(state["last"]) if state["last"] else None
+    if last is None or n > last + 1:
+        state["current"] = 1
+    elif n == last + 1:
+        state["current"] += 1
+    else:  # backfilled day inside the history: the run ending at "last" may have joined up
+        state["current"] = progress["_streak_days"].run_ending(last)
+        state["longest"] = max(state["longest"], progress["_streak_days"].longest_run())
+        return
+    state["last"] = date.fromordinal(n).isoformat()
+    state["longest"] = max(state["longest"], state["current"])
+
+# Retention: individual sessions and quiz attempts are kept for
+# HISTORY_RAW_DAYS, then folded into one bucket per day, and after
+# HISTORY_DAILY_DAYS into one bucket per ISO week ("2026-W05"). Buckets
+# keep the count, the summed minutes/score and the best value, so
+# totals, mean scores and mastery stay recomputable from them.
+HISTORY_RAW_DAYS = 30
+HISTORY_DAILY_DAYS = 180
+
+def history_period(day, today):
+    if (today - day).days < HISTORY_DAILY_DAYS:
+        return day.isoformat()
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def add_to_bucket(buckets, period, count, total, best):
+    bucket = buckets.setdefault(period, [0, 0, 0])
+    bucket[0] += count
+    bucket[1] = round(bucket[1] + total, 1)
+    bucket[2] = max(bucket[2], best)
+
+def needs_rollup(progress, today):
+    """Whether any raw record or daily bucket is past its retention window."""
+    cutoff = (today - timedelta(days=HISTORY_RAW_DAYS)).isoformat()
+    if progress["sessions"] and progress["sessions"][0]["date"] < cutoff:
+        return True
+    if any(attempts and attempts[0]["date"] < cutoff
+           for attempts in progress["quiz_scores"].values()):
+        return True
+    daily_cutoff = (today - timedelta(days=HISTORY_DAILY_DAYS)).isoformat()
+    rollups = progress["rollups"]
+    return any(
+        "W" not in period and period < daily_cutoff
+        for buckets in (rollups["sessions"], *rollups["quiz"].values())
+        for period in buckets
+    )
+
+def roll_up_history(progress, today):
+    """Fold records past their retention window into day/week buckets."""
+    cutoff = (today - timedelta(days=HISTORY_RAW_DAYS)).isoformat()
+    rollups = progress["rollups"]
+    keep = []
+    for s in progress["sessions"]:
+        if s["date"] < cutoff:
+            period = history_period(date.fromisoformat(s["date"]), today)
+            add_to_bucket(rollups["sessions"], period, 1, s["duration_min"], s["duration_min"])
+        else:
+            keep.append(s)
+    progress["sessions"] = keep
+    for module_id, attempts in progress["quiz_scores"].items():
+        buckets = rollups["quiz"].setdefault(module_id, {})
+        keep = []
+        for a in attempts:
+            if a["date"] < cutoff:
+                period = history_period(date.fromisoformat(a["date"]), today)
+                add_to_bucket(buckets, period, 1, a["score"], a["score"])
+            else:
+                keep.append(a)
+        progress["quiz_scores"][module_id] = keep
+    for buckets in (rollups["sessions"], *rollups["quiz"].values()):
+        for period in [p for p in buckets if "W" not in p]:
+            week = history_period(date.fromisoformat(period), today)
+            if week != period:
+                add_to_bucket(buckets, week, *buckets.pop(period))
+
+def session_count(progress):
+    return len(progress["sessions"]) + sum(
+        b[0] for b in progress["rollups"]["sessions"].values()
+    )
+
+def apply_event(progress, event):
+    """Fold a single progress event into the progress dict (in place)."""
+    kind = event["type"]
+    if kind == "streak_day":
+        days = streak_days(progress)
+        if days.add(event["date"]):
+            progress["streak_days"] = days.state()
+            advance_streak(progress, event["date"])
+    elif kind == "lesson_completed":
+        if event["lesson"] not in progress["lessons_completed"]:
+            progress["lessons_completed"].append(event["lesson"])
+            if event.get("date"):
+                progress["last_completed"] = [event["date"], None]
+            if "_lesson_cursor" in progress:
+                progress["_lesson_cursor"].complete(event["lesson"])
+            if "_unlocks" in progress:
+                progress["_unlocks"].complete(f"lesson:{event['lesson']}")
+    elif kind == "quiz":
+        module_id = event["module"]
+        progress["quiz_scores"].setdefault(module_id, []).append({
+            "date": event["date"],
+            "score": event["score"],
+            "correct": event["correct"],
+            "total": event["total"],
+        })
+        progress["mastery"][module_id] = max(
+            progress["mastery"].get(module_id, 0), event["score"]
+        )
+        update_mastery(progress, module_id, event["date"], event["score"] / 100, "quiz")
+    elif kind == "question":
+        update_item_stats(progress, event["module"], event["question"], event["correct"],
+                          event.get("difficulty"))
+        record_answer(progress, event)
+    elif kind == "latency":
+        for kind_, module_id, item, ms in event["samples"]:
+            samples = progress["latency"].setdefault(module_id or "", {}).setdefault(kind_, [])
+            samples.append(ms)
+            if len(samples) > LATENCY_KEEP:
+                del samples[: len(samples) - LATENCY_KEEP]
+    elif kind == "card_review":
+        state = sm2_review(
+            progress["cards"].get(event["card"]), event["grade"],
+            date.fromisoformat(event["date"]),
+        )
+        progress["cards"][event["card"]] = state
+        if "_review_queue" in progress:
+            progress["_review_queue"].push(event["card"], state["due"])
+        module_id = get_content_index().card_modules.get(event["card"])
+        if module_id is not None:
+            update_mastery(progress, module_id, event["date"], event["grade"] / 5, "card")
+    elif kind == "lesson_read":
+        state = progress["reading"].setdefault(event["lesson"], [0, 0, 0, None])
+        if len(state) < 4:
+            state.append(None)
+        was_read = coverage_pct(state[1]) >= LESSON_READ_COVERAGE
+        state[0] = event["line"]
+        state[1] |= event["coverage"]
+        state[2] += event["seconds"]
+        if event.get("date"):
+            state[3] = event["date"]
+            # reading is exposure, not recall: it counts once, when the lesson is finished
+            if not was_read and coverage_pct(state[1]) >= LESSON_READ_COVERAGE:
+                update_mastery(progress, event["lesson"].partition("/")[0],
+                               event["date"], 1.0, "read")
+    elif kind == "mastery_backfill":
+        progress["mastery_model"] = event["model"]
+    elif kind == "rollup":
+        roll_up_history(progress, date.fromisoformat(event["date"]))
+    elif kind == "session":
+        progress["sessions"].append({
+            "date": event["date"],
+            "duration_min": event["duration_min"],
+        })
+        progress["total_time_min"] = round(
+            progress.get("total_time_min", 0) + event["elapsed_min"], 1
+        )
+        done = progress.get("last_completed")
+        if done and done[1] is None:
+            done[1] = progress["total_time_min"]
+    return progress
+
+def persistent(progress):
+    """The progress dict without its in-memory "_" caches."""
+    return {k: v for k, v in progress.items() if not k.startswith("_")}
+
+
+class JsonProgressStore:
+    """Whole-file store: every event rewrites progress.json."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def load(self):
+        if self.path.exists():
+            progress = empty_progress()
+            progress.update(json.loads(self.path.read_text()))
+            streak_days(progress)
+            return progress
+        return empty_progress()
+
+    def prepare(self, batch):
+        """Serialize a batch of (progress, event) pairs; only the latest state matters."""
+        return json.dumps(persistent(batch[-1][0]), indent=2, default=str)
+
+    def commit(self, data):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a sibling file and rename so a crash never truncates
+        # the only copy.
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(data)
+        os.replace(tmp, self.path)
+
+    def save(self, progress):
+        self.commit(self.prepare([(progress, None)]))
+
+    def append(self, progress, event):
+        self.save(progress)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    duration_min REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lesson_completions (
+    id INTEGER PRIMARY KEY,
+    lesson_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    id INTEGER PRIMARY KEY,
+    module_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mastery (
+    module_id TEXT PRIMARY KEY,
+    score INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS card_state (
+    card_id TEXT PRIMARY KEY,
+    ease REAL NOT NULL,
+    interval INTEGER NOT NULL,
+    reps INTEGER NOT NULL,
+    due TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS card_state_due ON card_state (due);
+CREATE TABLE IF NOT EXISTS item_stats (
+    question_id TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    difficulty REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ability (
+    module_id TEXT PRIMARY KEY,
+    theta REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    chosen TEXT,
+    correct INTEGER NOT NULL,
+    latency_ms INTEGER
+);
+CREATE TABLE IF NOT EXISTS module_daily (
+    module_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (module_id, date)
+);
+CREATE TABLE IF NOT EXISTS latency (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    module_id TEXT NOT NULL,
+    item TEXT,
+    ms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lesson_reading (
+    lesson_id TEXT PRIMARY KEY,
+    line INTEGER NOT NULL,
+    coverage INTEGER NOT NULL,
+    seconds INTEGER NOT NULL,
+    last_read TEXT
+);
+CREATE TABLE IF NOT EXISTS mastery_model (
+    module_id TEXT PRIMARY KEY,
+    level REAL NOT NULL,
+    stability REAL NOT NULL,
+    last TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    kind TEXT NOT NULL,
+    module_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    best REAL NOT NULL,
+    PRIMARY KEY (kind, module_id, period)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def rollup_rows(progress):
+    rollups = progress.get("rollups") or {"sessions": {}, "quiz": {}}
+    rows = [("session", "", period, *b) for period, b in rollups["sessions"].items()]
+    rows += [
+        ("quiz", module_id, period, *b)
+        for module_id, buckets in rollups["quiz"].items()
+        for period, b in buckets.items()
+    ]
+    return rows
+
+
+class SqliteProgressStore:
+    """Append-only SQLite store: each event is one short WAL transaction."""
+
+    def __init__(self, path, read_only=False):
+        self.path = Path(path)
+        if read_only:
+            # work on an in-memory copy, so even schema upgrades leave the file alone;
+            # with no WAL beside it no writer is open, and SQLite need not create one
+            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+            live = self.path.with_name(self.path.name + "-wal").exists()
+            src = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro"
+                                  + ("" if live else "&immutable=1"), uri=True)
+            try:
+                src.backup(self.conn)
+            finally:
+                src.close()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(lesson_reading)")}
+        if "last_read" not in columns:  # stores from before lesson reads were dated
+            self.conn.execute("ALTER TABLE lesson_reading ADD COLUMN last_read TEXT")
+        legacy = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'streak_days'"
+        ).fetchone()
+        if legacy:  # stores from before streak days were kept as a bitmap
+            days = DayBitmap(d for (d,) in self.conn.execute("SELECT date FROM streak_days"))
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES ('streak_days', ?)",
+                    (json.dumps(days.state()),),
+                )
+                self.conn.execute("DROP TABLE streak_days")
+
+    def is_empty(self):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'created'"
+        ).fetchone()
+        return row is None
+
+    def load(self):
+        progress = empty_progress()
+        c = self.conn
+        progress["sessions"] = [
+            {"date": d, "duration_min": m}
+            for d, m in c.execute("SELECT date, duration_min FROM sessions ORDER BY id")
+        ]
+        progress["lessons_completed"] = [
+            lid for (lid,) in c.execute("SELECT lesson_id FROM lesson_completions ORDER BY id")
+        ]
+        for module_id, d, score, correct, total in c.execute(
+            "SELECT module_id, date, score, correct, total FROM quiz_attempts ORDER BY id"
+        ):
+            progress["quiz_scores"].setdefault(module_id, []).append({
+                "date": d, "score": score, "correct": correct, "total": total,
+            })
+        progress["mastery"] = dict(c.execute("SELECT module_id, score FROM mastery"))
+        progress["mastery_model"] = {
+            module_id: [level, stability, last]
+            for module_id, level, stability, last in c.execute(
+                "SELECT module_id, level, stability, last FROM mastery_model"
+            )
+        }
+        progress["item_stats"] = {
+            qid: [attempts, correct, difficulty]
+            for qid, attempts, correct, difficulty in c.execute(
+                "SELECT question_id, attempts, correct, difficulty FROM item_stats"
+            )
+        }
+        progress["ability"] = dict(c.execute("SELECT module_id, theta FROM ability"))
+        rows = c.execute(
+            "SELECT date, question_id, chosen, correct, latency_ms FROM ("
+            "  SELECT * FROM answers ORDER BY id DESC LIMIT ?"
+            ") ORDER BY id",
+            (ANSWERS_KEEP,),
+        ).fetchall()
+        progress["answers"] = {
+            col: list(values) for col, values in zip(ANSWER_COLUMNS, zip(*rows))
+        } if rows else {col: [] for col in ANSWER_COLUMNS}
+        for module_id, d, attempts, correct in c.execute(
+            "SELECT module_id, date, attempts, correct FROM module_daily ORDER BY date"
+        ):
+            progress["module_daily"].setdefault(module_id, {})[d] = [attempts, correct]
+        for module_id, kind, ms in c.execute(
+            "SELECT module_id, kind, ms FROM ("
+            "  SELECT id, module_id, kind, ms, row_number() OVER ("
+            "    PARTITION BY module_id, kind ORDER BY id DESC) AS rn FROM latency"
+            ") WHERE rn <= ? ORDER BY id",
+            (LATENCY_KEEP,),
+        ):
+            progress["latency"].setdefault(module_id, {}).setdefault(kind, []).append(ms)
+        progress["cards"] = {
+            cid: {"ease": ease, "interval": interval, "reps": reps, "due": due}
+            for cid, ease, interval, reps, due in c.execute(
+                "SELECT card_id, ease, interval, reps, due FROM card_state"
+            )
+        }
+        row = c.execute("SELECT value FROM meta WHERE key = 'total_time_min'").fetchone()
+        progress["total_time_min"] = float(row[0]) if row else 0
+        progress["reading"] = {
+            lid: [line, coverage, seconds, last_read]
+            for lid, line, coverage, seconds, last_read in c.execute(
+                "SELECT lesson_id, line, coverage, seconds, last_read FROM lesson_reading"
+            )
+        }
+        for kind, module_id, period, count, total, best in c.execute(
+            "SELECT kind, module_id, period, count, total, best FROM rollups ORDER BY period"
+        ):
+            if kind == "session":
+                buckets = progress["rollups"]["sessions"]
+            else:
+                buckets = progress["rollups"]["quiz"].setdefault(module_id, {})
+            buckets[period] = [count, total, best]
+        row = c.execute("SELECT value FROM meta WHERE key = 'streak_days'").fetchone()
+        if row:
+            progress["streak_days"] = json.loads(row[0])
+        row = c.execute("SELECT value FROM meta WHERE key = 'streak'").fetchone()
+        if row:
+            progress["streak"] = json.loads(row[0])
+        row = c.execute("SELECT value FROM meta WHERE key = 'last_completed'").fetchone()
+        if row:
+            progress["last_completed"] = json.loads(row[0])
+        for (payload,) in c.execute("SELECT payload FROM events ORDER BY id"):
+            apply_event(progress, json.loads(payload))
+        return progress
+
+    @staticmethod
+    def _mastery_model_row(progress, module_id):
+        return (
+            "INSERT OR REPLACE INTO mastery_model (module_id, level, stability, last) "
+            "VALUES (?, ?, ?, ?)",
+            (module_id, *progress["mastery_model"][module_id]),
+            False,
+        )
+
+    @staticmethod
+    def _last_completed_row(progress):
+        return (
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_completed', ?)",
+            (json.dumps(progress["last_completed"]),),
+            False,
+        )
+
+    def _statements(self, progress, event):
+        """(sql, params, many) tuples that persist one event."""
+        kind = event["type"]
+        if kind == "streak_day":
+            yield (
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('streak_days', ?)",
+                (json.dumps(progress["streak_days"]),),
+                False,
+            )
+            yield (
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('streak', ?)",
+                (json.dumps(progress["streak"]),),
+                False,
+            )
+        elif kind == "lesson_completed":
+            yield (
+                "INSERT OR IGNORE INTO lesson_completions (lesson_id) VALUES (?)",
+                (event["lesson"],),
+                False,
+            )
+            yield self._last_completed_row(progress)
+        elif kind == "quiz":
+            yield (
+                "INSERT INTO quiz_attempts (module_id, date, score, correct, total) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event["module"], event["date"], event["score"], event["correct"], event["total"]),
+                False,
+            )
+            yield (
+                "INSERT INTO mastery (module_id, score) VALUES (?, ?) "
+                "ON CONFLICT(module_id) DO UPDATE SET score = max(score, excluded.score)",
+                (event["module"], event["score"]),
+                False,
+            )
+            yield self._mastery_model_row(progress, event["module"])
+        elif kind == "question":
+            attempts, correct, difficulty = progress["item_stats"][event["question"]]
+            yield (
+                "INSERT OR REPLACE INTO item_stats (question_id, attempts, correct, difficulty) "
+                "VALUES (?, ?, ?, ?)",
+                (event["question"], attempts, correct, difficulty),
+                False,
+            )
+            yield (
+                "INSERT OR REPLACE INTO ability (module_id, theta) VALUES (?, ?)",
+                (event["module"], progress["ability"][event["module"]]),
+                False,
+            )
+            yield (
+                "INSERT INTO answers (date, question_id, chosen, correct, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event["date"], event["question"], event.get("chosen"),
+                 int(event["correct"]), event.get("latency_ms")),
+                False,
+            )
+            yield (
+                "INSERT OR REPLACE INTO module_daily (module_id, date, attempts, correct) "
+                "VALUES (?, ?, ?, ?)",
+                (event["module"], event["date"],
+                 *progress["module_daily"][event["module"]][event["date"]]),
+                False,
+            )
+        elif kind == "latency":
+            yield (
+                "INSERT INTO latency (date, kind, module_id, item, ms) VALUES (?, ?, ?, ?, ?)",
+                [(event["date"], k, m or "", item, ms) for k, m, item, ms in event["samples"]],
+                True,
+            )
+        elif kind == "card_review":
+            state = progress["cards"][event["card"]]
+            yield (
+                "INSERT OR REPLACE INTO card_state (card_id, ease, interval, reps, due) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event["card"], state["ease"], state["interval"], state["reps"], state["due"]),
+                False,
+            )
+            module_id = get_content_index().card_modules.get(event["card"])
+            if module_id is not None:
+                yield self._mastery_model_row(progress, module_id)
+        elif kind == "lesson_read":
+            yield (
+                "INSERT OR REPLACE INTO lesson_reading (lesson_id, line, coverage, seconds, last_read) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event["lesson"], *progress["reading"][event["lesson"]]),
+                False,
+            )
+            if event.get("date"):
+                yield self._mastery_model_row(progress, event["lesson"].partition("/")[0])
+        elif kind == "mastery_backfill":
+            yield ("DELETE FROM mastery_model", (), False)
+            yield (
+                "INSERT INTO mastery_model (module_id, level, stability, last) VALUES (?, ?, ?, ?)",
+                [(module_id, *state) for module_id, state in event["model"].items()],
+                True,
+            )
+        elif kind == "rollup":
+            cutoff = (date.fromisoformat(event["date"]) - timedelta(days=HISTORY_RAW_DAYS)).isoformat()
+            yield ("DELETE FROM sessions WHERE date < ?", (cutoff,), False)
+            yield ("DELETE FROM quiz_attempts WHERE date < ?", (cutoff,), False)
+            yield ("DELETE FROM rollups", (), False)
+            yield (
+                "INSERT INTO rollups (kind, module_id, period, count, total, best) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rollup_rows(progress),
+                True,
+            )
+        elif kind == "session":
+            yield (
+                "INSERT INTO sessions (date, duration_min) VALUES (?, ?)",
+                (event["date"], event["duration_min"]),
+                False,
+            )
+            yield (
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('total_time_min', ?)",
+                (str(progress["total_time_min"]),),
+                False,
+            )
+            yield self._last_completed_row(progress)
+        else:
+            yield (
+                "INSERT INTO events (type, payload) VALUES (?, ?)",
+                (kind, json.dumps(event, default=str)),
+                False,
+            )
+
+    def prepare(self, batch):
+        return [stmt for progress, event in batch for stmt in self._statements(progress, event)]
+
+    def commit(self, statements):
+        with self.conn:
+            for sql, params, many in statements:
+                if many:
+                    self.conn.executemany(sql, params)
+                else:
+                    self.conn.execute(sql, params)
+
+    def append(self, progress, event):
+        self.commit(self.prepare([(progress, event)]))
+
+    def flush(self):
+        pass
+
+    def save(self, progress):
+        """Replace the stored state with a full snapshot (used by migration)."""
+        c = self.conn
+        with c:
+            for table in ("sessions", "lesson_completions", "quiz_attempts",
+                          "mastery", "card_state", "item_stats",
+                          "ability", "answers", "module_daily", "latency", "rollups",
+                          "lesson_reading", "mastery_model", "meta", "events"):
+                c.execute(f"DELETE FROM {table}")
+            c.executemany(
+                "INSERT INTO sessions (date, duration_min) VALUES (?, ?)",
+                [(s["date"], s["duration_min"]) for s in progress.get("sessions", [])],
+            )
+            c.executemany(
+                "INSERT OR IGNORE INTO lesson_completions (lesson_id) VALUES (?)",
+                [(lid,) for lid in progress.get("lessons_completed", [])],
+            )
+            c.executemany(
+                "INSERT INTO quiz_attempts (module_id, date, score, correct, total) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (module_id, a["date"], a["score"], a["correct"], a["total"])
+                    for module_id, attempts in progress.get("quiz_scores", {}).items()
+                    for a in attempts
+                ],
+            )
+            c.executemany(
+                "INSERT INTO mastery (module_id, score) VALUES (?, ?)",
+                list(progress.get("mastery", {}).items()),
+            )
+            c.executemany(
+                "INSERT INTO item_stats (question_id, attempts, correct, difficulty) "
+                "VALUES (?, ?, ?, ?)",
+                [(qid, *row) for qid, row in progress.get("item_stats", {}).items()],
+            )
+            c.executemany(
+                "INSERT INTO ability (module_id, theta) VALUES (?, ?)",
+                list(progress.get("ability", {}).items()),
+            )
+            answers = progress.get("answers") or {col: [] for col in ANSWER_COLUMNS}
+            c.executemany(
+                "INSERT INTO answers (date, question_id, chosen, correct, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?)",
+                list(zip(*(answers[col] for col in ANSWER_COLUMNS))),
+            )
+            c.executemany(
+                "INSERT INTO module_daily (module_id, date, attempts, correct) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (module_id, d, *row)
+                    for module_id, days in progress.get("module_daily", {}).items()
+                    for d, row in days.items()
+                ],
+            )
+            c.executemany(
+                "INSERT INTO latency (date, kind, module_id, item, ms) VALUES ('', ?, ?, NULL, ?)",
+                [
+                    (kind, module_id, ms)
+                    for module_id, kinds in progress.get("latency", {}).items()
+                    for kind, samples in kinds.items()
+                    for ms in samples
+                ],
+            )
+            c.executemany(
+                "INSERT INTO card_state (card_id, ease, interval, reps, due) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (cid, st["ease"], st["interval"], st["reps"], st["due"])
+                    for cid, st in progress.get("cards", {}).items()
+                ],
+            )
+            c.executemany(
+                "INSERT INTO rollups (kind, module_id, period, count, total, best) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rollup_rows(progress),
+            )
+            c.executemany(
+                "INSERT INTO lesson_reading (lesson_id, line, coverage, seconds, last_read) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(lid, *state, None)[:5] for lid, state in progress.get("reading", {}).items()],
+            )
+            c.executemany(
+                "INSERT INTO mastery_model (module_id, level, stability, last) VALUES (?, ?, ?, ?)",
+                [(module_id, *state) for module_id, state in progress.get("mastery_model", {}).items()],
+            )
+            c.execute(
+                "INSERT INTO meta (key, value) VALUES ('total_time_min', ?)",
+                (str(progress.get("total_time_min", 0)),),
+            )
+            c.execute(
+                "INSERT INTO meta (key, value) VALUES ('streak_days', ?)",
+                (json.dumps(streak_days(progress).state()),),
+            )
+            if progress.get("streak"):
+                c.execute(
+                    "INSERT INTO meta (key, value) VALUES ('streak', ?)",
+                    (json.dumps(progress["streak"]),),
+                )
+            c.execute(
+                "INSERT INTO meta (key, value) VALUES ('last_completed', ?)",
+                (json.dumps(progress.get("last_completed")),),
+            )
+            c.execute(
+                "INSERT INTO meta (key, value) VALUES ('created', ?)",
+                (datetime.now().isoformat(timespec="seconds"),),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(json_path, db_path):
+    """One-shot import of a progress.json file into a fresh SQLite store."""
+    store = SqliteProgressStore(db_path)
+    if store.is_empty():
+        store.save(JsonProgressStore(json_path).load())
+    return store
+
+LOG_FSYNC_EVERY = 8  # events per fsync batch
+LOG_FSYNC_INTERVAL = 2.0  # seconds; an older unsynced batch is flushed on next write
+LOG_COMPACT_BYTES = 256 * 1024
+
+
+class EventLogProgressStore:
+    """Append-only JSONL event log folded into a snapshot when it grows.
+
+    Writes are a single line append; fsync is batched. load() reads the
+    snapshot and replays only the log tail written after it.
+    """
+
+    def __init__(self, log_path, snapshot_path, compact_bytes=LOG_COMPACT_BYTES, read_only=False):
+        self.log_path = Path(log_path)
+        self.snapshot_path = Path(snapshot_path)
+        self.compact_bytes = compact_bytes
+        self.read_only = read_only
+        if not read_only:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.seq = 0
+        self.unsynced = 0
+        self.last_sync = time.time()
+        self.size = 0  # bytes appended to the log since the last snapshot
+        self.fh = None
+
+    def _read_snapshot(self):
+        if self.snapshot_path.exists():
+            snap = json.loads(self.snapshot_path.read_text())
+            return snap["progress"], snap["seq"]
+        return empty_progress(), 0
+
+    def load(self):
+        progress, snap_seq = self._read_snapshot()
+        base = empty_progress()
+        base.update(progress)
+        progress = base
+        streak_days(progress)
+        self.seq = snap_seq
+        self.size = 0  # offset just past the last complete event
+        if self.log_path.exists():
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # torn final write from a crash
+                    self.size += len(line)
+                    if event["seq"] <= snap_seq:
+                        continue  # already folded into the snapshot
+                    apply_event(progress, event)
+                    self.seq = event["seq"]
+            if self.log_path.stat().st_size > self.size and not self.read_only:
+                # drop the fragment so the next append starts on a fresh line
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(self.size)
+        return progress
+
+    def _open(self):
+        if self.fh is None:
+            self.fh = open(self.log_path, "a", encoding="utf-8")
+        return self.fh
+
+    def sync(self):
+        if self.fh is not None and self.unsynced:
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+        self.unsynced = 0
+        self.last_sync = time.time()
+
+    def _snapshot(self, progress):
+        return json.dumps({"seq": self.seq, "progress": persistent(progress)}, default=str)
+
+    def prepare(self, batch):
+        """Number and serialize a batch; include a snapshot if the log is due for compaction."""
+        lines = []
+        for _, event in batch:
+            self.seq += 1
+            lines.append(json.dumps(dict(event, seq=self.seq), default=str) + "\n")
+        self.size += sum(len(line) for line in lines)
+        snapshot = self._snapshot(batch[-1][0]) if self.size >= self.compact_bytes else None
+        return lines, snapshot
+
+    def commit(self, payload):
+        lines, snapshot = payload
+        if lines:
+            fh = self._open()
+            fh.writelines(lines)
+            self.unsynced += len(lines)
+            if (self.unsynced >= LOG_FSYNC_EVERY
+                    or time.time() - self.last_sync >= LOG_FSYNC_INTERVAL):
+                self.sync()
+            else:
+                fh.flush()
+        if snapshot is not None:
+            self._compact(snapshot)
+
+    def append(self, progress, event):
+        self.commit(self.prepare([(progress, event)]))
+
+    def _compact(self, snapshot):
+        """Write a new snapshot, then truncate the log."""
+        self.sync()
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # A crash before truncation is harmless: events with seq <= the
+        # snapshot's seq are skipped on replay.
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+        open(self.log_path, "w").close()
+        self.size = 0
+
+    def compact(self, progress):
+        """Fold the log into a new snapshot of progress."""
+        self._compact(self._snapshot(progress))
+
+    def save(self, progress):
+        self.compact(progress)
+
+    def flush(self):
+        self.sync()
+
+    def close(self):
+        self.sync()
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
+
+def migrate_json_to_log(json_path, log_path, snapshot_path):
+    """Seed an empty event log store with a progress.json snapshot."""
+    store = EventLogProgressStore(log_path, snapshot_path)
+    if not store.snapshot_path.exists() and not store.log_path.exists():
+        store.save(JsonProgressStore(json_path).load())
+    return store
+
+def store_exists(data_dir):
+    """Whether any backend has stored progress in data_dir."""
+    data_dir = Path(data_dir)
+    return any((data_dir / path.name).exists()
+               for path in (PROGRESS_FILE, PROGRESS_DB, PROGRESS_LOG, PROGRESS_SNAPSHOT))
+
+def open_store(backend=None, data_dir=None, read_only=False):
+    """The progress store in data_dir, migrating progress.json into it first.
+
+    A read-only store neither migrates nor creates anything: it loads what
+    is there (the unmigrated JSON if need be) and must not be written to.
+    """
+    backend = backend or PROGRESS_BACKEND
+    data_dir = Path(data_dir or DATA_DIR)
+    json_path = data_dir / PROGRESS_FILE.name
+    if read_only:
+        if backend == "sqlite" and (data_dir / PROGRESS_DB.name).exists():
+            return SqliteProgressStore(data_dir / PROGRESS_DB.name, read_only=True)
+        if backend == "log" and ((data_dir / PROGRESS_LOG.name).exists()
+                                 or (data_dir / PROGRESS_SNAPSHOT.name).exists()):
+            return EventLogProgressStore(data_dir / PROGRESS_LOG.name,
+                                         data_dir / PROGRESS_SNAPSHOT.name, read_only=True)
+        if backend in ("json", "sqlite", "log"):
+            return JsonProgressStore(json_path)  # an empty progress if there is none
+    if backend == "json":
+        return JsonProgressStore(json_path)
+    if backend == "sqlite":
+        return migrate_json_to_sqlite(json_path, data_dir / PROGRESS_DB.name)
+    if backend == "log":
+        return migrate_json_to_log(
+            json_path, data_dir / PROGRESS_LOG.name, data_dir / PROGRESS_SNAPSHOT.name
+        )
+    raise ValueError(f"Unknown progress backend: {backend}")
+
+# The interactive app persists through a WriteBehindStore so the menu loop
+# never waits on disk. PROGRESS_LOCK serializes mutation of the progress
+# dict (record()) against the writer thread reading it. An event is applied
+# and queued under the lock, and the writer takes its batch and prepares it
+# under the lock, so a prepared snapshot holds exactly the batch's events.
+PERSIST_INTERVAL = 0.5  # seconds; events arriving closer together share a write
+WRITE_BEHIND = os.environ.get("NORSTELLA_WRITE_BEHIND", "1") != "0"
+PROGRESS_LOCK = threading.RLock()
+
+
+class WriteBehindStore:
+    """Queue appends and persist them from a background thread.
+
+    Events that arrive within PERSIST_INTERVAL of the previous write are
+    coalesced into one prepare/commit. flush() blocks until everything
+    queued so far is on disk; close() flushes and stops the thread.
+    """
+
+    def __init__(self, store, interval=PERSIST_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self.cond = threading.Condition()
+        self.pending = []
+        self.queued = 0
+        self.written = 0
+        self.flushing = 0
+        self.closed = False
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        return self.store.load()
+
+    def append(self, progress, event):
+        with self.cond:
+            if not self.closed:
+                self.pending.append((progress, event))
+                self.queued += 1
+                self.cond.notify_all()
+                return
+        with PROGRESS_LOCK:
+            self.store.append(progress, event)
+
+    def _run(self):
+        last_write = 0.0
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                deadline = last_write + self.interval
+                while not self.closed and not self.flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+            try:
+                with PROGRESS_LOCK:
+                    with self.cond:
+                        batch, self.pending = self.pending, []
+                    payload = self.store.prepare(batch)
+                self.store.commit(payload)
+            except Exception as e:  # re-raised from the next flush()
+                self.error = e
+            last_write = time.monotonic()
+            with self.cond:
+                self.written += len(batch)
+                self.cond.notify_all()
+
+    def flush(self):
+        with self.cond:
+            target = self.queued
+            self.flushing += 1
+            self.cond.notify_all()
+            try:
+                while self.written < target and self.thread.is_alive():
+                    self.cond.wait()
+            finally:
+                self.flushing -= 1
+        self.store.flush()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self.cond:
+                self.closed = True
+                self.cond.notify_all()
+            self.thread.join()
+            self.store.close()
+
+
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = open_store()
+        if WRITE_BEHIND:
+            _store = WriteBehindStore(_store)
+        atexit.register(_store.close)
+    return _store
+
+def load_progress():
+    progress = get_store().load()
+    progress["_items"] = get_item_pool(DATA_DIR)
+    atexit.register(progress["_items"].save)
+    return progress
+
+def record(progress, event):
+    """Apply an event to progress and persist it through the active store."""
+    with PROGRESS_LOCK:
+        pool_answer(progress, event)
+        apply_event(progress, event)
+        get_store().append(progress, event)
+
+def flush_progress():
+    """Block until every recorded event has been written."""
+    get_store().flush()
 
 # ─────────────────────────────────────────────────────────────────────
 # UI HELPERS
@@ -963,14 +1466,46 @@ DIM = "\033[2m"
 RESET = "\033[0m"
 MAGENTA = "\033[95m"
 
-def clear():
-    os.system("clear" if os.name != "nt" else "cls")
+# Screens are drawn in-process with ANSI escapes. A frame is assembled as
+# a list of lines and emitted with one write, repainting from the top-left
+# corner and erasing leftovers line by line instead of blanking the whole
+# terminal first.
+ANSI_RE = re.compile(r"\033\[[0-9;]*[A-Za-z]")
+HOME = "\033[H"
+ERASE_LINE = "\033[K"
+ERASE_BELOW = "\033[J"
+HEADER_WIDTH = 68
+
+def is_tty():
+    return sys.stdout.isatty()
+
+def term_width(default=80):
+    columns = os.environ.get("COLUMNS", "")
+    if columns.isdigit() and int(columns) > 0:
+        return int(columns)
+    try:
+        return os.get_terminal_size(sys.stdout.fileno()).columns or default
+    except (AttributeError, OSError, ValueError):
+        return default
+
+def write(text):
+    """Emit text to the terminal in a single write call."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+def render_frame(lines):
+    """Replace the screen with these lines in one write (plain output when piped)."""
+    if is_tty():
+        write(HOME + "".join(f"{line}{ERASE_LINE}\n" for line in lines) + ERASE_BELOW)
+    else:
+        write("".join(f"{line}\n" for line in lines))
+
+def header_lines(text):
+    w = min(HEADER_WIDTH, term_width())
+    return ["", f"{CYAN}{'━' * w}", f"  {BOLD}{text}{RESET}{CYAN}", f"{'━' * w}{RESET}", ""]
 
 def header(text):
-    w = 68
-    print(f"\n{CYAN}{'━' * w}")
-    print(f"  {BOLD}{text}{RESET}{CYAN}")
-    print(f"{'━' * w}{RESET}\n")
+    write("\n".join(header_lines(text)) + "\n")
 
 def subheader(text):
     print(f"\n{YELLOW}{BOLD}▸ {text}{RESET}")
@@ -984,11 +1519,55 @@ def error(text):
 def info(text):
     print(f"{DIM}{text}{RESET}")
 
+# Time spent waiting in prompt() is attributed to whatever item is being
+# tracked (a quiz question, flashcard, lesson page or speed-round pair).
+# Samples are buffered and written to the progress store in batches.
+LATENCY_FLUSH_SIZE = 20
+LATENCY_KEEP = 256  # most recent samples kept per module and kind
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.buffer = []  # [kind, module_id, item, ms]
+        self.current = None
+
+    @contextmanager
+    def track(self, kind, module_id, item):
+        sample = [kind, module_id, item, 0.0]
+        outer, self.current = self.current, sample
+        try:
+            yield sample
+        finally:
+            self.current = outer
+            sample[3] = int(sample[3])
+            self.buffer.append(sample)
+
+    def add(self, seconds):
+        if self.current is not None:
+            self.current[3] += 1000 * seconds
+
+    def flush(self, progress, force=True):
+        """Write buffered samples as one event (only once a batch is full unless forced)."""
+        if self.buffer and (force or len(self.buffer) >= LATENCY_FLUSH_SIZE):
+            samples, self.buffer = self.buffer, []
+            record(progress, {"type": "latency", "date": str(date.today()), "samples": samples})
+
+
+LATENCY = LatencyRecorder()
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
 def prompt(text=""):
+    start = time.perf_counter()
     try:
         return input(f"\n{MAGENTA}❯ {text}{RESET}").strip()
     except (EOFError, KeyboardInterrupt):
         return "q"
+    finally:
+        LATENCY.add(time.perf_counter() - start)
 
 def progress_bar(current, total, width=30):
     filled = int(width * current / total) if total > 0 else 0
@@ -996,116 +1575,775 @@ def progress_bar(current, total, width=30):
     pct = int(100 * current / total) if total > 0 else 0
     return f"{bar} {pct}%"
 
-def paginate(text, lines_per_page=25):
-    lines = text.strip().split("\n")
-    for i in range(0, len(lines), lines_per_page):
-        chunk = lines[i : i + lines_per_page]
-        print("\n".join(chunk))
-        if i + lines_per_page < len(lines):
-            info("\n[Press Enter for more, or 'q' to skip]")
-            r = prompt()
-            if r.lower() == "q":
-                break
+# Lessons are paged lazily. A LineSource finds line boundaries in the
+# lesson text (a str, or a memory-mapped file for large lessons) only as
+# far as the reader has gone, and each line is wrapped to the terminal
+# width as it is drawn, so a multi-thousand-line brief opens instantly.
+# Pages start at (line, wrapped row) positions; "back" replays the
+# positions already visited and "sections" jumps to a heading line.
+# Every page shown marks the slices of the text it spanned in a coverage
+# bitmask, so a lesson counts as read only once most of it has been on
+# screen, however the reader moved through it.
+PAGER_RESERVED_ROWS = 4  # rows kept for the status line and prompt
+COVERAGE_BUCKETS = 32  # slices of a lesson tracked in its coverage bitmask
+LESSON_READ_COVERAGE = 90  # percent of slices seen for a lesson to count as read
+SECTION_RE = re.compile(r"^[A-Z0-9][A-Z0-9 &/+'’()\-.,:]{2,}$")  # "CORE PRODUCTS:" headings
+BULLET_RE = re.compile(r"\s*(?:[-*•]|\d+[.)])\s+")
+
+def term_height(default=24):
+    lines = os.environ.get("LINES", "")
+    if lines.isdigit() and int(lines) > 0:
+        return int(lines)
+    try:
+        return os.get_terminal_size(sys.stdout.fileno()).lines or default
+    except (AttributeError, OSError, ValueError):
+        return default
+
+
+class LineSource:
+    """Lines of a str or bytes-like buffer (e.g. an mmap), indexed on demand."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.binary = not isinstance(buffer, str)
+        self.newline = b"\n" if self.binary else "\n"
+        self.spans = []  # (start, end) of each line found so far
+        self.scanned = 0
+
+    def _extend(self, n):
+        size = len(self.buffer)
+        while len(self.spans) < n and self.scanned < size:
+            end = self.buffer.find(self.newline, self.scanned)
+            if end == -1:
+                end = size
+            self.spans.append((self.scanned, end))
+            self.scanned = end + 1
+
+    def line(self, i):
+        """Line i without its newline, or None past the end."""
+        self._extend(i + 1)
+        if i >= len(self.spans):
+            return None
+        start, end = self.spans[i]
+        text = self.buffer[start:end]
+        return (text.decode("utf-8", "replace") if self.binary else text).rstrip("\r")
+
+    def fraction(self, i):
+        """How far into the buffer line i starts (0.0-1.0)."""
+        self._extend(i + 1)
+        offset = self.spans[i][0] if i < len(self.spans) else len(self.buffer)
+        return offset / max(1, len(self.buffer))
+
+    def blank_from(self, i):
+        """Whether every line from i on is blank."""
+        while True:
+            text = self.line(i)
+            if text is None:
+                return True
+            if text.strip():
+                return False
+            i += 1
+
+    def sections(self):
+        """[(line, heading)] for heading-style lines that follow a blank line."""
+        found, i, prev = [], 0, ""
+        while (text := self.line(i)) is not None:
+            stripped = text.strip()
+            if not prev.strip() and SECTION_RE.match(stripped) and any(c.isalpha() for c in stripped):
+                found.append((i, stripped.rstrip(":")))
+            prev, i = text, i + 1
+        return found
+
+
+def coverage_bits(start, end):
+    """Bitmask of the coverage slices overlapping [start, end) (fractions of the text)."""
+    first = min(int(start * COVERAGE_BUCKETS), COVERAGE_BUCKETS - 1)
+    last = max(first + 1, min(COVERAGE_BUCKETS, math.ceil(end * COVERAGE_BUCKETS)))
+    return ((1 << last) - 1) ^ ((1 << first) - 1)
+
+def coverage_pct(mask):
+    return bin(mask).count("1") * 100 // COVERAGE_BUCKETS
+
+
+def wrap_line(text, width):
+    """Wrap one line to width, hanging continuation rows under bullets and indents."""
+    if len(text) <= width:
+        return [text]
+    import textwrap
+
+    bullet = BULLET_RE.match(text)
+    indent = bullet.end() if bullet else len(text) - len(text.lstrip())
+    return textwrap.wrap(text, width, subsequent_indent=" " * indent,
+                         break_on_hyphens=False) or [""]
+
+
+class Pager:
+    def __init__(self, source, rows, width, start_line=0):
+        self.source = source
+        self.rows = max(5, rows)
+        self.width = max(20, width)
+        self.top = self.first_text(0)
+        self.pos = self.first_text(start_line) if start_line else self.top
+
+    def first_text(self, line):
+        """Position of the first non-blank line from line on (the top if there is none)."""
+        while (text := self.source.line(line)) is not None and not text.strip():
+            line += 1
+        return (line, 0) if text is not None else (0, 0)
+
+    def page(self):
+        """Display rows from the current position, and where the next page starts (None at the end)."""
+        line, sub = self.pos
+        rows = []
+        while len(rows) < self.rows:
+            text = self.source.line(line)
+            if text is None:
+                return rows, None
+            wrapped = wrap_line(text, self.width)[sub:]
+            taken = wrapped[: self.rows - len(rows)]
+            rows.extend(taken)
+            if len(taken) < len(wrapped):
+                return rows, (line, sub + len(taken))
+            line, sub = line + 1, 0
+        return rows, None if self.source.blank_from(line) else (line, 0)
+
+
+def page_text(source, lesson_id=None, start_line=0):
+    """Page through a LineSource, starting at start_line.
+
+    Returns (line stopped on or None at the end, coverage bitmask of the
+    pages shown, seconds spent on them).
+    """
+    module_id = lesson_id.split("/")[0] if lesson_id else None
+    pager = Pager(source, term_height() - PAGER_RESERVED_ROWS, term_width() - 1, start_line)
+    history = []
+    seen = 0
+    ms = 0
+    while True:
+        rows, following = pager.page()
+        write("\n".join(rows) + "\n")
+        start = 0.0 if pager.pos == pager.top else source.fraction(pager.pos[0])
+        end = 1.0 if following is None else source.fraction(following[0])
+        seen |= coverage_bits(start, end)
+        if following is None:
+            return None, seen, round(ms / 1000)
+        pct = int(100 * end)
+        info(f"\n[{pct}% · Enter: next · b: back · s: sections · t: top · q: stop reading]")
+        with LATENCY.track("page", module_id, f"{lesson_id}#{len(history) + 1}") as sample:
+            r = prompt().lower()
+        ms += sample[3]
+        if r == "q":
+            return pager.pos[0], seen, round(ms / 1000)
+        elif r == "b":
+            pager.pos = history.pop() if history else pager.top
+        elif r == "t":
+            history.clear()
+            pager.pos = pager.top
+        elif r == "s":
+            sections = source.sections()
+            for i, (_, title) in enumerate(sections, 1):
+                print(f"  {i}) {title}")
+            sel = prompt("Jump to which section? (number, or Enter to stay): ")
+            if sel.isdigit() and 1 <= int(sel) <= len(sections):
+                history.append(pager.pos)
+                pager.pos = (sections[int(sel) - 1][0], 0)
+        else:
+            history.append(pager.pos)
+            pager.pos = following
+
+@contextmanager
+def lesson_source(lesson):
+    """A LineSource over a lesson: its inline text, or its memory-mapped file."""
+    if lesson.get("content") is not None:
+        yield LineSource(lesson["content"])
+        return
+    import mmap
+
+    with open(CONTENT_DIR / lesson["file"], "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            buffer = b""
+        try:
+            yield LineSource(buffer)
+        finally:
+            if buffer:
+                buffer.close()
+
+def read_lesson(progress, module, lesson):
+    """Page through a lesson from the saved offset and record how much was read.
+
+    The lesson is completed once its pages seen so far cover enough of it;
+    returns whether it is complete.
+    """
+    lid = f"{module['id']}/{lesson['id']}"
+    state = progress["reading"].get(lid)
+    start, covered = (state[0], state[1]) if state else (0, 0)
+    with lesson_source(lesson) as source:
+        if start:
+            info(f"(Resuming at {int(100 * source.fraction(start))}% — 't' jumps to the top)")
+        stopped, seen, seconds = page_text(source, lid, start)
+    record(progress, {"type": "lesson_read", "lesson": lid, "line": stopped or 0,
+                      "coverage": seen, "seconds": seconds, "date": str(date.today())})
+    done = lid in lesson_cursor(progress).completed
+    if not done and coverage_pct(covered | seen) >= LESSON_READ_COVERAGE:
+        record(progress, {"type": "lesson_completed", "lesson": lid, "date": str(date.today())})
+        done = True
+    return done
+
+
+# ─────────────────────────────────────────────────────────────────────
+# ANSWER MATCHING
+# ─────────────────────────────────────────────────────────────────────
+
+# Free-text answers are compared in a folded form: Unicode compatibility
+# decomposition without accents, casefolded, punctuation dropped and
+# spaces removed, so "B.L.A.", "One Oncology" and "Évaluate" all match
+# their canonical spellings. Each question's accepted forms (answer,
+# "aliases" from its pack, and the parts around any parenthetical) are
+# folded once by compile_content(). What remains is a set lookup plus,
+# for longer words, a bounded edit distance to absorb typos. The budget
+# applies word by word, so "advantage" is not a typo of "EP Vantage".
+_PAREN_RE = re.compile(r"\(([^)]*)\)")
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize_answer(text):
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub("", text.casefold())).strip()
+
+def answer_keys(answer, aliases=()):
+    """Folded forms accepted for an answer, each mapped to its words.
+
+    e.g. "Panalgo (IHD)" -> panalgoihd, panalgo, ihd.
+    """
+    keys = {}
+    for text in (answer, *aliases):
+        for form in (text, _PAREN_RE.sub(" ", text), *_PAREN_RE.findall(text)):
+            words = tuple(normalize_answer(form).split())
+            if words:
+                keys["".join(words)] = words
+    return keys
+
+def edit_budget(key):
+    """Typos tolerated for a word: none for short terms like "bla"."""
+    return 0 if len(key) <= 4 else 1 if len(key) <= 8 else 2
+
+def within_edits(a, b, limit):
+    """Whether the Levenshtein distance between a and b is at most limit.
+
+    Only the diagonal band |i - j| <= limit of the DP table is filled, and
+    the scan stops as soon as a whole row exceeds the limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if a == b:
+        return True
+    over = limit + 1
+    prev = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [over] * (len(b) + 1)
+        if i <= limit:
+            cur[0] = i
+        ca = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < cost:
+                cost = prev[j] + 1
+            if cur[j - 1] + 1 < cost:
+                cost = cur[j - 1] + 1
+            cur[j] = cost if cost < over else over
+        if min(cur) > limit:
+            return False
+        prev = cur
+    return prev[-1] <= limit
+
+def match_answer(keys, answer):
+    words = normalize_answer(answer).split()
+    key = "".join(words)
+    if not key:
+        return False
+    if key in keys:
+        return True
+    for k, expected in keys.items():
+        if len(words) == len(expected):
+            if all(within_edits(w, e, edit_budget(e)) for w, e in zip(words, expected)):
+                return True
+        # words run together or split apart: only as many typos as the strictest word allows
+        elif within_edits(key, k, min(edit_budget(e) for e in expected)):
+            return True
+    return False
+
+def accepted_answers(q):
+    keys = q.get("accept")
+    if keys is None:  # a question built outside compile_content()
+        keys = answer_keys(q["answer"], q.get("aliases", ()))
+    return keys
 
 # ─────────────────────────────────────────────────────────────────────
 # QUIZ ENGINE
 # ─────────────────────────────────────────────────────────────────────
 
-def run_quiz_question(q):
-    """Run a single quiz question. Returns (correct: bool, user_answer: str)."""
+def grade_answer(q, answer):
+    """Grade a submitted answer without any terminal I/O. Returns (correct, chosen).
+
+    multiple_choice accepts a 1-based option number or the option text,
+    matching accepts an {item: value} dict, and scenario accepts the
+    learner's self-rating (3 = nailed it).
+    """
     qtype = q["type"]
 
     if qtype == "multiple_choice":
-        print(f"\n{BOLD}{q['q']}{RESET}\n")
         opts = q["options"]
-        for i, opt in enumerate(opts, 1):
-            print(f"  {i}) {opt}")
-        ans = prompt("Your answer (number): ")
+        if isinstance(answer, float) and not answer.is_integer():
+            return False, ""  # fractional, infinite or NaN option number
         try:
-            chosen = opts[int(ans) - 1]
-        except (ValueError, IndexError):
-            chosen = ans
-        correct = chosen == q["answer"]
-        if correct:
-            success("Correct!")
-        else:
-            error(f"Incorrect. Answer: {q['answer']}")
-        if "explanation" in q:
-            info(f"  💡 {q['explanation']}")
-        return correct, chosen
+            n = int(answer)
+            chosen = opts[n - 1] if 1 <= n <= len(opts) else answer
+        except (TypeError, ValueError):
+            chosen = answer if isinstance(answer, str) else ""
+        return chosen == q["answer"], chosen
 
     elif qtype == "fill_blank":
-        print(f"\n{BOLD}{q['q']}{RESET}")
-        ans = prompt("Your answer: ").lower().strip()
-        correct = ans == q["answer"].lower()
-        if correct:
-            success("Correct!")
-        else:
-            error(f"Incorrect. Answer: {q['answer']}")
-        if "explanation" in q:
-            info(f"  💡 {q['explanation']}")
-        return correct, ans
+        ans = str(answer or "").lower().strip()
+        return match_answer(accepted_answers(q), ans), ans
 
     elif qtype == "matching":
+        chosen = answer if isinstance(answer, dict) else {}
+        score = sum(1 for item, val in q["pairs"].items() if chosen.get(item) == val)
+        total = len(q["pairs"])
+        return score == total, f"{score}/{total}"
+
+    elif qtype == "scenario":
+        return str(answer).strip() == "3", str(answer)
+
+    return False, ""
+
+def grade_sheet(module_id, answers):
+    """Grade a whole answer sheet for a module without terminal I/O.
+
+    answers maps a question id (or its 0-based position in the bank, as a
+    string) to the submitted answer. Returns a list of
+    {"id", "question", "correct", "chosen"} results in bank order.
+    """
+    results = []
+    for i, q in enumerate(QUIZZES.get(module_id, [])):
+        answer = answers.get(q["id"], answers.get(str(i)))
+        correct, chosen = grade_answer(q, answer)
+        results.append({"id": i, "question": q["id"], "correct": correct, "chosen": chosen})
+    return results
+
+def sheet_events(module_id, results, day=None):
+    """The question events plus the closing quiz event for a graded sheet."""
+    day = day or str(date.today())
+    events = [
+        {
+            "type": "question",
+            "module": module_id,
+            "question": r["question"],
+            "chosen": r["chosen"],
+            "correct": r["correct"],
+            "date": day,
+        }
+        for r in results
+    ]
+    correct = sum(1 for r in results if r["correct"])
+    total = len(results)
+    events.append({
+        "type": "quiz",
+        "module": module_id,
+        "date": day,
+        "score": int(100 * correct / total) if total > 0 else 0,
+        "correct": correct,
+        "total": total,
+    })
+    return events
+
+# Adaptive quizzes use an Elo-style (Rasch) model: each question has a
+# difficulty and each learner an ability per module, both on a logit
+# scale and nudged after every answer. The adaptive mode asks a fixed
+# number of questions, each time picking the one whose outcome is least
+# predictable (maximum information p * (1 - p)) at the current ability.
+#
+# A learner answers each question only a few times, so difficulty is
+# pooled: an ItemPool beside the learner stores is updated by every
+# learner's answers. A live answer event carries the pooled difficulty it
+# was scored against, so replaying it moves the learner's ability the
+# same way; the learner's own item_stats row keeps their counts and the
+# pooled difficulty as of their last answer.
+ADAPTIVE_QUIZ_LENGTH = 5
+# banks smaller than this have too little to choose from to offer adaptive mode
+ADAPTIVE_MIN_QUESTIONS = int(os.environ.get("NORSTELLA_ADAPTIVE_MIN_QUESTIONS", "3"))
+ITEM_K = 0.4  # Elo step size on the logit scale
+ITEM_POOL_NAME = "item_difficulty.json"
+ITEM_POOL_SAVE_INTERVAL = 5.0  # seconds; how often a server writes its pool back
+
+def item_probability(ability, difficulty):
+    """Probability that a learner of this ability answers correctly."""
+    return 1 / (1 + math.exp(difficulty - ability))
+
+def update_item_stats(progress, module_id, qid, correct, difficulty=None):
+    """Fold one answer into the question's [attempts, correct, difficulty] row."""
+    stats = progress["item_stats"].setdefault(qid, [0, 0, 0.0])
+    if difficulty is None:  # answers recorded before difficulty was pooled
+        difficulty = stats[2]
+    ability = progress["ability"].get(module_id, 0.0)
+    delta = ITEM_K * (int(correct) - item_probability(ability, difficulty))
+    stats[0] += 1
+    stats[1] += int(correct)
+    stats[2] = round(difficulty - delta, 4)
+    progress["ability"][module_id] = round(ability + delta, 4)
+
+
+class ItemPool:
+    """Question difficulty shared by every learner under one data directory.
+
+    rows maps question_id -> [attempts, correct, difficulty]. Updates made
+    since load are also kept in changes, so a grading worker can hand its
+    own back to the parent to merge.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rows = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.changes = {}
+        self.dirty = False
+
+    def difficulty(self, qid):
+        row = self.rows.get(qid)
+        return row[2] if row else None
+
+    def update(self, qid, ability, correct):
+        """Elo-update one question; returns the difficulty the answer was scored against."""
+        row = self.rows.setdefault(qid, [0, 0, 0.0])
+        before = row[2]
+        row[0] += 1
+        row[1] += int(correct)
+        row[2] = round(before - ITEM_K * (int(correct) - item_probability(ability, before)), 4)
+        change = self.changes.setdefault(qid, [0, 0, 0.0])
+        change[0] += 1
+        change[1] += int(correct)
+        change[2] += row[2] - before
+        self.dirty = True
+        return before
+
+    def take_changes(self):
+        changes, self.changes = self.changes, {}
+        return changes
+
+    def merge(self, changes):
+        for qid, (attempts, correct, shift) in changes.items():
+            row = self.rows.setdefault(qid, [0, 0, 0.0])
+            row[0] += attempts
+            row[1] += correct
+            row[2] = round(row[2] + shift, 4)
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.rows))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+_item_pools = {}
+
+def get_item_pool(data_dir):
+    """The (per-process) pool for learners under data_dir."""
+    path = Path(data_dir) / ITEM_POOL_NAME
+    pool = _item_pools.get(path)
+    if pool is None:
+        pool = _item_pools[path] = ItemPool(path)
+    return pool
+
+def item_difficulty(progress, qid):
+    """The pooled difficulty when progress has a pool attached, else the learner's own."""
+    items = progress.get("_items")
+    difficulty = items.difficulty(qid) if items is not None else None
+    if difficulty is None:
+        difficulty = progress["item_stats"].get(qid, (0, 0, 0.0))[2]
+    return difficulty
+
+def pool_answer(progress, event):
+    """Score a live answer against the pooled difficulty and fold it into the pool."""
+    items = progress.get("_items")
+    if items is not None and event["type"] == "question" and "difficulty" not in event:
+        ability = progress["ability"].get(event["module"], 0.0)
+        event["difficulty"] = items.update(event["question"], ability, event["correct"])
+
+def record_answer(progress, event):
+    """Append one answer to the recent columnar history and bump its daily rollup."""
+    answers = progress["answers"]
+    answers["date"].append(event["date"])
+    answers["question"].append(event["question"])
+    answers["chosen"].append(event.get("chosen"))
+    answers["correct"].append(int(event["correct"]))
+    answers["latency_ms"].append(event.get("latency_ms"))
+    excess = len(answers["date"]) - ANSWERS_KEEP
+    if excess > 0:
+        for values in answers.values():
+            del values[:excess]
+    day = progress["module_daily"].setdefault(event["module"], {}).setdefault(event["date"], [0, 0])
+    day[0] += 1
+    day[1] += int(event["correct"])
+
+def most_informative(progress, module_id, questions):
+    """The question whose outcome is least predictable at the learner's ability."""
+    ability = progress["ability"].get(module_id, 0.0)
+
+    def information(q):
+        p = item_probability(ability, item_difficulty(progress, q["id"]))
+        return p * (1 - p)
+
+    return max(questions, key=information)
+
+# Quizzes, flashcard drills and speed rounds run as state machines that
+# never print, prompt or touch a store, so one process can drive many of
+# them at once (the terminal, or server sessions multiplexed by asyncio).
+# step() describes what the learner sees next, or None when finished;
+# answer() takes the learner's reply and returns (outcome, events). The
+# caller records the events before the next step(), since adaptive picks
+# read the updated ability. Scenario questions take two replies: the
+# free-text response, then a self-rating once the suggested answer shows.
+
+# Shuffles come from a per-session random.Random, never the global RNG,
+# and never shuffle shared content in place. A quiz's seed is shown with
+# its score and carried on its quiz event; running with NORSTELLA_SEED set to
+# it replays the quiz (the variable pins every session in the run).
+# Orderings of small sets (quiz banks, matching choices) are looked up
+# in precomputed tables of every permutation, so a shuffle costs one
+# randrange(). The server draws session seeds in batches.
+PERMUTATION_TABLE_MAX = 7  # 7! = 5040 orderings
+SEED_BATCH = 4096
+
+def session_seed():
+    env = os.environ.get("NORSTELLA_SEED")
+    return int(env) if env else int.from_bytes(os.urandom(8), "big")
+
+def session_rng(seed=None):
+    return random.Random(session_seed() if seed is None else seed)
+
+_permutation_tables = {}
+
+def permutation_table(n):
+    """Every ordering of range(n), built once per size."""
+    table = _permutation_tables.get(n)
+    if table is None:
+        table = _permutation_tables[n] = list(permutations(range(n)))
+    return table
+
+def permutation(rng, n):
+    if n <= PERMUTATION_TABLE_MAX:
+        table = permutation_table(n)
+        return table[rng.randrange(len(table))]
+    return rng.sample(range(n), n)
+
+def shuffled(rng, items):
+    """A shuffled copy of items; the input is left untouched."""
+    return [items[i] for i in permutation(rng, len(items))]
+
+
+class SeedBatch:
+    """Session seeds drawn SEED_BATCH at a time from one generator."""
+
+    def __init__(self, seed=None):
+        self.rng = session_rng(seed)
+        self.seeds = array("Q")
+
+    def next(self):
+        if not self.seeds:
+            self.seeds = array("Q", (self.rng.getrandbits(64) for _ in range(SEED_BATCH)))
+        return self.seeds.pop()
+
+
+class QuizSession:
+    def __init__(self, module_id, progress, questions, adaptive=False, rng=None, today=None,
+                 seed=None):
+        self.module_id = module_id
+        self.progress = progress
+        self.seed = seed  # what rng was seeded with, if known
+        self.rng = rng or session_rng(seed)
+        self.today = str(today or date.today())
+        self.adaptive = adaptive
+        self.remaining = list(questions)
+        self.total = min(ADAPTIVE_QUIZ_LENGTH, len(questions)) if adaptive else len(questions)
+        self.number = 0
+        self.correct = 0
+        self.phase = "next"
+        self.question = None
+        self.choices = None
+        self.response = None
+
+    def step(self):
+        """{"phase": "answer" | "rate", "number", "total", "question", "choices"} or None."""
+        if self.phase == "next":
+            if self.number >= self.total or not self.remaining:
+                self.phase = "done"
+            else:
+                if self.adaptive:
+                    q = most_informative(self.progress, self.module_id, self.remaining)
+                    self.remaining.remove(q)
+                else:
+                    q = self.remaining.pop(0)
+                self.question = q
+                self.number += 1
+                self.phase = "answer"
+                self.choices = None
+                if q["type"] == "matching":
+                    self.choices = shuffled(self.rng, list(q["pairs"].values()))
+        if self.phase == "done":
+            return None
+        return {"phase": self.phase, "number": self.number, "total": self.total,
+                "question": self.question, "choices": self.choices}
+
+    def answer(self, value, latency_ms=None):
+        """Answer the current step. Returns (outcome, events to record)."""
+        if self.step() is None:
+            raise ValueError("The quiz is already over")
+        q = self.question
+        if q["type"] == "scenario" and self.phase == "answer":
+            self.response = str(value or "")
+            self.phase = "rate"
+            return {"reveal": q["answer"]}, []
+        correct, chosen = grade_answer(q, value)
+        if q["type"] == "scenario":
+            chosen = self.response
+        self.correct += int(correct)
+        self.phase = "next"
+        outcome = {"correct": correct, "chosen": chosen, "answer": q.get("answer"),
+                   "explanation": q.get("explanation")}
+        if q["type"] == "matching":
+            given = value if isinstance(value, dict) else {}
+            outcome["pairs"] = [[item, given.get(item, ""), expected]
+                                for item, expected in q["pairs"].items()]
+        event = {
+            "type": "question",
+            "module": self.module_id,
+            "question": q["id"],
+            "chosen": chosen,
+            "correct": correct,
+            "latency_ms": latency_ms,
+            "date": self.today,
+        }
+        return outcome, [event]
+
+    def finish(self):
+        """The closing quiz event, once step() has returned None."""
+        asked = self.number
+        event = {
+            "type": "quiz",
+            "module": self.module_id,
+            "date": self.today,
+            "score": int(100 * self.correct / asked) if asked > 0 else 0,
+            "correct": self.correct,
+            "total": asked,
+        }
+        if self.seed is not None:
+            event["seed"] = self.seed
+        return event
+
+
+def read_quiz_answer(session, step):
+    """Terminal frontend: show a quiz step and read the learner's reply."""
+    q = step["question"]
+    qtype = q["type"]
+    if qtype == "multiple_choice":
+        print(f"\n{BOLD}{q['q']}{RESET}\n")
+        for i, opt in enumerate(q["options"], 1):
+            print(f"  {i}) {opt}")
+        return prompt("Your answer (number): ")
+    if qtype == "fill_blank":
+        print(f"\n{BOLD}{q['q']}{RESET}")
+        return prompt("Your answer: ")
+    if qtype == "matching":
         print(f"\n{BOLD}{q['q']}{RESET}\n")
-        items = list(q["pairs"].keys())
-        values = list(q["pairs"].values())
-        random.shuffle(values)
-        for i, v in enumerate(values, 1):
+        choices = step["choices"]
+        for i, v in enumerate(choices, 1):
             print(f"  {i}) {v}")
         print()
-        score = 0
-        total = len(items)
-        for item in items:
+        chosen = {}
+        for item in q["pairs"]:
             ans = prompt(f"  {item} → (number): ")
             try:
-                chosen_val = values[int(ans) - 1]
+                chosen[item] = choices[int(ans) - 1] if int(ans) >= 1 else ""
             except (ValueError, IndexError):
-                chosen_val = ""
-            if chosen_val == q["pairs"][item]:
-                success(f"  {item} → {chosen_val}")
-                score += 1
-            else:
-                error(f"  {item} → should be: {q['pairs'][item]}")
-        correct = score == total
-        print(f"\n  Matched {score}/{total}")
-        return correct, f"{score}/{total}"
-
-    elif qtype == "scenario":
+                chosen[item] = ""
+        return chosen
+    if qtype == "scenario":
         print(f"\n{BOLD}{q['q']}{RESET}")
         print(f"\n{DIM}(Type your answer, then press Enter. This is self-assessed.){RESET}")
-        ans = prompt("Your answer:\n")
+        outcome, _ = session.answer(prompt("Your answer:\n"))
         print(f"\n{YELLOW}{BOLD}SUGGESTED ANSWER:{RESET}")
-        print(q["answer"])
-        rating = prompt("Rate yourself: (1) Missed it  (2) Partial  (3) Nailed it: ")
-        correct = rating == "3"
-        return correct, ans
-
-    return False, ""
+        print(outcome["reveal"])
+        return prompt("Rate yourself: (1) Missed it  (2) Partial  (3) Nailed it: ")
+    return ""
 
-def run_quiz(module_id, progress):
-    """Run a full quiz for a module."""
-    questions = QUIZZES.get(module_id, [])
+def show_quiz_outcome(q, outcome):
+    if q["type"] == "matching":
+        score = 0
+        for item, chosen, expected in outcome["pairs"]:
+            if chosen == expected:
+                success(f"  {item} → {chosen}")
+                score += 1
+            else:
+                error(f"  {item} → should be: {expected}")
+        print(f"\n  Matched {score}/{len(outcome['pairs'])}")
+    elif q["type"] != "scenario":
+        if outcome["correct"]:
+            success("Correct!")
+        else:
+            error(f"Incorrect. Answer: {outcome['answer']}")
+        if outcome["explanation"]:
+            info(f"  💡 {outcome['explanation']}")
+
+def ask_quiz_step(session, step):
+    """Terminal frontend for one question. Returns (outcome, events)."""
+    q = step["question"]
+    with LATENCY.track("question", session.module_id, q["id"]) as sample:
+        value = read_quiz_answer(session, step)
+    outcome, events = session.answer(value, sample[3])
+    show_quiz_outcome(q, outcome)
+    return outcome, events
+
+def practice_question(q):
+    """Ask one question without recording it (e.g. from search results)."""
+    session = QuizSession(q["id"].partition("/")[0], empty_progress(), [q])
+    ask_quiz_step(session, session.step())
+
+def run_quiz(module_id, progress, adaptive=False, questions=None):
+    """Run a quiz for a module: the whole bank, an adaptive short set, or the given questions."""
+    planned = questions is not None
+    questions = questions if planned else QUIZZES.get(module_id, [])
     if not questions:
         info("No quiz available for this module yet.")
         return
 
-    header(f"QUIZ: {module_id.replace('_', ' ').title()}")
-    random.shuffle(questions)
-
-    correct_count = 0
-    total = len(questions)
-
-    for i, q in enumerate(questions, 1):
-        print(f"\n{DIM}Question {i}/{total}{RESET}")
-        is_correct, _ = run_quiz_question(q)
-        if is_correct:
-            correct_count += 1
+    title = module_id.replace('_', ' ').title()
+    header(f"QUIZ: {title} (adaptive)" if adaptive else f"QUIZ: {title}")
+
+    seed = session_seed()
+    rng = session_rng(seed)
+    session = QuizSession(module_id, progress, questions if planned else shuffled(rng, questions),
+                          adaptive, rng, seed=seed)
+    step = session.step()
+    while step is not None:
+        print(f"\n{DIM}Question {step['number']}/{step['total']}{RESET}")
+        _, events = ask_quiz_step(session, step)
+        for event in events:
+            record(progress, event)
+        step = session.step()
+    LATENCY.flush(progress)
 
     # Score
-    pct = int(100 * correct_count / total) if total > 0 else 0
+    quiz = session.finish()
+    pct = quiz["score"]
     print(f"\n{'━' * 40}")
-    print(f"{BOLD}Score: {correct_count}/{total} ({pct}%){RESET}")
+    print(f"{BOLD}Score: {quiz['correct']}/{quiz['total']} ({pct}%){RESET}")
+    print(f"{DIM}Seed {seed} — NORSTELLA_SEED={seed} replays this quiz{RESET}")
     if pct >= 80:
         success("Excellent — module mastered!")
     elif pct >= 60:
@@ -1114,163 +2352,890 @@ def run_quiz(module_id, progress):
         print(f"{RED}Needs work — re-read the lesson material.{RESET}")
 
     # Save
-    progress["quiz_scores"].setdefault(module_id, []).append({
-        "date": str(date.today()),
-        "score": pct,
-        "correct": correct_count,
-        "total": total,
-    })
-    progress["mastery"][module_id] = max(
-        progress["mastery"].get(module_id, 0), pct
-    )
-    save_progress(progress)
+    record(progress, quiz)
 
 # ─────────────────────────────────────────────────────────────────────
 # FLASHCARD MODE
 # ─────────────────────────────────────────────────────────────────────
 
-FLASHCARDS = [
-    ("What does MMIT stand for?", "Managed Markets Insight & Technology"),
-    ("What does IHD stand for?", "Instant Health Data (Panalgo's platform)"),
-    ("What is a BLA?", "Biologics License Application — regulatory submission for biologic drugs"),
-    ("What is step therapy?", "Payer restriction requiring patients to try/fail cheaper drugs first"),
-    ("What is NorstellaLinQ?", "Integrated data asset: 74B+ data points (EMR, claims, labs, SDoH, mortality)"),
-    ("What does NPV mean in pharma?", "Net Present Value — Evaluate's method for pipeline asset valuation"),
-    ("What is EP Vantage?", "Evaluate's editorial arm providing data-driven pharma industry analysis"),
-    ("What are clinical pathways?", "Standardized evidence-based treatment protocols guiding drug selection"),
-    ("What is prior authorization?", "Payer requirement for pre-approval before covering a drug"),
-    ("What does HEOR stand for?", "Health Economics and Outcomes Research"),
-    ("What is a formulary?", "A list of drugs covered by a health plan, organized by tiers"),
-    ("What is the IRA's impact on pharma?", "Inflation Reduction Act enables Medicare drug price negotiations"),
-    ("What percentage of screened compounds get approved?", "~1 in 20,000-30,000"),
-    ("What is a PBM?", "Pharmacy Benefit Manager — intermediary managing drug benefits (e.g., CVS Caremark)"),
-    ("What does RWE stand for?", "Real-World Evidence — data on drug performance outside clinical trials"),
-    ("What is Sitetrove?", "Citeline's investigator and clinical trial site intelligence platform"),
-    ("What is Trialtrove?", "Citeline's curated clinical trial intelligence database (60,000+ sources)"),
-    ("What is Pharmaprojects?", "Citeline's industry-standard drug pipeline tracking platform"),
-    ("What is Contract Validation?", "MMIT's tool to crosscheck rebate offers vs. actual formulary placement"),
-    ("What is LinQNotes?", "Panalgo's NLP tool for extracting insights from unstructured clinical notes"),
-    ("What is Ella AI?", "Panalgo's AI assistant for natural language cohort creation, no coding needed"),
-    ("Average cost to develop one approved drug?", "$2.6 billion (including failures)"),
-    ("Average time from discovery to approval?", "10-15 years"),
-    ("What % of Phase I trials advance?", "~70%"),
-    ("What % of US oncologists use clinical pathways?", "~62%"),
-    ("What is OneOncology?", "A practice aggregator standardizing pathways across community oncology"),
-    ("Who is Norstella's CEO (as of 2025)?", "Kris Joshi"),
-    ("What is IHD Cloud?", "AWS-powered version of Panalgo's IHD, 85% faster than traditional methods"),
-    ("What is an IDN?", "Integrated Delivery Network — a health system with hospitals, clinics, and payers"),
-    ("What is an NDA?", "New Drug Application — regulatory submission for small molecule drugs"),
-]
+# Flashcards are scheduled with SM-2 spaced repetition. Only the current
+# state of each reviewed card (ease, interval, reps, due date) is kept in
+# progress["cards"]; a session takes the most overdue cards from a
+# min-heap, then tops up with cards never seen before.
+SRS_SESSION_SIZE = 10
+SRS_INITIAL_EASE = 2.5
+SRS_MIN_EASE = 1.3
+SRS_GRADES = {"n": 2, "no": 2, "y": 4, "yes": 4, "e": 5, "easy": 5}
+
+def card_id(front):
+    return hashlib.sha1(front.encode("utf-8")).hexdigest()[:12]
+
+def sm2_review(state, grade, today):
+    """Return the new card state after one review graded 0-5 (>= 3 = recalled)."""
+    ease = state["ease"] if state else SRS_INITIAL_EASE
+    interval = state["interval"] if state else 0
+    reps = state["reps"] if state else 0
+    if grade < 3:
+        reps = 0
+        interval = 1
+    else:
+        reps += 1
+        if reps == 1:
+            interval = 1
+        elif reps == 2:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+    ease = max(SRS_MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return {
+        "ease": round(ease, 3),
+        "interval": interval,
+        "reps": reps,
+        "due": str(today + timedelta(days=interval)),
+    }
+
+
+class ReviewQueue:
+    """Min-heap of (due, card_id); entries made stale by a later review are skipped."""
+
+    def __init__(self, cards):
+        self.cards = cards
+        self.heap = [(state["due"], cid) for cid, state in cards.items()]
+        heapq.heapify(self.heap)
+
+    def push(self, cid, due):
+        heapq.heappush(self.heap, (due, cid))
+        if len(self.heap) > 2 * len(self.cards) + 64:
+            self.__init__(self.cards)
 
-def run_flashcards():
+    def due(self, today, k):
+        """Up to k card ids due on or before today, most overdue first."""
+        picked = []
+        while self.heap and len(picked) < k and self.heap[0][0] <= today:
+            due, cid = heapq.heappop(self.heap)
+            state = self.cards.get(cid)
+            if state is None or state["due"] != due or cid in picked:
+                continue
+            picked.append(cid)
+        for cid in picked:
+            heapq.heappush(self.heap, (self.cards[cid]["due"], cid))
+        return picked
+
+
+def review_queue(progress):
+    """The progress dict's flashcard review heap (kept under a transient key)."""
+    queue = progress.get("_review_queue")
+    if queue is None:
+        queue = ReviewQueue(progress["cards"])
+        progress["_review_queue"] = queue
+    return queue
+
+def pick_flashcards(progress, today, k=SRS_SESSION_SIZE):
+    """Due cards first, then unseen cards in catalog order: [(card_id, front, back)]."""
+    index = get_content_index()
+    due = [cid for cid in review_queue(progress).due(str(today), k) if cid in index.card_by_id]
+    unseen = (cid for cid, _, _ in index.cards if cid not in progress["cards"])
+    picked = due + list(islice(unseen, k - len(due)))
+    return [index.card_by_id[cid] for cid in picked]
+
+class FlashcardSession:
+    """Drill state machine: "recall" shows a front, "grade" reveals the back and takes y/n/e."""
+
+    def __init__(self, cards, today=None):
+        self.cards = cards
+        self.today = str(today or date.today())
+        self.pos = 0
+        self.phase = "recall" if cards else "done"
+        self.correct = 0
+        self.reviewed = 0
+
+    def step(self):
+        if self.phase == "done":
+            return None
+        cid, front, back = self.cards[self.pos]
+        return {"phase": self.phase, "number": self.pos + 1, "total": len(self.cards),
+                "card": cid, "front": front, "back": back if self.phase == "grade" else None}
+
+    def answer(self, value):
+        """Returns (outcome, events); "q" in either phase ends the drill."""
+        value = str(value or "").strip().lower()
+        if self.phase == "done":
+            raise ValueError("The drill is already over")
+        if value == "q":
+            self.phase = "done"
+            return {"quit": True}, []
+        cid, _, back = self.cards[self.pos]
+        if self.phase == "recall":
+            self.phase = "grade"
+            return {"back": back}, []
+        grade = SRS_GRADES.get(value, 2)
+        self.reviewed += 1
+        self.correct += grade >= 3
+        self.pos += 1
+        self.phase = "recall" if self.pos < len(self.cards) else "done"
+        return {"recalled": grade >= 3, "grade": grade}, [
+            {"type": "card_review", "card": cid, "grade": grade, "date": self.today}
+        ]
+
+
+def run_flashcards(progress, cards=None):
     header("FLASHCARD DRILL")
-    cards = list(FLASHCARDS)
-    random.shuffle(cards)
-
-    correct = 0
-    total = min(10, len(cards))  # 10 cards per session
-    cards = cards[:total]
-
-    for i, (front, back) in enumerate(cards, 1):
-        print(f"\n{DIM}Card {i}/{total}{RESET}")
-        print(f"\n{BOLD}{front}{RESET}")
-        prompt("[Think, then press Enter to reveal]")
-        print(f"\n{GREEN}{back}{RESET}")
-        r = prompt("Did you know it? (y/n): ")
-        if r.lower() in ("y", "yes"):
-            correct += 1
+    today = date.today()
+    cards = cards if cards is not None else pick_flashcards(progress, today)
+    if not cards:
+        success("No cards due today — come back tomorrow!")
+        return
+
+    session = FlashcardSession(cards, today)
+    card_modules = get_content_index().card_modules
+    step = session.step()
+    while step is not None:
+        print(f"\n{DIM}Card {step['number']}/{step['total']}{RESET}")
+        print(f"\n{BOLD}{step['front']}{RESET}")
+        with LATENCY.track("flashcard", card_modules.get(step["card"], ""), step["card"]):
+            r = prompt("[Think, then press Enter to reveal]")
+        outcome, _ = session.answer(r)
+        if outcome.get("quit"):
+            break
+        print(f"\n{GREEN}{outcome['back']}{RESET}")
+        outcome, events = session.answer(prompt("Did you know it? (y/n, or 'e' if it was easy): "))
+        if outcome.get("quit"):
+            break
+        if outcome["recalled"]:
             success("Got it!")
         else:
             error("Review this one again.")
+        for event in events:
+            record(progress, event)
+        step = session.step()
 
-    pct = int(100 * correct / total)
+    LATENCY.flush(progress)
+    pct = int(100 * session.correct / session.reviewed) if session.reviewed else 0
     print(f"\n{'━' * 40}")
-    print(f"{BOLD}Flashcards: {correct}/{total} ({pct}%){RESET}")
+    print(f"{BOLD}Flashcards: {session.correct}/{session.reviewed} ({pct}%){RESET}")
 
 # ─────────────────────────────────────────────────────────────────────
 # SPEED ROUND
 # ─────────────────────────────────────────────────────────────────────
 
+SPEED_ROUND_PAIRS = [
+    (desc, answer, answer_keys(answer, aliases))
+    for desc, answer, aliases in (
+        ("Clinical trial intelligence & drug pipeline", "Citeline", ()),
+        ("Commercial intelligence & asset valuation", "Evaluate", ()),
+        ("Market access & payer policy data", "MMIT", ()),
+        ("Real-world evidence analytics", "Panalgo", ()),
+        ("Oncology market access consulting", "Dedham Group", ("Dedham",)),
+        ("No-code analytics platform", "Panalgo (IHD)", ()),
+        ("Consensus drug revenue forecasts", "Evaluate", ()),
+        ("Formulary tracking & contract validation", "MMIT", ()),
+        ("Clinical pathway strategy", "Dedham Group", ("Dedham",)),
+        ("AI-powered trial site selection", "Citeline (Sitetrove)", ()),
+    )
+]
+
+class SpeedRoundSession:
+    """Speed round state machine over (description, answer, accepted keys) pairs."""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.pos = 0
+        self.correct = 0
+
+    def step(self):
+        if self.pos >= len(self.pairs):
+            return None
+        return {"number": self.pos + 1, "total": len(self.pairs), "prompt": self.pairs[self.pos][0]}
+
+    def answer(self, value):
+        _, answer, keys = self.pairs[self.pos]
+        correct = match_answer(keys, value)
+        self.correct += correct
+        self.pos += 1
+        return {"correct": correct, "answer": answer}, []
+
+
 def run_speed_round():
     header("SPEED ROUND ⚡")
     info("Answer as fast as you can! Match the brand to the description.\n")
 
-    pairs = [
-        ("Clinical trial intelligence & drug pipeline", "Citeline"),
-        ("Commercial intelligence & asset valuation", "Evaluate"),
-        ("Market access & payer policy data", "MMIT"),
-        ("Real-world evidence analytics", "Panalgo"),
-        ("Oncology market access consulting", "Dedham Group"),
-        ("No-code analytics platform", "Panalgo (IHD)"),
-        ("Consensus drug revenue forecasts", "Evaluate"),
-        ("Formulary tracking & contract validation", "MMIT"),
-        ("Clinical pathway strategy", "Dedham Group"),
-        ("AI-powered trial site selection", "Citeline (Sitetrove)"),
-    ]
-    random.shuffle(pairs)
-    pairs = pairs[:7]
-
-    correct = 0
+    session = SpeedRoundSession(shuffled(session_rng(), SPEED_ROUND_PAIRS)[:7])
     start = time.time()
-
-    for desc, answer in pairs:
-        ans = prompt(f"  {desc}  →  ")
-        # Flexible matching
-        if answer.lower().split()[0] in ans.lower() or ans.lower() in answer.lower():
-            correct += 1
+    step = session.step()
+    while step is not None:
+        with LATENCY.track("speed", "speed_round", step["prompt"]):
+            ans = prompt(f"  {step['prompt']}  →  ")
+        outcome, _ = session.answer(ans)
+        if outcome["correct"]:
             success("✓")
         else:
-            error(f"→ {answer}")
+            error(f"→ {outcome['answer']}")
+        step = session.step()
 
     elapsed = time.time() - start
-    print(f"\n{BOLD}Result: {correct}/{len(pairs)} in {elapsed:.1f}s{RESET}")
+    print(f"\n{BOLD}Result: {session.correct}/{len(session.pairs)} in {elapsed:.1f}s{RESET}")
+
+# ─────────────────────────────────────────────────────────────────────
+# MASTERY MODEL
+# ─────────────────────────────────────────────────────────────────────
+
+# progress["mastery"] keeps each module's best quiz score, but what the
+# learner still remembers fades. progress["mastery_model"] holds a memory
+# state per module, [level, stability, last]: the level (0-100) as of day
+# `last`, and the stability in days after which recall has fallen to
+# MASTERY_RECALL of it. Quizzes, flashcard reviews and finished lessons
+# are evidence: each pulls the decayed level towards the result, weighted by
+# how much it says about the module, and a good result after a gap makes
+# the memory more stable (a poor one less so). apply_event() folds the
+# evidence in as it arrives; backfill_mastery() rebuilds the states from
+# stored history for learners who have none yet, and for cohort reports.
+MASTERY_RECALL = 0.9
+MASTERY_STABILITY = 2.0  # days, after a module's first evidence
+MASTERY_MAX_STABILITY = 365.0
+MASTERY_GROWTH = 1.5  # stability gain for a perfect, fully weighted, well-spaced result
+MASTERY_LAPSE = 0.5  # stability lost for a failed, fully weighted result
+MASTERY_PASS = 0.6  # results at or above this strengthen the memory
+MASTERY_WEIGHTS = {"quiz": 1.0, "card": 0.1, "read": 0.25}
+
+def retention(days, stability):
+    """Share of a memory left after days (the forgetting curve)."""
+    return MASTERY_RECALL ** (max(0, days) / stability)
+
+def fold_evidence(state, day, result, weight):
+    """Memory state (day as an ordinal) after a result (0-1) of the given weight."""
+    if state is None:
+        return [100 * weight * result, MASTERY_STABILITY, day]
+    level, stability, last = state
+    gap = day - last
+    level *= retention(gap, stability)
+    level += weight * (100 * result - level)
+    if result >= MASTERY_PASS:
+        spacing = min(1.0, (max(0, gap) + 1) / stability)  # cramming adds little
+        stability = min(MASTERY_MAX_STABILITY,
+                        stability * (1 + weight * MASTERY_GROWTH * result * spacing))
+    else:
+        stability = max(MASTERY_STABILITY, stability * (1 - weight * MASTERY_LAPSE))
+    return [level, stability, max(day, last)]
+
+def update_mastery(progress, module_id, day, result, kind):
+    model = progress["mastery_model"]
+    state = model.get(module_id)
+    if state is not None:
+        state = [state[0], state[1], date.fromisoformat(state[2]).toordinal()]
+    level, stability, last = fold_evidence(
+        state, date.fromisoformat(day).toordinal(), result, MASTERY_WEIGHTS[kind]
+    )
+    model[module_id] = [level, stability, date.fromordinal(last).isoformat()]
+
+def current_mastery(progress, module_id, today=None):
+    """A module's decayed mastery (0-100) as of today."""
+    state = progress["mastery_model"].get(module_id)
+    if state is None:
+        return 0
+    level, stability, last = state
+    days = ((today or date.today()) - date.fromisoformat(last)).days
+    return int(round(level * retention(days, stability)))
+
+def lesson_read_through(state):
+    """Whether a dated reading state covers enough of its lesson to count as evidence."""
+    return len(state) > 3 and bool(state[3]) and coverage_pct(state[1]) >= LESSON_READ_COVERAGE
+
+def period_day(period):
+    """Ordinal of a history period: a date, or the Monday of an ISO week."""
+    if "W" in period:
+        year, _, week = period.partition("-W")
+        return date.fromisocalendar(int(year), int(week), 1).toordinal()
+    return date.fromisoformat(period).toordinal()
+
+def mastery_evidence(progress):
+    """Yield (module_id, day ordinal, result, weight) for a learner's dated history.
+
+    Quiz attempts come from quiz_scores and their rollups, flashcards from
+    each card's latest review and lessons from the last read of those
+    read through.
+    """
+    quiz_weight = MASTERY_WEIGHTS["quiz"]
+    for module_id, buckets in progress["rollups"]["quiz"].items():
+        for period, (count, total, _) in buckets.items():
+            if count:
+                yield module_id, period_day(period), total / count / 100, quiz_weight
+    for module_id, attempts in progress["quiz_scores"].items():
+        for attempt in attempts:
+            yield (module_id, date.fromisoformat(attempt["date"]).toordinal(),
+                   attempt["score"] / 100, quiz_weight)
+    modules = get_content_index().card_modules
+    for cid, state in progress["cards"].items():
+        module_id = modules.get(cid)
+        if module_id is not None:
+            # SM-2 resets reps on a lapse, so reps > 0 means the last recall held
+            yield (module_id, date.fromisoformat(state["due"]).toordinal() - state["interval"],
+                   1.0 if state["reps"] else 0.4, MASTERY_WEIGHTS["card"])
+    for lid, state in progress["reading"].items():
+        if lesson_read_through(state):
+            yield (lid.partition("/")[0], date.fromisoformat(state[3]).toordinal(),
+                   1.0, MASTERY_WEIGHTS["read"])
+
+def backfill_mastery(learners):
+    """Rebuild mastery models for many learners at once from their stored history.
+
+    Evidence from every learner is laid out in flat columns, ordered with a
+    single sort by (learner, module, day) and folded in one pass. Returns
+    one {module_id: [level, stability, last]} model per learner.
+    """
+    models = [{} for _ in learners]
+    owner = array("l")
+    modules = []
+    days = array("l")
+    results = array("d")
+    weights = array("d")
+    for n, progress in enumerate(learners):
+        for module_id, day, result, weight in mastery_evidence(progress):
+            owner.append(n)
+            modules.append(module_id)
+            days.append(day)
+            results.append(result)
+            weights.append(weight)
+    order = sorted(range(len(owner)), key=lambda i: (owner[i], modules[i], days[i]))
+    key = state = None
+    for i in order:
+        if (owner[i], modules[i]) != key:
+            if key is not None:
+                models[key[0]][key[1]] = state
+            key, state = (owner[i], modules[i]), None
+        state = fold_evidence(state, days[i], results[i], weights[i])
+    if key is not None:
+        models[key[0]][key[1]] = state
+    for model in models:
+        for state in model.values():
+            state[2] = date.fromordinal(state[2]).isoformat()
+    return models
+
+def needs_mastery_backfill(progress):
+    """Whether there is history the mastery model has not been built from."""
+    return not progress["mastery_model"] and any(
+        (progress["quiz_scores"], progress["rollups"]["quiz"], progress["cards"],
+         any(lesson_read_through(state) for state in progress["reading"].values()))
+    )
+
+# ─────────────────────────────────────────────────────────────────────
+# CONTENT GRAPH
+# ─────────────────────────────────────────────────────────────────────
+
+# Prerequisites form a DAG over content nodes named like search documents
+# ("lesson:<module>/<lesson>", "quiz:<question id>", "card:<card id>"),
+# plus a "module:<id>" node reached once all of that module's lessons are
+# done. A module's lessons follow one another, its first lesson needs the
+# modules its pack "requires", its questions need it read, and a
+# flashcard needs its module started; lessons and questions may list
+# further lessons under "requires". The graph is cached next to the
+# search index and re-synced node by node when packs change. Each learner
+# keeps a count of unmet prerequisites per node and a heap of unlocked,
+# unread lessons (Kahn's algorithm run one completion at a time), so
+# picking what comes next never walks the whole curriculum.
+CONTENT_GRAPH_FILE = CONTENT_CACHE_DIR / "content-graph.pickle"
+CONTENT_GRAPH_FORMAT = 1
+
+def content_prerequisites():
+    """Yield (node, frozenset of the nodes it requires) for all content."""
+    index = get_content_index()
+    first_lessons = {}
+    for module in index.modules:
+        module_id = module["id"]
+        after = {f"module:{m}" for m in module["requires"]}
+        lessons = []
+        for lesson in module["lessons"]:
+            node = f"lesson:{module_id}/{lesson['id']}"
+            yield node, frozenset(after | {f"lesson:{lid}" for lid in lesson["requires"]})
+            after = {node}
+            lessons.append(node)
+        yield f"module:{module_id}", frozenset(lessons or after)
+        if lessons:
+            first_lessons[module_id] = lessons[0]
+        for q in QUIZZES.get(module_id, []):
+            yield (f"quiz:{q['id']}",
+                   frozenset({f"module:{module_id}"} | {f"lesson:{lid}" for lid in q["requires"]}))
+    modules = index.card_modules
+    for cid, _, _ in index.cards:
+        first = first_lessons.get(modules.get(cid))
+        yield f"card:{cid}", frozenset({first} if first else ())
+
+
+class ContentGraph:
+    """Prerequisite DAG, updated node by node."""
+
+    def __init__(self):
+        self.format = CONTENT_GRAPH_FORMAT
+        self.signature = None  # content_signature() the graph was last synced with
+        self.requires = {}  # node -> frozenset of nodes it requires
+        self.dependents = {}  # node -> set of nodes that require it
+
+    def _unlink(self, node, requires):
+        for r in requires:
+            dependents = self.dependents[r]
+            dependents.discard(node)
+            if not dependents:
+                del self.dependents[r]
+
+    def sync(self, prerequisites, signature):
+        """Apply added, changed and removed nodes. Returns how many changed."""
+        changed = 0
+        seen = set()
+        for node, requires in prerequisites:
+            seen.add(node)
+            old = self.requires.get(node, frozenset())
+            if node in self.requires and old == requires:
+                continue
+            self._unlink(node, old - requires)
+            for r in requires - old:
+                self.dependents.setdefault(r, set()).add(node)
+            self.requires[node] = requires
+            changed += 1
+        for node in [n for n in self.requires if n not in seen]:
+            self._unlink(node, self.requires.pop(node))
+            changed += 1
+        if changed:
+            self.check()
+        self.signature = signature
+        return changed
+
+    def check(self):
+        """Raise ValueError for a prerequisite that does not exist or closes a cycle."""
+        for node, requires in self.requires.items():
+            for r in requires:
+                if r not in self.requires:
+                    raise ValueError(f"{node} requires unknown {r}")
+        missing = {node: len(requires) for node, requires in self.requires.items()}
+        ready = [node for node, count in missing.items() if not count]
+        reached = 0
+        while ready:
+            node = ready.pop()
+            reached += 1
+            for dependent in self.dependents.get(node, ()):
+                missing[dependent] -= 1
+                if not missing[dependent]:
+                    ready.append(dependent)
+        if reached < len(missing):
+            stuck = sorted(node for node, count in missing.items() if count)
+            raise ValueError(f"Prerequisite cycle among: {', '.join(stuck[:5])}")
+
+
+_content_graph = None
+
+def get_content_graph():
+    """Load the cached graph, bringing it up to date with the content packs."""
+    global _content_graph
+    if _content_graph is not None:
+        return _content_graph
+    graph = ContentGraph()
+    try:
+        with open(CONTENT_GRAPH_FILE, "rb") as f:
+            state = pickle.load(f)
+        if state.get("format") == CONTENT_GRAPH_FORMAT:
+            graph.__dict__.update(state)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        pass
+    signature = content_signature(CONTENT_DIR)
+    if graph.signature != signature:
+        graph.sync(content_prerequisites(), signature)
+        try:
+            CONTENT_GRAPH_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = CONTENT_GRAPH_FILE.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(vars(graph), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, CONTENT_GRAPH_FILE)
+        except OSError:
+            pass
+    _content_graph = graph
+    return graph
+
+
+class UnlockState:
+    """What a learner has unlocked: unmet prerequisites per node, and a heap
+    of unlocked, unread lessons in catalog order."""
+
+    def __init__(self, graph, index, completed):
+        self.graph = graph
+        self.index = index
+        self.done = set()
+        self.missing = {node: len(requires) for node, requires in graph.requires.items()}
+        self.ready = []  # (catalog position, lesson id)
+        for node in [node for node, count in self.missing.items() if not count]:
+            self._unlock(node)
+        for lid in completed:
+            self.complete(f"lesson:{lid}")
+
+    def _unlock(self, node):
+        kind, _, key = node.partition(":")
+        if kind == "module":
+            self.complete(node)  # a module is done once its lessons are
+        elif kind == "lesson" and node not in self.done and key in self.index.lesson_pos:
+            heapq.heappush(self.ready, (self.index.lesson_pos[key], key))
+
+    def complete(self, node):
+        if node in self.done or node not in self.missing:
+            return
+        self.done.add(node)
+        for dependent in self.graph.dependents.get(node, ()):
+            self.missing[dependent] -= 1
+            if not self.missing[dependent]:
+                self._unlock(dependent)
+
+    def unlocked(self, node):
+        return not self.missing.get(node, 0)
+
+    def next_lesson(self):
+        """The first unlocked lesson not yet read, or None."""
+        while self.ready and f"lesson:{self.ready[0][1]}" in self.done:
+            heapq.heappop(self.ready)
+        return self.ready[0][1] if self.ready else None
+
+    def upcoming(self, k):
+        """Up to k unlocked lessons not yet read, in catalog order."""
+        return [lid for _, lid in heapq.nsmallest(
+            k, (entry for entry in self.ready if f"lesson:{entry[1]}" not in self.done)
+        )]
+
+
+def unlock_state(progress):
+    """The progress dict's unlock state (kept under a transient key)."""
+    state = progress.get("_unlocks")
+    if state is None:
+        state = UnlockState(get_content_graph(), get_content_index(), progress["lessons_completed"])
+        progress["_unlocks"] = state
+    return state
+
+# ─────────────────────────────────────────────────────────────────────
+# SESSION PLANNER
+# ─────────────────────────────────────────────────────────────────────
+
+# The daily plan fills a time budget with the most valuable mix of due
+# flashcards, questions from the weakest modules and the next lessons.
+# Each candidate has a value and a duration estimated from the learner's
+# own latency samples (defaults until there are some), and a 0/1 knapsack
+# over PLAN_STEP_SECONDS slots picks the set. Candidates taking the same
+# number of slots differ only in value, so at most the best
+# slots // weight of them can be in the optimum and the rest are dropped
+# first, however large the backlog.
+PLAN_MINUTES = 20
+PLAN_STEP_SECONDS = 2
+PLAN_CORE = 24  # items either side of the greedy break that the knapsack revisits
+PLAN_MIN_SECONDS = 3  # floor for latency-based estimates
+PLAN_RECALL_SECONDS = 10  # recalling a card, until flashcard latency is recorded
+PLAN_GRADE_SECONDS = 4  # revealing and self-grading a card
+PLAN_QUESTION_SECONDS = 40  # answering a question, until question latency is recorded
+PLAN_FEEDBACK_SECONDS = 8  # reading the answer and explanation
+PLAN_READING_RATE = 15.0  # characters per second (~180 words a minute) until measured
+PLAN_LESSONS = 3  # unlocked unread lessons considered, in catalog order
+PLAN_LESSON_VALUE = 3.0  # per minute of reading the next lesson; later ones count less
+PLAN_NEW_CARD_VALUE = 0.6
+
+def lesson_size(lesson):
+    if lesson["content"] is not None:
+        return len(lesson["content"])
+    return os.path.getsize(CONTENT_DIR / lesson["file"])
+
+def typical_seconds(progress, module_id, kind, default):
+    """Median recorded latency for a module (or all of them, if None) and kind, in seconds."""
+    if module_id is None:
+        samples = [ms for kinds in progress["latency"].values() for ms in kinds.get(kind, ())]
+    else:
+        samples = progress["latency"].get(module_id, {}).get(kind)
+    return max(PLAN_MIN_SECONDS, statistics.median(samples) / 1000) if samples else default
+
+def reading_rate(progress):
+    """Characters per second this learner reads, from time spent on lesson pages."""
+    index = get_content_index()
+    seconds = chars = 0
+    for lid, state in progress["reading"].items():
+        if state[2] and lid in index.lessons:
+            seconds += state[2]
+            chars += lesson_size(index.lessons[lid][1]) * coverage_pct(state[1]) / 100
+    return max(3.0, min(60.0, chars / seconds)) if seconds >= 60 else PLAN_READING_RATE
+
+def plan_candidates(progress, budget, today=None):
+    """[(kind, key, module_id, seconds, value)] worth planning into budget seconds."""
+    today = today or date.today()
+    index = get_content_index()
+    candidates = []
+
+    card_seconds = typical_seconds(progress, None, "flashcard",
+                                   PLAN_RECALL_SECONDS) + PLAN_GRADE_SECONDS
+    limit = int(budget // card_seconds)
+    modules = index.card_modules
+    for cid in review_queue(progress).due(str(today), limit):
+        if cid in index.card_by_id:
+            state = progress["cards"][cid]
+            overdue = (today - date.fromisoformat(state["due"])).days
+            candidates.append(("card", cid, modules.get(cid), card_seconds,
+                               1 + min(2.0, overdue / max(1, state["interval"]))))
+    unlocks = unlock_state(progress)
+    unseen = (cid for cid, _, _ in index.cards
+              if cid not in progress["cards"] and unlocks.unlocked(f"card:{cid}"))
+    for cid in islice(unseen, max(0, limit - len(candidates))):
+        candidates.append(("card", cid, modules.get(cid), card_seconds, PLAN_NEW_CARD_VALUE))
+
+    for module in index.quiz_modules:
+        module_id = module["id"]
+        weakness = 1 - current_mastery(progress, module_id, today) / 100
+        seconds = typical_seconds(progress, module_id, "question",
+                                  PLAN_QUESTION_SECONDS) + PLAN_FEEDBACK_SECONDS
+        ability = progress["ability"].get(module_id, 0.0)
+        # practising what the learner is likely to miss, in a module they have forgotten, pays most
+        values = (
+            (2 * weakness * (1.5 - item_probability(ability, item_difficulty(progress, q["id"]))), q["id"])
+            for q in QUIZZES[module_id]
+            if unlocks.unlocked(f"quiz:{q['id']}")
+        )
+        for value, qid in heapq.nlargest(int(budget // seconds), values):
+            candidates.append(("question", qid, module_id, seconds, value))
+
+    rate = reading_rate(progress)
+    started = sorted(started_lessons(progress), key=index.lesson_pos.__getitem__)
+    upcoming = [lid for lid in unlocks.upcoming(PLAN_LESSONS + len(started)) if lid not in started]
+    for rank, lid in enumerate(started + upcoming[:PLAN_LESSONS]):
+        state = progress["reading"].get(lid)
+        left = 1 - coverage_pct(state[1]) / 100 if state else 1
+        # long lessons are planned a slice at a time; reading resumes where it stopped
+        seconds = max(60.0, min(budget / 2, lesson_size(index.lessons[lid][1]) * left / rate))
+        value = PLAN_LESSON_VALUE * seconds / 60 * 0.7 ** rank
+        candidates.append(("lesson", lid, lid.partition("/")[0], seconds, value))
+    return candidates
+
+def plan_session(candidates, budget):
+    """The candidates worth the most in total that fit into budget seconds, in session order."""
+    slots = int(budget // PLAN_STEP_SECONDS)
+    by_seconds = {}
+    for c in candidates:
+        by_seconds.setdefault(c[3], []).append(c)
+    by_weight = {}
+    for seconds, group in by_seconds.items():
+        weight = max(1, math.ceil(seconds / PLAN_STEP_SECONDS))
+        if weight <= slots:
+            by_weight.setdefault(weight, []).extend(group)
+    items = sorted(
+        ((c[4] / weight, weight, c)
+         for weight, group in by_weight.items()
+         for c in heapq.nlargest(slots // weight, group, key=lambda c: c[4])),
+        key=lambda item: item[0], reverse=True,
+    )
+
+    # Greedy by value per slot is optimal up to the first item that does not
+    # fit; the exact packing only differs around there, so the items on
+    # either side of that break are settled by a knapsack over what is left.
+    used = 0
+    split = len(items)
+    for i, (_, weight, _) in enumerate(items):
+        if used + weight > slots:
+            split = i
+            break
+        used += weight
+    lo = max(0, split - PLAN_CORE)
+    plan = [c for _, _, c in items[:lo]]
+    free = slots - sum(weight for _, weight, _ in items[:lo])
+    core = items[lo:split + PLAN_CORE]
+    best = [0.0] * (free + 1)  # best[s]: most value the core packs into s slots
+    took = []  # took[i][s - weight]: core item i is in the best packing of s slots
+    for _, weight, c in core:
+        prev = best
+        shifted = [v + c[4] for v in prev[: free + 1 - weight]]
+        best = prev[:weight] + list(map(max, prev[weight:], shifted))
+        took.append(bytes(a < b for a, b in zip(prev[weight:], shifted)))
+    s = free
+    for (_, weight, c), row in zip(reversed(core), reversed(took)):
+        if s >= weight and row[s - weight]:
+            plan.append(c)
+            s -= weight
+    order = {"card": 0, "lesson": 1, "question": 2}
+    plan.sort(key=lambda c: (order[c[0]], c[2] or "", -c[4]))
+    return plan
+
+def show_plan(plan):
+    index = get_content_index()
+    cards = [c for c in plan if c[0] == "card"]
+    if cards:
+        minutes = sum(c[3] for c in cards) / 60
+        print(f"  🃏 {len(cards)} flashcard(s)  ~{minutes:.0f} min")
+    for kind, key, module_id, seconds, _ in plan:
+        if kind == "lesson":
+            module, lesson = index.lessons[key]
+            print(f"  📖 {module['title']} → {lesson['title']}  ~{seconds / 60:.0f} min")
+    questions = {}
+    for c in plan:
+        if c[0] == "question":
+            questions.setdefault(c[2], []).append(c)
+    for module_id, group in questions.items():
+        minutes = sum(c[3] for c in group) / 60
+        print(f"  📝 {len(group)} question(s): {index.module_by_id[module_id]['title']}"
+              f"  ~{minutes:.0f} min")
+
+def run_plan(progress):
+    header("TODAY'S PLAN")
+    r = prompt(f"How many minutes do you have? (Enter for {PLAN_MINUTES}): ")
+    minutes = int(r) if r.isdigit() and int(r) > 0 else PLAN_MINUTES
+    plan = plan_session(plan_candidates(progress, 60 * minutes), 60 * minutes)
+    if not plan:
+        success("Nothing left to plan — you're all caught up!")
+        return
+    show_plan(plan)
+    info(f"\n  About {sum(c[3] for c in plan) / 60:.0f} of {minutes} min")
+    if prompt("Start? (y/n): ").lower() not in ("y", "yes"):
+        return
+
+    index = get_content_index()
+    cards = [index.card_by_id[c[1]] for c in plan if c[0] == "card"]
+    if cards:
+        run_flashcards(progress, cards)
+    for kind, key, _, _, _ in plan:
+        if kind == "lesson":
+            module, lesson = index.lessons[key]
+            header(f"{module['title']} → {lesson['title']}")
+            if read_lesson(progress, module, lesson):
+                success(f"Lesson complete: {lesson['title']}")
+            LATENCY.flush(progress, force=False)
+    questions = {}
+    for c in plan:
+        if c[0] == "question":
+            questions.setdefault(c[2], []).append(index.questions[c[1]][1])
+    for module_id, group in questions.items():
+        run_quiz(module_id, progress, questions=group)
 
 # ─────────────────────────────────────────────────────────────────────
 # DAILY SESSION LOGIC
 # ─────────────────────────────────────────────────────────────────────
 
+def started_lessons(progress):
+    """Lessons opened but not yet read far enough to complete."""
+    index = get_content_index()
+    completed = lesson_cursor(progress).completed
+    return [lid for lid in progress["reading"] if lid not in completed and lid in index.lesson_pos]
+
 def get_next_lesson(progress):
-    """Get the next unread lesson."""
-    completed = set(progress["lessons_completed"])
-    for module in sorted(MODULES, key=lambda m: m["order"]):
-        for lesson in module["lessons"]:
-            lid = f"{module['id']}/{lesson['id']}"
-            if lid not in completed:
-                return module, lesson
-    return None, None
+    """The earliest lesson left part-read, else the first unread one whose prerequisites are done."""
+    index = get_content_index()
+    started = started_lessons(progress)
+    if started:
+        return index.lessons[min(started, key=index.lesson_pos.__getitem__)]
+    lid = unlock_state(progress).next_lesson()
+    if lid is not None:
+        return index.lessons[lid]
+    return lesson_cursor(progress).next()
+
+def streak_length(progress):
+    """Consecutive active days ending today or yesterday."""
+    streak_days(progress)
+    state = progress["streak"]
+    if state["last"] and date.fromisoformat(state["last"]) >= date.today() - timedelta(days=1):
+        return state["current"]
+    return 0
 
 def show_dashboard(progress):
-    clear()
-    header("NORSTELLA CUSTOMER LEARNING")
-
-    # Streak
-    today = str(date.today())
-    streak = progress.get("streak_days", [])
-    streak_count = 0
-    if streak:
-        # Count consecutive days ending today or yesterday
-        from datetime import timedelta
-        d = date.today()
-        for s in reversed(streak):
-            if s == str(d) or s == str(d - timedelta(days=1)):
-                streak_count += 1
-                d = date.fromisoformat(s) - timedelta(days=1)
-            else:
-                break
-    print(f"  🔥 Streak: {streak_count} day(s)    📚 Sessions: {len(progress['sessions'])}")
-    total_lessons = sum(len(m["lessons"]) for m in MODULES)
+    index = get_content_index()
+    width = term_width()
+    lines = header_lines("NORSTELLA CUSTOMER LEARNING")
+
+    streak_count = streak_length(progress)
+    lines.append(f"  🔥 Streak: {streak_count} day(s) (best {progress['streak']['longest']})"
+                 f"    📚 Sessions: {session_count(progress)}")
+    total_lessons = index.total_lessons
     done_lessons = len(progress["lessons_completed"])
-    print(f"  📖 Lessons: {done_lessons}/{total_lessons}  {progress_bar(done_lessons, total_lessons, 20)}")
-    print()
-
-    # Module mastery
-    subheader("Module Mastery")
-    for module in sorted(MODULES, key=lambda m: m["order"]):
-        score = progress["mastery"].get(module["id"], 0)
+    started = len(started_lessons(progress))
+    lines.append(f"  📖 Lessons: {done_lessons}/{total_lessons}  {progress_bar(done_lessons, total_lessons, 20)}"
+                 + (f"  ({started} in progress)" if started else ""))
+    answered = correct = 0
+    for module in index.modules:
+        a, c = module_accuracy(progress, module["id"])
+        answered += a
+        correct += c
+    if answered:
+        lines.append(f"  🎯 Answers: {correct}/{answered} correct ({int(100 * correct / answered)}%)")
+    lines.append("")
+
+    # Module mastery, decayed since the last quiz, review or read
+    lines += ["", f"{YELLOW}{BOLD}▸ Module Mastery{RESET}"]
+    title_width = max(12, min(42, width - 39))
+    today = date.today()
+    for module in index.modules:
+        score = current_mastery(progress, module["id"], today)
+        best = progress["mastery"].get(module["id"], 0)
         status = "✓" if score >= 80 else "○"
         bar = progress_bar(score, 100, 15)
-        print(f"  {status} {module['title']:<42} {bar}")
+        note = f"  (best {best}%)" if best > score else ""
+        lines.append(f"  {status} {module['title'][:title_width]:<{title_width}} {bar}{note}")
+
+    lines.append("")
+    render_frame(lines)
+
+WEAK_AREAS_LIMIT = 5
+
+def module_accuracy(progress, module_id, since=None):
+    """(attempts, correct) for a module from its daily rollup, optionally since a date."""
+    attempts = correct = 0
+    for d, (a, c) in progress["module_daily"].get(module_id, {}).items():
+        if since is None or d >= since:
+            attempts += a
+            correct += c
+    return attempts, correct
+
+def show_weak_areas(progress):
+    """Weakest questions and per-module accuracy trend, read from rollups."""
+    header("WEAK AREAS")
+    index = get_content_index()
+    weakest = heapq.nsmallest(
+        WEAK_AREAS_LIMIT,
+        (
+            (correct / attempts, -attempts, qid)
+            for qid, (attempts, correct, _) in progress["item_stats"].items()
+            if attempts and qid in index.questions
+        ),
+    )
+    if not weakest:
+        info("No answers recorded yet — take a quiz first.")
+        return
 
+    subheader("Questions you miss most")
+    for accuracy, neg_attempts, qid in weakest:
+        module_id, q = index.questions[qid]
+        text = q["q"].strip().split("\n")[0]
+        print(f"  {int(100 * accuracy):>3}% of {-neg_attempts}  {text[:56]}")
+        info(f"        {index.module_by_id[module_id]['title']}")
+
+    subheader("Module accuracy (last 7 days vs. all time)")
+    week_ago = str(date.today() - timedelta(days=7))
+    for module in index.modules:
+        total, correct = module_accuracy(progress, module["id"])
+        if not total:
+            continue
+        recent, recent_correct = module_accuracy(progress, module["id"], since=week_ago)
+        overall = int(100 * correct / total)
+        trend = f"{int(100 * recent_correct / recent)}%" if recent else "—"
+        print(f"  {module['title']:<42} {trend:>5}  (all time {overall}%)")
+    show_latency_report(progress)
+
+LATENCY_REPORT = (
+    ("Answer speed (p50 / p95)", (("question", "quiz"), ("flashcard", "cards"), ("speed", "speed"))),
+    ("Reading pace (p50 / p95 per page)", (("page", "pages"),)),
+)
+
+def show_latency_report(progress):
+    """p50/p95 time per answer and per page, by module: slow answers signal recall struggle."""
+    index = get_content_index()
+    rows = [(m["id"], m["title"]) for m in index.modules]
+    # speed rounds, and flashcards from before cards had modules
+    rows += [("flashcards", "Flashcards"), ("speed_round", "Speed round")]
+    for heading, kinds in LATENCY_REPORT:
+        lines = []
+        for module_id, title in rows:
+            recorded = progress["latency"].get(module_id, {})
+            for kind, label in kinds:
+                samples = sorted(recorded.get(kind) or [])
+                if samples:
+                    p50 = percentile(samples, 0.50) / 1000
+                    p95 = percentile(samples, 0.95) / 1000
+                    lines.append(f"  {title:<36} {label:<6} {p50:>5.1f}s / {p95:.1f}s"
+                                 f"  (n={len(samples)})")
+        if lines:
+            subheader(heading)
+            print("\n".join(lines))
     print()
 
 def main_menu():
@@ -1281,112 +3246,1641 @@ def main_menu():
     print("  4) ⚡  Speed round")
     print("  5) 📚  Browse all modules")
     print("  6) 📊  View progress")
+    print("  7) 🎯  Weak areas")
+    print("  8) 🔎  Search")
+    print("  9) 📅  Today's plan")
     print("  q) 👋  Quit")
     return prompt("Choice: ")
 
+# ─────────────────────────────────────────────────────────────────────
+# SEARCH
+# ─────────────────────────────────────────────────────────────────────
+
+# An inverted index (term -> {doc_id: term frequency}) over every lesson,
+# quiz question and flashcard, ranked with BM25. It is pickled next to
+# the content cache and, when content changes, only documents whose text
+# hash changed are re-tokenized.
+SEARCH_INDEX_FILE = CONTENT_CACHE_DIR / "search-index.pickle"
+SEARCH_INDEX_FORMAT = 1
+SEARCH_LIMIT = 10
+BM25_K1 = 1.2
+BM25_B = 0.75
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the "
+    "this to was what which who why will with you your".split()
+)
+STEM_SUFFIXES = (
+    ("izations", "ize"), ("ization", "ize"), ("ational", "ate"), ("ations", "ate"),
+    ("ation", "ate"), ("ments", ""), ("ment", ""), ("ingly", ""), ("ings", ""),
+    ("ing", ""), ("edly", ""), ("ed", ""), ("ness", ""), ("ies", "y"), ("sses", "ss"),
+    ("ly", ""), ("ss", "ss"), ("s", ""),
+)
+
+def stem(word):
+    """Light suffix-stripping stemmer ("authorization" and "authorized" -> "authoriz")."""
+    if len(word) <= 3:
+        return word
+    for suffix, replacement in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: len(word) - len(suffix)] + replacement
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+def search_documents():
+    """Yield (doc_id, title, text) for every searchable piece of content."""
+    index = get_content_index()
+    for lid, (module, lesson) in index.lessons.items():
+        yield f"lesson:{lid}", f"{module['title']} → {lesson['title']}", lesson_text(lesson)
+    for qid, (module_id, q) in index.questions.items():
+        parts = [q["q"], q.get("explanation", "")]
+        parts += q.get("options", [])
+        if isinstance(q.get("answer"), str):
+            parts.append(q["answer"])
+        parts += [f"{k} {v}" for k, v in q.get("pairs", {}).items()]
+        title = f"{index.module_by_id[module_id]['title']} quiz"
+        yield f"quiz:{qid}", title, "\n".join(parts)
+    for cid, front, back in index.cards:
+        yield f"card:{cid}", "Flashcard", f"{front}\n{back}"
+
+
+class SearchIndex:
+    """BM25 inverted index, updated document by document."""
+
+    def __init__(self):
+        self.format = SEARCH_INDEX_FORMAT
+        self.signature = None  # content_signature() the index was last synced with
+        self.docs = {}  # doc_id -> {"hash", "title", "len", "terms": {term: tf}}
+        self.postings = {}  # term -> {doc_id: tf}
+        self.total_len = 0
+
+    def add(self, doc_id, title, text, digest):
+        terms = {}
+        tokens = tokenize(text)
+        for t in tokens:
+            terms[t] = terms.get(t, 0) + 1
+        for t, tf in terms.items():
+            self.postings.setdefault(t, {})[doc_id] = tf
+        self.docs[doc_id] = {"hash": digest, "title": title, "len": len(tokens), "terms": terms}
+        self.total_len += len(tokens)
+
+    def remove(self, doc_id):
+        doc = self.docs.pop(doc_id)
+        for t in doc["terms"]:
+            postings = self.postings[t]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[t]
+        self.total_len -= doc["len"]
+
+    def sync(self, documents, signature):
+        """Re-index only added, changed and removed documents. Returns how many changed."""
+        changed = 0
+        seen = set()
+        for doc_id, title, text in documents:
+            seen.add(doc_id)
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            doc = self.docs.get(doc_id)
+            if doc is not None and doc["hash"] == digest:
+                doc["title"] = title
+                continue
+            if doc is not None:
+                self.remove(doc_id)
+            self.add(doc_id, title, text, digest)
+            changed += 1
+        for doc_id in [d for d in self.docs if d not in seen]:
+            self.remove(doc_id)
+            changed += 1
+        self.signature = signature
+        return changed
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """[(score, doc_id)] best first."""
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_len = self.total_len / n
+        scores = {}
+        for t in set(tokenize(query)):
+            postings = self.postings.get(t)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[doc_id]["len"] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
+
+
+_search_index = None
+
+def get_search_index():
+    """Load the persisted index, bringing it up to date with the content packs."""
+    global _search_index
+    if _search_index is not None:
+        return _search_index
+    # Plain state is pickled rather than the instance, so the file loads
+    # whether this module runs as a script or is imported.
+    index = SearchIndex()
+    try:
+        with open(SEARCH_INDEX_FILE, "rb") as f:
+            state = pickle.load(f)
+        if state.get("format") == SEARCH_INDEX_FORMAT:
+            index.__dict__.update(state)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        pass
+    signature = content_signature(CONTENT_DIR)
+    if index.signature != signature:
+        index.sync(search_documents(), signature)
+        try:
+            SEARCH_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = SEARCH_INDEX_FILE.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(vars(index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, SEARCH_INDEX_FILE)
+        except OSError:
+            pass
+    _search_index = index
+    return index
+
+def search(query, limit=SEARCH_LIMIT):
+    """[(score, doc_id, title)] for a free-text query."""
+    index = get_search_index()
+    return [(score, doc_id, index.docs[doc_id]["title"]) for score, doc_id in index.search(query, limit)]
+
+def document_text(doc_id):
+    kind, _, key = doc_id.partition(":")
+    index = get_content_index()
+    if kind == "lesson":
+        return lesson_text(index.lessons[key][1])
+    if kind == "quiz":
+        q = index.questions[key][1]
+        return f"{q['q']}\n{q.get('explanation', '')}"
+    _, front, back = index.card_by_id[key]
+    return f"{front}\n{back}"
+
+def snippet(doc_id, query, width=64):
+    """First line of the document that mentions a query word."""
+    words = [w for w in TOKEN_RE.findall(query.lower()) if w not in STOP_WORDS]
+    lines = [l.strip() for l in document_text(doc_id).split("\n") if l.strip()]
+    for line in lines:
+        if any(w in line.lower() for w in words):
+            return line[:width]
+    return lines[0][:width] if lines else ""
+
+def print_search_results(query, results):
+    if not results:
+        lines = [f"{DIM}No matches for '{query}'.{RESET}"]
+    else:
+        lines = []
+        for i, (score, doc_id, title) in enumerate(results, 1):
+            lines.append(f"  {i}) {BOLD}{title}{RESET}  {DIM}({score:.1f}){RESET}")
+            lines.append(f"{DIM}     {snippet(doc_id, query)}{RESET}")
+    text = "\n".join(lines)
+    print(text if is_tty() else ANSI_RE.sub("", text))
+
+def run_search(progress):
+    query = prompt("Search for: ")
+    if not query or query.lower() == "q":
+        return
+    results = search(query)
+    print_search_results(query, results)
+    if not results:
+        return
+    sel = prompt("Open which result? (number, or Enter to go back): ")
+    if not sel:
+        return
+    try:
+        _, doc_id, title = results[int(sel) - 1]
+    except (ValueError, IndexError):
+        error("Invalid selection.")
+        return
+    kind, _, key = doc_id.partition(":")
+    header(title)
+    if kind == "lesson":
+        module, lesson = get_content_index().lessons[key]
+        read_lesson(progress, module, lesson)
+    elif kind == "quiz":
+        practice_question(get_content_index().questions[key][1])
+    else:
+        _, front, back = get_content_index().card_by_id[key]
+        print(f"{BOLD}{front}{RESET}\n\n{GREEN}{back}{RESET}")
+
+# ─────────────────────────────────────────────────────────────────────
+# SERVER MODE
+# ─────────────────────────────────────────────────────────────────────
+
+# Many learners are served from one asyncio process. Each learner gets
+# their own progress store under learning_data/learners/<shard>/<user>/,
+# and recently active learners stay loaded in an LRU cache.
+LEARNERS_DIR = DATA_DIR / "learners"
+LEARNER_CACHE_SIZE = 256
+LEARNER_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.@-]{0,63}$")  # never "." or ".."
+QUIZ_SESSION_LIMIT = 10000  # live step-by-step quiz sessions; the oldest are dropped
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def check_learner_id(user_id):
+    if not isinstance(user_id, str) or not LEARNER_ID_RE.match(user_id):
+        raise ApiError(400, f"Invalid learner id: {user_id!r}")
+    return user_id
+
+def learner_dir(root, user_id):
+    """Shard learners across 256 subdirectories by a hash of their id."""
+    check_learner_id(user_id)
+    shard = hashlib.sha1(user_id.encode()).hexdigest()[:2]
+    return Path(root) / shard / user_id
+
+
+class LearnerCache:
+    """LRU of hot learner states; evicted learners have their store closed."""
+
+    def __init__(self, root=LEARNERS_DIR, capacity=LEARNER_CACHE_SIZE, backend=None):
+        self.root = Path(root)
+        self.capacity = capacity
+        self.backend = backend
+        self.entries = OrderedDict()  # user_id -> (store, progress)
+        self.items = ItemPool(self.root / ITEM_POOL_NAME)
+        self.items_saved = time.time()
+
+    def get(self, user_id):
+        entry = self.entries.get(check_learner_id(user_id))
+        if entry is not None:
+            self.entries.move_to_end(user_id)
+            return entry
+        store = open_store(self.backend, learner_dir(self.root, user_id))
+        entry = (store, store.load())
+        entry[1]["_items"] = self.items
+        self.entries[user_id] = entry
+        if needs_mastery_backfill(entry[1]):
+            event = {"type": "mastery_backfill", "model": backfill_mastery([entry[1]])[0]}
+            apply_event(entry[1], event)
+            store.append(entry[1], event)
+        if needs_rollup(entry[1], date.today()):
+            event = {"type": "rollup", "date": str(date.today())}
+            apply_event(entry[1], event)
+            store.append(entry[1], event)
+        if len(self.entries) > self.capacity:
+            _, (old_store, _) = self.entries.popitem(last=False)
+            old_store.close()
+        return entry
+
+    def record(self, user_id, event):
+        store, progress = self.get(user_id)
+        pool_answer(progress, event)
+        apply_event(progress, event)
+        store.append(progress, event)
+        self._save_items()
+        return progress
+
+    def record_many(self, user_id, events):
+        """Apply several events and persist them in one store transaction."""
+        store, progress = self.get(user_id)
+        for event in events:
+            pool_answer(progress, event)
+            apply_event(progress, event)
+        store.commit(store.prepare([(progress, event) for event in events]))
+        self._save_items()
+        return progress
+
+    def _save_items(self):
+        if time.time() - self.items_saved >= ITEM_POOL_SAVE_INTERVAL:
+            self.items.save()
+            self.items_saved = time.time()
+
+    def close(self):
+        for store, _ in self.entries.values():
+            store.close()
+        self.entries.clear()
+        self.items.save()
+
+
+def public_step(step):
+    """A QuizSession step as sent to clients, with matching choices in session order."""
+    if step is None:
+        return None
+    q = step["question"]
+    out = public_question(q["id"], q)
+    out.update(phase=step["phase"], number=step["number"], total=step["total"])
+    if step["choices"] is not None:
+        out["choices"] = step["choices"]
+    return out
+
+def public_question(qid, q):
+    """A quiz question as sent to clients: everything except the answer."""
+    out = {"id": qid, "type": q["type"], "q": q["q"]}
+    if q["type"] == "multiple_choice":
+        out["options"] = q["options"]
+    elif q["type"] == "matching":
+        out["items"] = list(q["pairs"])
+        out["choices"] = sorted(q["pairs"].values())
+    return out
+
+
+class LearningServer:
+    """JSON-over-HTTP API serving MODULES, QUIZZES and FLASHCARDS.
+
+    GET  /modules
+    GET  /lessons/<module>/<lesson>
+    POST /lessons/<module>/<lesson>/complete   {"user": ...}
+    GET  /quizzes/<module>
+    POST /quizzes/<module>/answers             {"user": ..., "answers": {qid: answer}}
+    POST /sessions                             {"user": ..., "module": ..., "adaptive": bool,
+                                                "seed": int (optional, to replay a session)}
+    POST /sessions/<id>/answer                 {"answer": ..., "latency_ms": ...}
+    GET  /flashcards
+    GET  /progress/<user>
+    GET  /plan/<user>?minutes=20
+    """
+
+    def __init__(self, root=LEARNERS_DIR, cache_size=LEARNER_CACHE_SIZE, backend=None):
+        self.learners = LearnerCache(root, cache_size, backend)
+        self.index = get_content_index()
+        self.sessions = OrderedDict()  # session id -> (user, QuizSession)
+        self.seeds = SeedBatch()
+
+    def _lesson(self, module_id, lesson_id):
+        entry = self.index.lessons.get(f"{module_id}/{lesson_id}")
+        if entry is None:
+            raise ApiError(404, f"Unknown lesson: {module_id}/{lesson_id}")
+        return entry[1]
+
+    def _quiz(self, module_id):
+        if not isinstance(module_id, str):
+            raise ApiError(400, f"Invalid module id: {module_id!r}")
+        questions = QUIZZES.get(module_id)
+        if not questions:
+            raise ApiError(404, f"No quiz for module: {module_id}")
+        return questions
+
+    def dispatch(self, method, path, body):
+        import urllib.parse
+
+        parts = [p for p in urllib.parse.urlsplit(path).path.split("/") if p]
+        data = json.loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+
+        if method == "GET" and parts == ["modules"]:
+            return [
+                {
+                    "id": m["id"],
+                    "title": m["title"],
+                    "order": m["order"],
+                    "requires": m["requires"],
+                    "has_quiz": self.index.has_quiz(m["id"]),
+                    "lessons": [{"id": l["id"], "title": l["title"]} for l in m["lessons"]],
+                }
+                for m in self.index.modules
+            ]
+        if method == "GET" and parts == ["flashcards"]:
+            return [{"front": f, "back": b, "module": m} for f, b, m in FLASHCARDS]
+        if method == "GET" and len(parts) == 3 and parts[0] == "lessons":
+            lesson = self._lesson(parts[1], parts[2])
+            return {"id": lesson["id"], "title": lesson["title"], "content": lesson_text(lesson)}
+        if method == "POST" and len(parts) == 4 and parts[0] == "lessons" and parts[3] == "complete":
+            self._lesson(parts[1], parts[2])
+            lid = f"{parts[1]}/{parts[2]}"
+            progress = self.learners.record(
+                data.get("user"),
+                {"type": "lesson_completed", "lesson": lid, "date": str(date.today())},
+            )
+            return {"lessons_completed": len(progress["lessons_completed"])}
+        if method == "GET" and len(parts) == 2 and parts[0] == "quizzes":
+            return [public_question(i, q) for i, q in enumerate(self._quiz(parts[1]))]
+        if method == "POST" and len(parts) == 3 and parts[0] == "quizzes" and parts[2] == "answers":
+            return self.grade_submission(parts[1], data)
+        if method == "POST" and parts == ["sessions"]:
+            return self.start_session(data)
+        if method == "POST" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "answer":
+            return self.answer_session(parts[1], data)
+        if method == "GET" and len(parts) == 2 and parts[0] == "progress":
+            _, progress = self.learners.get(parts[1])
+            return persistent(progress)
+        if method == "GET" and len(parts) == 2 and parts[0] == "plan":
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query)
+            try:
+                minutes = int(query.get("minutes", [PLAN_MINUTES])[0])
+            except ValueError:
+                raise ApiError(400, "minutes must be a whole number")
+            if not 1 <= minutes <= 240:
+                raise ApiError(400, "minutes must be between 1 and 240")
+            _, progress = self.learners.get(parts[1])
+            return plan_items(progress, minutes)
+        raise ApiError(404 if method in ("GET", "POST") else 405, f"No route for {method} {path}")
+
+    def grade_submission(self, module_id, data):
+        self._quiz(module_id)
+        answers = data.get("answers") or {}
+        if not isinstance(answers, dict):
+            raise ApiError(400, "answers must be an object")
+        results = grade_sheet(module_id, answers)
+        events = sheet_events(module_id, results)
+        self.learners.record_many(data.get("user"), events)
+        quiz = events[-1]
+        return {
+            "score": quiz["score"],
+            "correct": quiz["correct"],
+            "total": quiz["total"],
+            "results": [{k: r[k] for k in ("id", "correct", "chosen")} for r in results],
+        }
+
+    def start_session(self, data):
+        """Start a step-by-step quiz; each answer is graded and recorded as it arrives."""
+        module_id = data.get("module")
+        questions = self._quiz(module_id)
+        seed = data.get("seed")
+        if not isinstance(seed, int):
+            seed = self.seeds.next()
+        rng = session_rng(seed)
+        user = data.get("user")
+        _, progress = self.learners.get(user)
+        session = QuizSession(module_id, progress, shuffled(rng, questions),
+                              bool(data.get("adaptive")), rng, seed=seed)
+        sid = os.urandom(8).hex()
+        self.sessions[sid] = (user, session)
+        if len(self.sessions) > QUIZ_SESSION_LIMIT:
+            self.sessions.popitem(last=False)
+        return {"session": sid, "seed": seed, "step": public_step(session.step())}
+
+    def answer_session(self, sid, data):
+        entry = self.sessions.get(sid)
+        if entry is None:
+            raise ApiError(404, f"Unknown session: {sid}")
+        user, session = entry
+        session.progress = self.learners.get(user)[1]  # may have been evicted and reloaded
+        latency_ms = data.get("latency_ms")
+        if latency_ms is not None and (isinstance(latency_ms, bool)
+                                       or not isinstance(latency_ms, (int, float))):
+            raise ApiError(400, "latency_ms must be a number")
+        outcome, events = session.answer(data.get("answer"), latency_ms)
+        if events:
+            # the next adaptive pick must see this answer in ability and item stats
+            session.progress = self.learners.record_many(user, events)
+        step = session.step()
+        result = None
+        if step is None:
+            quiz = session.finish()
+            del self.sessions[sid]
+            self.learners.record(user, quiz)
+            result = {k: quiz[k] for k in ("score", "correct", "total")}
+        return {"outcome": outcome, "step": public_step(step), "result": result}
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 requests (with keep-alive) on one connection."""
+        import asyncio
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = h.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = 200, self.dispatch(method, target, body)
+                except ApiError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except (ValueError, KeyError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:  # a bug in one request must not take the connection down
+                    print(f"{method} {target}: {type(e).__name__}: {e}", file=sys.stderr)
+                    status, payload = 500, {"error": "Internal server error"}
+                data = json.dumps(payload, default=str).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765, socket_path=None):
+        import asyncio
+
+        # A deep accept backlog keeps bursts of new learners from being refused.
+        if socket_path:
+            return await asyncio.start_unix_server(self.handle, path=socket_path, backlog=4096)
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+    def close(self):
+        self.learners.close()
+
+
+def serve(host="127.0.0.1", port=8765, socket_path=None, cache_size=LEARNER_CACHE_SIZE):
+    import asyncio
+
+    async def run():
+        app = LearningServer(cache_size=cache_size)
+        server = await app.start(host, port, socket_path)
+        where = socket_path or f"http://{host}:{port}"
+        print(f"{CYAN}Serving Norstella learning API on {where}{RESET}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            app.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+# ─────────────────────────────────────────────────────────────────────
+# LOAD TEST
+# ─────────────────────────────────────────────────────────────────────
+
+async def _http_request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        key, _, value = h.decode("latin-1").partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+def _random_answer(rng, q):
+    if q["type"] == "multiple_choice":
+        return rng.randint(1, len(q["options"]))
+    if q["type"] == "matching":
+        return dict(zip(q["items"], rng.sample(q["choices"], len(q["choices"]))))
+    if q["type"] == "scenario":
+        return rng.choice("123")
+    return rng.choice(["pharmaprojects", "smooth", "vantage", "not sure"])
+
+async def _simulate_learner(host, port, user_id, rng, latencies):
+    """One learner: pick a module, fetch its quiz, submit random answers."""
+    import asyncio
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, modules = await _http_request(reader, writer, "GET", "/modules")
+        module = rng.choice([m for m in modules if m["has_quiz"]])
+        start = time.perf_counter()
+        _, questions = await _http_request(reader, writer, "GET", f"/quizzes/{module['id']}")
+        answers = {str(q["id"]): _random_answer(rng, q) for q in questions}
+        status, _ = await _http_request(
+            reader, writer, "POST", f"/quizzes/{module['id']}/answers",
+            {"user": user_id, "answers": answers},
+        )
+        latencies.append(time.perf_counter() - start)
+        return status == 200
+    finally:
+        writer.close()
+
+async def run_load_test(learners=2000, concurrency=500, host=None, port=None, seed=0):
+    """Simulate many concurrent quiz sessions; spins up a scratch server if no port is given."""
+    import asyncio
+    import tempfile
+
+    rng = random.Random(seed)
+    app = server = tmp = None
+    if port is None:
+        tmp = tempfile.TemporaryDirectory()
+        app = LearningServer(root=tmp.name)
+        server = await app.start("127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            return await _simulate_learner(host, port, f"learner{i:05d}", rng, latencies)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(learners)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+        app.close()
+        tmp.cleanup()
+
+    ok = sum(1 for r in results if r is True)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(f"{BOLD}Load test: {learners} quiz sessions, concurrency {concurrency}{RESET}")
+    print(f"  ok: {ok}  failed: {learners - ok}  elapsed: {elapsed:.2f}s  "
+          f"({ok / elapsed:.0f} sessions/s)")
+    print(f"  quiz latency p50: {p50 * 1000:.1f}ms  p95: {p95 * 1000:.1f}ms")
+    return ok
+
+# ─────────────────────────────────────────────────────────────────────
+# BATCH COMMANDS
+# ─────────────────────────────────────────────────────────────────────
+
+# Non-interactive subcommands for scripts and reporting jobs. They never
+# clear the screen or render the dashboard, open the learner's store
+# directly (no background writer), and print plain text or --json.
+# Scripts calling these in a loop should use `python -m norstella_learn`,
+# which reuses cached bytecode instead of recompiling this file each run.
+
+def cli_root(args):
+    """Where the item pool shared by the subcommand's learner lives."""
+    return LEARNERS_DIR if args.learner else args.data_dir or DATA_DIR
+
+def open_cli_store(args, read_only=False):
+    if args.learner:
+        try:
+            data_dir = learner_dir(LEARNERS_DIR, args.learner)
+        except ApiError as e:
+            raise SystemExit(str(e))
+        if read_only and not store_exists(data_dir):
+            raise SystemExit(f"unknown learner: {args.learner}")
+    else:
+        data_dir = args.data_dir or DATA_DIR
+    return open_store(args.backend, data_dir, read_only)
+
+def load_cli_progress(args):
+    """A learner's progress for the read-only subcommands; nothing is written."""
+    store = open_cli_store(args, read_only=True)
+    try:
+        progress = store.load()
+    finally:
+        store.close()
+    progress["_items"] = get_item_pool(cli_root(args))  # read for planning, never saved
+    if needs_mastery_backfill(progress):  # as the app does on start, but kept in memory
+        apply_event(progress, {"type": "mastery_backfill", "model": backfill_mastery([progress])[0]})
+    return progress
+
+def progress_summary(progress):
+    index = get_content_index()
+    answered = correct = 0
+    for module in index.modules:
+        a, c = module_accuracy(progress, module["id"])
+        answered += a
+        correct += c
+    return {
+        "lessons_completed": len(progress["lessons_completed"]),
+        "lessons_total": index.total_lessons,
+        "lessons_in_progress": len(started_lessons(progress)),
+        "sessions": session_count(progress),
+        "total_time_min": progress.get("total_time_min", 0),
+        "streak": streak_length(progress),
+        "longest_streak": progress["streak"]["longest"],
+        "mastery": {m["id"]: progress["mastery"].get(m["id"], 0) for m in index.modules},
+        "retained": {m["id"]: current_mastery(progress, m["id"]) for m in index.modules},
+        "answers": answered,
+        "answers_correct": correct,
+        "cards_reviewed": len(progress["cards"]),
+    }
+
+def print_result(data, as_json):
+    if as_json:
+        print(json.dumps(data, default=str))
+        return
+    for key, value in data.items():
+        if isinstance(value, dict):
+            print(f"{key}:")
+            for k, v in value.items():
+                print(f"  {k}: {v}")
+        else:
+            print(f"{key}: {value}")
+
+def cmd_stats(args):
+    print_result(progress_summary(load_cli_progress(args)), args.json)
+
+def cmd_next_lesson(args):
+    module, lesson = get_next_lesson(load_cli_progress(args))
+    if module is None:
+        print_result({"module": None, "lesson": None, "title": None}, args.json)
+    else:
+        print_result({"module": module["id"], "lesson": lesson["id"],
+                      "title": f"{module['title']} → {lesson['title']}"}, args.json)
+
+def plan_items(progress, minutes):
+    """The session plan as plain rows for the CLI and the server."""
+    budget = 60 * minutes
+    return [
+        {"kind": kind, "id": key, "module": module_id,
+         "seconds": round(seconds), "value": round(value, 3)}
+        for kind, key, module_id, seconds, value in plan_session(
+            plan_candidates(progress, budget), budget
+        )
+    ]
+
+def cmd_plan(args):
+    items = plan_items(load_cli_progress(args), args.minutes)
+    if args.json:
+        print(json.dumps(items))
+        return
+    for item in items:
+        print(f"{item['kind']:<9} {item['id']:<48} {item['seconds']:>5}s  {item['value']}")
+    print(f"total: {sum(item['seconds'] for item in items) / 60:.1f} of {args.minutes} min")
+
+def cmd_quiz(args):
+    """Grade an answer file ({question id or index: answer}) and record the result."""
+    if not get_content_index().has_quiz(args.module):
+        raise SystemExit(f"No quiz for module: {args.module}")
+    answers = json.loads(Path(args.answers_file).read_text())
+    results = grade_sheet(args.module, answers)
+    events = sheet_events(args.module, results)
+    store = open_cli_store(args)
+    try:
+        progress = store.load()
+        progress["_items"] = get_item_pool(cli_root(args))
+        for event in events:
+            pool_answer(progress, event)
+            apply_event(progress, event)
+        store.commit(store.prepare([(progress, e) for e in events]))
+    finally:
+        store.close()
+    progress["_items"].save()
+    quiz = events[-1]
+    print_result({"module": args.module, "score": quiz["score"],
+                  "correct": quiz["correct"], "total": quiz["total"]}, args.json)
+
+def cmd_export(args):
+    data = json.dumps(persistent(load_cli_progress(args)), indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(data + "\n")
+    else:
+        print(data)
+
+def cmd_search(args):
+    query = " ".join(args.query)
+    results = search(query, args.limit)
+    if args.json:
+        print(json.dumps([
+            {"score": round(score, 3), "doc": doc_id, "title": title}
+            for score, doc_id, title in results
+        ]))
+    else:
+        print_search_results(query, results)
+
+def run_startup_bench(repeat=5):
+    """Time each batch subcommand as a fresh process against a scratch data dir."""
+    import subprocess
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        answers = Path(tmp) / "answers.json"
+        answers.write_text(json.dumps({str(i): 1 for i in range(len(QUIZZES["citeline"]))}))
+        commands = [
+            ["stats"],
+            ["next-lesson"],
+            ["quiz", "--module", "citeline", "--answers-file", str(answers)],
+            ["export"],
+            ["search", "prior", "authorization"],
+        ]
+        baseline = [sys.executable, "-c", "pass"]
+        print(f"{BOLD}Startup time over {repeat} runs (min / median){RESET}")
+        for cmd in [None] + commands:
+            argv = baseline if cmd is None else [
+                sys.executable, "-m", "norstella_learn", *cmd, "--data-dir", tmp
+            ]
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(argv, stdout=subprocess.DEVNULL, check=True,
+                               cwd=Path(__file__).parent)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            label = "(python -c pass)" if cmd is None else " ".join(cmd[:3])
+            print(f"  {label:<32} {times[0] * 1000:6.0f}ms / {times[len(times) // 2] * 1000:6.0f}ms")
+
+def run_engine_bench(sessions=2000, concurrency=200):
+    """Questions graded per second by QuizSession, driven directly and under asyncio."""
+    import asyncio
+
+    modules = [m["id"] for m in get_content_index().quiz_modules]
+    rng = random.Random(0)
+    learners = [empty_progress() for _ in range(concurrency)]
+
+    def drive(progress, module_id):
+        session = QuizSession(module_id, progress, QUIZZES[module_id], rng=rng)
+        step = session.step()
+        while step is not None:
+            _, events = session.answer(_random_answer(rng, public_step(step)))
+            for event in events:
+                apply_event(progress, event)
+            yield len(events)
+            step = session.step()
+        apply_event(progress, session.finish())
+
+    start = time.perf_counter()
+    graded = sum(
+        sum(drive(learners[i % concurrency], modules[i % len(modules)]))
+        for i in range(sessions)
+    )
+    direct = graded / (time.perf_counter() - start)
+
+    async def learner(progress, n):
+        total = 0
+        for i in range(n):
+            for count in drive(progress, modules[i % len(modules)]):
+                total += count
+                await asyncio.sleep(0)  # stand-in for waiting on the learner's reply
+        return total
+
+    async def multiplexed():
+        per_learner = max(1, sessions // concurrency)
+        return sum(await asyncio.gather(*(learner(p, per_learner) for p in learners)))
+
+    start = time.perf_counter()
+    graded = asyncio.run(multiplexed())
+    concurrent = graded / (time.perf_counter() - start)
+    print(f"{BOLD}Quiz engine throughput ({sessions} sessions){RESET}")
+    print(f"  direct:                      {direct:10.0f} questions/s")
+    print(f"  asyncio, {concurrency:>4} concurrent:     {concurrent:10.0f} questions/s")
+
+def run_plan_bench(items=50000, minutes=30):
+    """Time plan_session() on a synthetic backlog of cards, questions and lessons."""
+    rng = random.Random(0)
+    modules = [f"module{i}" for i in range(20)]
+    candidates = []
+    for i in range(items):
+        kind = rng.choice(("card", "card", "question"))
+        m = rng.randrange(len(modules))
+        seconds = 14.0 if kind == "card" else 30.0 + 5 * (m % 6)
+        candidates.append((kind, f"{kind}{i}", modules[m], seconds, rng.uniform(0.2, 3.0)))
+    candidates += [("lesson", f"lesson{i}", modules[i], 60.0 * (i + 2), 3.0 * (i + 2) * 0.7 ** i)
+                   for i in range(PLAN_LESSONS)]
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        plan = plan_session(candidates, 60 * minutes)
+        runs.append(time.perf_counter() - start)
+    print(f"{BOLD}Session plan: {len(candidates)} candidates, {minutes} min budget{RESET}")
+    print(f"  planned {len(plan)} items, ~{sum(c[3] for c in plan) / 60:.1f} min, "
+          f"value {sum(c[4] for c in plan):.1f}")
+    print(f"  median {1000 * statistics.median(runs):.1f} ms")
+
+# ─────────────────────────────────────────────────────────────────────
+# BULK GRADING
+# ─────────────────────────────────────────────────────────────────────
+
+# Offline grading of submitted answer sheets. A sheet is
+#   {"learner": id, "module": id, "answers": {question id or index: answer},
+#    "date": "YYYY-MM-DD" (optional)}
+# read from .json (one sheet or a list), .jsonl, or .csv files with
+# learner,module,question,answer[,date][,sheet] columns, where consecutive
+# rows of the same learner/module/sheet form one submission.
+#
+# Sheets are streamed and routed by learner to one of N partitions, so a
+# learner's store is only ever written by one worker process. Each batch
+# loads a learner once, folds every graded sheet into it and commits all
+# of its events in a single store transaction.
+GRADE_BATCH_SIZE = 256
+GRADE_SUFFIXES = (".json", ".jsonl", ".csv")
+
+def submission_files(paths):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.suffix in GRADE_SUFFIXES)
+        else:
+            yield path
+
+def csv_sheets(path):
+    import csv
+
+    with open(path, newline="", encoding="utf-8") as f:
+        sheet, key = None, None
+        for row in csv.DictReader(f):
+            row_key = (row.get("learner"), row.get("module"), row.get("sheet") or row.get("date"))
+            if row_key != key:
+                if sheet is not None:
+                    yield sheet
+                key = row_key
+                sheet = {"learner": row.get("learner"), "module": row.get("module"), "answers": {}}
+                if row.get("date"):
+                    sheet["date"] = row["date"]
+            answer = row.get("answer") or ""
+            if answer.startswith("{"):  # matching questions: {"item": "value", ...}
+                try:
+                    answer = json.loads(answer)
+                except ValueError:
+                    pass
+            sheet["answers"][row.get("question") or ""] = answer
+        if sheet is not None:
+            yield sheet
+
+def read_sheets(paths):
+    """Stream (source, sheet, problem) from submission files and directories.
+
+    problem says why an entry could not be parsed (sheet is then None).
+    """
+    for path in submission_files(paths):
+        if path.suffix == ".csv":
+            for n, sheet in enumerate(csv_sheets(path)):
+                yield f"{path}#{n}", sheet, None
+        elif path.suffix == ".jsonl":
+            with open(path, encoding="utf-8") as f:
+                for n, line in enumerate(f, 1):
+                    if line.strip():
+                        try:
+                            sheet, problem = json.loads(line), None
+                        except ValueError as e:
+                            sheet, problem = None, f"invalid JSON: {e}"
+                        yield f"{path}:{n}", sheet, problem
+        else:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError as e:
+                yield str(path), None, f"invalid JSON: {e}"
+                continue
+            for n, sheet in enumerate(data if isinstance(data, list) else [data]):
+                yield f"{path}[{n}]", sheet, None
+
+def sheet_problem(sheet):
+    """Why a sheet cannot be graded, or None."""
+    if not isinstance(sheet, dict) or not sheet.get("learner"):
+        return "missing learner"
+    if not LEARNER_ID_RE.match(str(sheet["learner"])):
+        return f"invalid learner id {sheet['learner']!r}"
+    module_id = sheet.get("module")
+    if not isinstance(module_id, str) or not get_content_index().has_quiz(module_id):
+        return f"no quiz for module {sheet.get('module')!r}"
+    if not isinstance(sheet.get("answers"), dict):
+        return "answers must be an object"
+    try:
+        if "date" in sheet:
+            date.fromisoformat(sheet["date"])
+    except (TypeError, ValueError):
+        return f"bad date {sheet['date']!r}"
+    return None
+
+def grade_sheets(sheets, root, backend):
+    """Worker: grade (source, sheet) pairs, committing each learner's events in one transaction.
+
+    Returns (rows, rejects, item pool changes); a sheet that fails to
+    grade, or whose learner store cannot be read or written, is rejected as
+    (source, reason).
+    """
+    items = get_item_pool(root)
+    by_learner = {}
+    for source, sheet in sheets:
+        by_learner.setdefault(str(sheet["learner"]), []).append((source, sheet))
+    rows, rejects = [], []
+    for learner, learner_sheets in by_learner.items():
+        store = None
+        try:
+            store = open_store(backend, learner_dir(root, learner))
+            progress = store.load()
+            progress["_items"] = items
+        except Exception as e:
+            rejects.extend((source, f"learner store: {e}") for source, _ in learner_sheets)
+            if store is not None:
+                store.close()
+            continue
+        batch, learner_rows, sources = [], [], []
+        try:
+            for source, sheet in learner_sheets:
+                try:
+                    results = grade_sheet(sheet["module"], sheet["answers"])
+                    events = sheet_events(sheet["module"], results, sheet.get("date"))
+                except Exception as e:
+                    rejects.append((source, f"cannot grade: {e}"))
+                    continue
+                sources.append(source)
+                for event in events:
+                    pool_answer(progress, event)
+                    apply_event(progress, event)
+                    batch.append((progress, event))
+                quiz = events[-1]
+                learner_rows.append({"learner": learner, "module": sheet["module"],
+                                     "date": quiz["date"], "score": quiz["score"],
+                                     "correct": quiz["correct"], "total": quiz["total"]})
+            if batch:
+                store.commit(store.prepare(batch))
+            rows.extend(learner_rows)
+        except Exception as e:  # nothing of this learner's was committed
+            rejects.extend((source, f"learner store: {e}") for source in sources)
+        finally:
+            store.close()
+    return rows, rejects, items.take_changes()
+
+def grade_submissions(paths, root=LEARNERS_DIR, backend=None, workers=None,
+                      batch_size=GRADE_BATCH_SIZE, on_result=None, on_reject=None):
+    """Grade every sheet under paths into learner stores. Returns (graded, rejected)."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    get_content_index()  # load content before forking workers
+    items = get_item_pool(root)
+    buffers = [[] for _ in range(workers)]
+    pending = {}  # partition -> (future, its (source, sheet) batch)
+    graded = rejected = 0
+
+    def reject(source, problem):
+        nonlocal rejected
+        rejected += 1
+        if on_reject:
+            on_reject(source, problem)
+
+    def collect(future, batch):
+        nonlocal graded
+        try:
+            rows, rejects, changes = future.result()
+        except Exception as e:  # the worker itself failed: none of its batch was graded
+            rows, rejects, changes = [], [(source, f"worker failed: {e}") for source, _ in batch], {}
+        items.merge(changes)
+        for row in rows:
+            graded += 1
+            if on_result:
+                on_result(row)
+        for source, problem in rejects:
+            reject(source, problem)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(part):
+            if part in pending:  # one batch in flight per partition
+                collect(*pending.pop(part))
+            pending[part] = (pool.submit(grade_sheets, buffers[part], root, backend), buffers[part])
+            buffers[part] = []
+
+        for source, sheet, problem in read_sheets(paths):
+            problem = problem or sheet_problem(sheet)
+            if problem:
+                reject(source, problem)
+                continue
+            learner = str(sheet["learner"]).encode("utf-8")
+            part = int(hashlib.sha1(learner).hexdigest()[:8], 16) % workers
+            buffers[part].append((source, sheet))
+            if len(buffers[part]) >= batch_size:
+                submit(part)
+        for part in range(workers):
+            if buffers[part]:
+                submit(part)
+        for future, batch in pending.values():
+            collect(future, batch)
+    items.save()
+    return graded, rejected
+
+def cmd_grade(args):
+    start = time.perf_counter()
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+
+    def on_result(row):
+        if out:
+            out.write(json.dumps(row) + "\n")
+
+    def on_reject(source, problem):
+        print(f"{source}: {problem}", file=sys.stderr)
+
+    try:
+        graded, rejected = grade_submissions(
+            args.paths, args.root, args.backend, args.workers, on_result=on_result,
+            on_reject=on_reject,
+        )
+    finally:
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print_result({"graded": graded, "rejected": rejected, "elapsed_s": round(elapsed, 2),
+                  "sheets_per_min": round(60 * graded / elapsed) if elapsed else None}, args.json)
+
+# ─────────────────────────────────────────────────────────────────────
+# COHORT AGGREGATION
+# ─────────────────────────────────────────────────────────────────────
+
+# Team-lead view across many learners. Learner stores are discovered
+# lazily and handed to a process pool in chunks. Each worker folds its
+# chunk into fixed-size arrays (a 0-100 histogram per module, retention
+# counters by day offset, per-question sums), so merging partial results
+# costs the same whatever the cohort size. Only completion times are kept
+# per learner, as one float each, for the medians.
+COHORT_SUMMARY_FILE = DATA_DIR / "cohort-summary.json"
+COHORT_CHUNK_SIZE = 64
+RETENTION_DAYS = 30
+HARDEST_QUESTIONS = 20
+STORE_FILES = (
+    ("sqlite", PROGRESS_DB.name),
+    ("log", PROGRESS_SNAPSHOT.name),
+    ("log", PROGRESS_LOG.name),
+    ("json", PROGRESS_FILE.name),
+)
+
+def find_learners(root):
+    """Yield (backend, path) for each learner store or loose progress file under root."""
+    store_names = {name for _, name in STORE_FILES}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        names = set(filenames)
+        for backend, name in STORE_FILES:
+            if name in names:
+                yield backend, dirpath
+                break
+        else:
+            for name in sorted(filenames):
+                if name.endswith(".json") and name not in store_names:
+                    yield "file", os.path.join(dirpath, name)
+
+def load_learner(backend, path):
+    if backend == "file":
+        progress = JsonProgressStore(path).load()
+        if not isinstance(progress.get("lessons_completed"), list):
+            raise ValueError(f"Not a progress file: {path}")
+        return progress
+    store = open_store(backend, path)
+    try:
+        return store.load()
+    finally:
+        store.close()
+
+def new_cohort_aggregate(n_modules):
+    return {
+        "learners": 0,
+        "errors": 0,
+        "mastery_hist": [array("I", bytes(4 * 101)) for _ in range(n_modules)],
+        "retained_hist": [array("I", bytes(4 * 101)) for _ in range(n_modules)],  # decayed mastery
+        "complete_minutes": array("d"),
+        "complete_days": array("d"),
+        "retention_active": array("I", bytes(4 * (RETENTION_DAYS + 1))),
+        "retention_eligible": array("I", bytes(4 * (RETENTION_DAYS + 1))),
+        "questions": {},  # question_id -> [attempts, correct, difficulty_sum, learners]
+    }
+
+def fold_learner(agg, progress, model, module_ids, total_lessons, today):
+    agg["learners"] += 1
+    for hist, module_id in zip(agg["mastery_hist"], module_ids):
+        hist[max(0, min(100, int(progress["mastery"].get(module_id, 0))))] += 1
+    for hist, module_id in zip(agg["retained_hist"], module_ids):
+        state = model.get(module_id)
+        retained = 0
+        if state is not None:
+            level, stability, last = state
+            retained = level * retention(today - date.fromisoformat(last).toordinal(), stability)
+        hist[max(0, min(100, int(round(retained))))] += 1
+
+    days = list(streak_days(progress))
+    if len(set(progress["lessons_completed"])) >= total_lessons and days:
+        # measured up to the last lesson, not to whatever the learner did afterwards
+        done = progress.get("last_completed")
+        minutes = progress.get("total_time_min", 0)
+        finished = days[-1]  # completions from before they were dated
+        if done:
+            finished = date.fromisoformat(done[0]).toordinal()
+            if done[1] is not None:
+                minutes = done[1]
+        agg["complete_minutes"].append(float(minutes))
+        agg["complete_days"].append(float(finished - days[0] + 1))
+    if days:
+        first = days[0]
+        active = agg["retention_active"]
+        eligible = agg["retention_eligible"]
+        for k in range(min(RETENTION_DAYS, today - first) + 1):
+            eligible[k] += 1
+        for d in days:
+            if d - first <= RETENTION_DAYS:
+                active[d - first] += 1
+
+    questions = agg["questions"]
+    for qid, (attempts, correct, difficulty) in progress.get("item_stats", {}).items():
+        row = questions.setdefault(qid, [0, 0, 0.0, 0])
+        row[0] += attempts
+        row[1] += correct
+        row[2] += difficulty
+        row[3] += 1
+
+def merge_cohort_aggregates(into, other):
+    into["learners"] += other["learners"]
+    into["errors"] += other["errors"]
+    for key in ("mastery_hist", "retained_hist"):
+        for a, b in zip(into[key], other[key]):
+            for i, count in enumerate(b):
+                a[i] += count
+    into["complete_minutes"].extend(other["complete_minutes"])
+    into["complete_days"].extend(other["complete_days"])
+    for key in ("retention_active", "retention_eligible"):
+        for i, count in enumerate(other[key]):
+            into[key][i] += count
+    for qid, row in other["questions"].items():
+        mine = into["questions"].setdefault(qid, [0, 0, 0.0, 0])
+        for i, value in enumerate(row):
+            mine[i] += value
+    return into
+
+def aggregate_chunk(chunk, module_ids, total_lessons, today):
+    """Worker: fold a chunk of (backend, path) learners into one partial aggregate."""
+    agg = new_cohort_aggregate(len(module_ids))
+    learners = []
+    for backend, path in chunk:
+        try:
+            learners.append(load_learner(backend, path))
+        except (OSError, ValueError, KeyError, sqlite3.Error):
+            agg["errors"] += 1
+    # Decayed mastery is rebuilt from history for the whole chunk at once, so
+    # loose progress files and stores without a mastery model are comparable.
+    try:
+        models = backfill_mastery(learners)
+    except (KeyError, TypeError, ValueError):  # malformed history: find whose
+        models = []
+        for progress in learners:
+            try:
+                models += backfill_mastery([progress])
+            except (KeyError, TypeError, ValueError):
+                models.append(None)
+    for progress, model in zip(learners, models):
+        if model is None:
+            agg["errors"] += 1
+            continue
+        fold_learner(agg, progress, model, module_ids, total_lessons, today)
+    return agg
+
+def histogram_median(hist):
+    n = sum(hist)
+    if not n:
+        return None
+    seen = 0
+    for value, count in enumerate(hist):
+        seen += count
+        if 2 * seen >= n:
+            return value
+
+def summarize_cohort(agg, module_ids):
+    mastery = {}
+    for module_id, hist, retained in zip(module_ids, agg["mastery_hist"], agg["retained_hist"]):
+        n = sum(hist)
+        mastery[module_id] = {
+            "mean": round(sum(v * c for v, c in enumerate(hist)) / n, 1) if n else None,
+            "median": histogram_median(hist),
+            "retained_mean": round(sum(v * c for v, c in enumerate(retained)) / n, 1) if n else None,
+            "retained_median": histogram_median(retained),
+            "mastered_pct": round(100 * sum(hist[80:]) / n, 1) if n else None,
+            # learners per score band: 0-19, 20-39, 40-59, 60-79, 80-100
+            "distribution": [sum(hist[lo:lo + 20]) for lo in (0, 20, 40, 60)] + [sum(hist[80:])],
+        }
+    questions = [
+        {
+            "question": qid,
+            "attempts": attempts,
+            "accuracy": round(correct / attempts, 3),
+            "difficulty": round(difficulty / learners, 3),
+        }
+        for qid, (attempts, correct, difficulty, learners) in agg["questions"].items()
+        if attempts
+    ]
+    questions.sort(key=lambda q: (q["accuracy"], -q["attempts"]))
+    return {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "learners": agg["learners"],
+        "unreadable": agg["errors"],
+        "mastery": mastery,
+        "completed_all": len(agg["complete_minutes"]),
+        "median_minutes_to_complete": (
+            statistics.median(agg["complete_minutes"]) if agg["complete_minutes"] else None
+        ),
+        "median_days_to_complete": (
+            statistics.median(agg["complete_days"]) if agg["complete_days"] else None
+        ),
+        "retention": [
+            round(active / eligible, 3) if eligible else None
+            for active, eligible in zip(agg["retention_active"], agg["retention_eligible"])
+        ],
+        "hardest_questions": questions[:HARDEST_QUESTIONS],
+    }
+
+def aggregate_cohort(root=LEARNERS_DIR, workers=None, chunk_size=COHORT_CHUNK_SIZE):
+    """Stream every learner under root through a process pool and summarize."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    index = get_content_index()
+    module_ids = [m["id"] for m in index.modules]
+    today = date.today().toordinal()
+    total = new_cohort_aggregate(len(module_ids))
+    learners = find_learners(root)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        limit = 2 * workers
+        while True:
+            chunk = list(islice(learners, chunk_size))
+            if chunk:
+                pending.add(pool.submit(aggregate_chunk, chunk, module_ids,
+                                        index.total_lessons, today))
+            if pending and (not chunk or len(pending) >= limit):
+                done = next(as_completed(pending))
+                pending.discard(done)
+                merge_cohort_aggregates(total, done.result())
+            if not chunk and not pending:
+                break
+    return summarize_cohort(total, module_ids)
+
+def print_cohort_summary(summary):
+    index = get_content_index()
+    header(f"COHORT: {summary['learners']} learners")
+    subheader("Mastery by module (median / mean / mastered · retained median)")
+    for module in index.modules:
+        m = summary["mastery"][module["id"]]
+        if m["median"] is None:
+            continue
+        print(f"  {module['title']:<42} {m['median']:>3} / {m['mean']:>5} / {m['mastered_pct']}%"
+              f" · {m['retained_median']:>3}")
+    subheader("Completion")
+    print(f"  Completed all lessons: {summary['completed_all']}")
+    if summary["median_days_to_complete"] is not None:
+        print(f"  Median: {summary['median_days_to_complete']:.0f} days, "
+              f"{summary['median_minutes_to_complete']:.0f} min of study")
+    subheader("Retention (share active N days after first session)")
+    for k in (1, 7, 14, 30):
+        if k < len(summary["retention"]) and summary["retention"][k] is not None:
+            print(f"  Day {k:>2}: {100 * summary['retention'][k]:.0f}%")
+    if summary["hardest_questions"]:
+        subheader("Hardest questions")
+        for q in summary["hardest_questions"][:5]:
+            entry = index.questions.get(q["question"])
+            text = entry[1]["q"].strip().split("\n")[0][:50] if entry else q["question"]
+            print(f"  {int(100 * q['accuracy']):>3}% of {q['attempts']:<5} {text}")
+    print()
+
+def cmd_cohort(args):
+    start = time.perf_counter()
+    summary = aggregate_cohort(args.root, args.workers)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(summary, separators=(",", ":")) + "\n")
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print_cohort_summary(summary)
+        info(f"Summary written to {output} in {time.perf_counter() - start:.1f}s")
+
 # ─────────────────────────────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────────────────────────────
 
+def end_session(progress, session_start, today):
+    """Record the session and block until every pending write is on disk."""
+    LATENCY.flush(progress)
+    elapsed = (time.time() - session_start) / 60
+    record(progress, {
+        "type": "session",
+        "date": today,
+        "duration_min": round(elapsed, 1),
+        "elapsed_min": elapsed,
+    })
+    flush_progress()
+    return elapsed
+
+def _terminate(signum, frame):
+    raise SystemExit(128 + signum)
+
 def main():
+    # Termination and hang-up (e.g. a dropped SSH session) unwind through
+    # main() so the session is still recorded and flushed.
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _terminate)
+
     progress = load_progress()
     session_start = time.time()
     today = str(date.today())
 
     # Track streak
-    if today not in progress.get("streak_days", []):
-        progress.setdefault("streak_days", []).append(today)
-        save_progress(progress)
-
-    show_dashboard(progress)
+    if today not in streak_days(progress):
+        record(progress, {"type": "streak_day", "date": today})
 
-    while True:
-        choice = main_menu()
-
-        if choice == "1":
-            # Next lesson
-            module, lesson = get_next_lesson(progress)
-            if module is None:
-                success("You've completed all lessons! Try quizzes to reinforce.")
-                continue
-            header(f"{module['title']} → {lesson['title']}")
-            paginate(lesson["content"])
-            lid = f"{module['id']}/{lesson['id']}"
-            if lid not in progress["lessons_completed"]:
-                progress["lessons_completed"].append(lid)
-                save_progress(progress)
-            success(f"Lesson complete: {lesson['title']}")
-
-            # Offer quiz
-            if module["id"] in QUIZZES:
-                r = prompt("Take the quiz for this module? (y/n): ")
-                if r.lower() in ("y", "yes"):
-                    run_quiz(module["id"], progress)
-
-        elif choice == "2":
-            # Quiz selection
-            subheader("Available Quizzes")
-            quiz_modules = [m for m in MODULES if m["id"] in QUIZZES]
-            for i, m in enumerate(quiz_modules, 1):
-                score = progress["mastery"].get(m["id"], 0)
-                print(f"  {i}) {m['title']} (best: {score}%)")
-            sel = prompt("Which quiz? (number): ")
-            try:
-                mod = quiz_modules[int(sel) - 1]
-                run_quiz(mod["id"], progress)
-            except (ValueError, IndexError):
-                error("Invalid selection.")
+    # Build the decaying mastery model from history recorded before it existed
+    if needs_mastery_backfill(progress):
+        record(progress, {"type": "mastery_backfill", "model": backfill_mastery([progress])[0]})
 
-        elif choice == "3":
-            run_flashcards()
+    # Fold old sessions and quiz attempts into rollups
+    if needs_rollup(progress, date.today()):
+        record(progress, {"type": "rollup", "date": today})
 
-        elif choice == "4":
-            run_speed_round()
+    show_dashboard(progress)
 
-        elif choice == "5":
-            # Browse modules
-            subheader("All Modules")
-            for i, m in enumerate(sorted(MODULES, key=lambda x: x["order"]), 1):
-                done = sum(
-                    1 for l in m["lessons"]
-                    if f"{m['id']}/{l['id']}" in progress["lessons_completed"]
-                )
-                total = len(m["lessons"])
-                print(f"  {i}) {m['title']} ({done}/{total} lessons)")
-            sel = prompt("Read which module? (number, or Enter to go back): ")
-            if sel:
+    try:
+        while True:
+            choice = main_menu()
+
+            if choice == "1":
+                # Next lesson
+                module, lesson = get_next_lesson(progress)
+                if module is None:
+                    success("You've completed all lessons! Try quizzes to reinforce.")
+                    continue
+                header(f"{module['title']} → {lesson['title']}")
+                if not read_lesson(progress, module, lesson):
+                    lid = f"{module['id']}/{lesson['id']}"
+                    pct = coverage_pct(progress["reading"][lid][1])
+                    info(f"Saved your place ({pct}% read) — choose 1 to pick up where you left off.")
+                    continue
+                success(f"Lesson complete: {lesson['title']}")
+
+                # Offer quiz
+                if get_content_index().has_quiz(module["id"]):
+                    r = prompt("Take the quiz for this module? (y/n): ")
+                    if r.lower() in ("y", "yes"):
+                        run_quiz(module["id"], progress)
+
+            elif choice == "2":
+                # Quiz selection
+                subheader("Available Quizzes")
+                quiz_modules = get_content_index().quiz_modules
+                for i, m in enumerate(quiz_modules, 1):
+                    score = progress["mastery"].get(m["id"], 0)
+                    print(f"  {i}) {m['title']} (best: {score}%)")
+                sel = prompt("Which quiz? (number): ")
                 try:
-                    mod = sorted(MODULES, key=lambda x: x["order"])[int(sel) - 1]
-                    for lesson in mod["lessons"]:
-                        header(f"{mod['title']} → {lesson['title']}")
-                        paginate(lesson["content"])
-                        lid = f"{mod['id']}/{lesson['id']}"
-                        if lid not in progress["lessons_completed"]:
-                            progress["lessons_completed"].append(lid)
-                            save_progress(progress)
+                    mod = quiz_modules[int(sel) - 1]
                 except (ValueError, IndexError):
                     error("Invalid selection.")
+                    continue
+                adaptive = False
+                bank = len(QUIZZES[mod["id"]])
+                if bank >= ADAPTIVE_MIN_QUESTIONS:
+                    length = min(ADAPTIVE_QUIZ_LENGTH, bank)
+                    r = prompt(f"Adaptive quiz ({length} questions) or full bank? (a/f): ")
+                    adaptive = r.lower() in ("a", "adaptive")
+                run_quiz(mod["id"], progress, adaptive)
+
+            elif choice == "3":
+                run_flashcards(progress)
+
+            elif choice == "4":
+                run_speed_round()
+
+            elif choice == "5":
+                # Browse modules
+                subheader("All Modules")
+                index = get_content_index()
+                cursor = lesson_cursor(progress)
+                unlocks = unlock_state(progress)
+                for i, m in enumerate(index.modules, 1):
+                    done = cursor.done_counts[m["id"]]
+                    total = index.lesson_counts[m["id"]]
+                    pending = [p for p in m["requires"] if f"module:{p}" not in unlocks.done]
+                    note = ""
+                    if pending:
+                        more = f" +{len(pending) - 1}" if len(pending) > 1 else ""
+                        note = f"  🔒 after {index.module_by_id[pending[0]]['title']}{more}"
+                    print(f"  {i}) {m['title']} ({done}/{total} lessons){note}")
+                sel = prompt("Read which module? (number, or Enter to go back): ")
+                if sel:
+                    try:
+                        mod = index.modules[int(sel) - 1]
+                        for lesson in mod["lessons"]:
+                            header(f"{mod['title']} → {lesson['title']}")
+                            done = read_lesson(progress, mod, lesson)
+                            LATENCY.flush(progress, force=False)
+                            if not done and progress["reading"][f"{mod['id']}/{lesson['id']}"][0]:
+                                break  # stopped part-way: leave the rest of the module for later
+                    except (ValueError, IndexError):
+                        error("Invalid selection.")
+
+            elif choice == "6":
+                show_dashboard(progress)
+
+            elif choice == "7":
+                show_weak_areas(progress)
+
+            elif choice == "8":
+                run_search(progress)
+
+            elif choice == "9":
+                run_plan(progress)
+
+            elif choice in ("q", "Q", "quit", "exit"):
+                elapsed = end_session(progress, session_start, today)
+                print(f"\n{GREEN}Session: {elapsed:.1f} min | Total: {progress['total_time_min']:.0f} min{RESET}")
+                print(f"{CYAN}See you tomorrow! 🚀{RESET}\n")
+                break
 
-        elif choice == "6":
-            show_dashboard(progress)
-
-        elif choice in ("q", "Q", "quit", "exit"):
-            elapsed = (time.time() - session_start) / 60
-            progress["sessions"].append({
-                "date": today,
-                "duration_min": round(elapsed, 1),
-            })
-            progress["total_time_min"] = round(
-                progress.get("total_time_min", 0) + elapsed, 1
-            )
-            save_progress(progress)
-            print(f"\n{GREEN}Session: {elapsed:.1f} min | Total: {progress['total_time_min']:.0f} min{RESET}")
-            print(f"{CYAN}See you tomorrow! 🚀{RESET}\n")
-            break
-
+            else:
+                error("Invalid choice.")
+
+    except (KeyboardInterrupt, SystemExit):
+        end_session(progress, session_start, today)
+        raise
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Norstella customer learning app")
+    sub = parser.add_subparsers(dest="command")
+
+    learner = argparse.ArgumentParser(add_help=False)
+    learner.add_argument("--data-dir", type=Path, help="Progress directory (default: learning_data/)")
+    learner.add_argument("--learner", help="Server learner id (uses its shard under learning_data/learners/)")
+    learner.add_argument("--backend", choices=("sqlite", "log", "json"), help="Progress store backend")
+    learner.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+
+    sub.add_parser("stats", parents=[learner], help="Print a learner's progress summary")
+    sub.add_parser("next-lesson", parents=[learner], help="Print the next unread lesson")
+    p = sub.add_parser("plan", parents=[learner], help="Plan a study session within a time budget")
+    p.add_argument("--minutes", type=int, default=PLAN_MINUTES)
+
+    p = sub.add_parser("quiz", parents=[learner], help="Grade an answer file for a module quiz")
+    p.add_argument("--module", required=True)
+    p.add_argument("--answers-file", required=True,
+                   help="JSON object mapping question id (or 0-based index) to answer")
+
+    p = sub.add_parser("export", parents=[learner], help="Dump a learner's progress as JSON")
+    p.add_argument("--output", help="Write to a file instead of stdout")
+
+    p = sub.add_parser("search", parents=[learner],
+                       help="Search lessons, quiz questions and flashcards")
+    p.add_argument("query", nargs="+")
+    p.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+
+    p = sub.add_parser("grade", help="Grade submitted answer sheets into learner stores")
+    p.add_argument("paths", nargs="+", help="JSON, JSONL or CSV sheets, or directories of them")
+    p.add_argument("--root", type=Path, default=LEARNERS_DIR, help="Learner stores directory")
+    p.add_argument("--backend", choices=("sqlite", "log", "json"), help="Progress store backend")
+    p.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    p.add_argument("--output", help="Write one JSON line per graded sheet here")
+    p.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    p = sub.add_parser("cohort", help="Aggregate progress across many learners")
+    p.add_argument("--root", type=Path, default=LEARNERS_DIR,
+                   help="Directory of learner stores or progress.json files")
+    p.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    p.add_argument("--output", default=str(COHORT_SUMMARY_FILE))
+    p.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    p = sub.add_parser("bench", help="Benchmark startup time of the batch subcommands")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--engine", action="store_true",
+                   help="Measure quiz-engine grading throughput instead")
+    p.add_argument("--plan", action="store_true",
+                   help="Measure session planning time on a synthetic backlog instead")
+    p.add_argument("--items", type=int, default=50000)
+    p.add_argument("--sessions", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=200)
+
+    p = sub.add_parser("serve", help="Serve lessons and quizzes to many learners over HTTP")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--socket", help="Listen on a Unix socket instead of a TCP port")
+    p.add_argument("--cache-size", type=int, default=LEARNER_CACHE_SIZE,
+                   help="Number of learner states kept in memory")
+
+    p = sub.add_parser("loadtest", help="Simulate concurrent quiz sessions against the server")
+    p.add_argument("--learners", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=500)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, help="Target a running server (default: in-process scratch server)")
+
+    args = parser.parse_args(argv)
+    commands = {
+        "stats": cmd_stats,
+        "next-lesson": cmd_next_lesson,
+        "plan": cmd_plan,
+        "quiz": cmd_quiz,
+        "export": cmd_export,
+        "search": cmd_search,
+        "grade": cmd_grade,
+        "cohort": cmd_cohort,
+    }
+    try:
+        if args.command in commands:
+            commands[args.command](args)
+        elif args.command == "bench" and args.engine:
+            run_engine_bench(args.sessions, args.concurrency)
+        elif args.command == "bench" and args.plan:
+            run_plan_bench(args.items)
+        elif args.command == "bench":
+            run_startup_bench(args.repeat)
+        elif args.command == "serve":
+            serve(args.host, args.port, args.socket, args.cache_size)
+        elif args.command == "loadtest":
+            import asyncio
+
+            asyncio.run(run_load_test(args.learners, args.concurrency, args.host, args.port))
         else:
-            error("Invalid choice.")
+            main()
+    except ApiError as e:
+        parser.error(str(e))
 
 
 if __name__ == "__main__":
-    main()
+    cli()